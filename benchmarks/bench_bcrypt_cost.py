@@ -0,0 +1,32 @@
+"""
+Picks the bcrypt cost parameter for a target hashing latency on this machine.
+
+run:
+python -m benchmarks.bench_bcrypt_cost [target_ms]
+"""
+from passlib.context import CryptContext
+import sys
+import time
+
+def measure(rounds: int, samples: int = 3) -> float:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("benchmark-password")
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def main():
+    target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 250
+    chosen = 4
+    for rounds in range(4, 17):
+        elapsed = measure(rounds)
+        print(f"rounds={rounds:<3} {elapsed:9.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    print(f"BCRYPT_ROUNDS={chosen} (target {target_ms:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+JWT encode and decode throughput per algorithm, with keys parsed once by
+the key manager and, for comparison, with the raw secret parsed per call.
+
+run:
+python -m benchmarks.bench_jwt_algorithms
+"""
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwt
+from src.services.keys import KeyManager
+import time
+
+ROUNDS = 2000
+
+def private_pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+def ops_per_second(fn, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return rounds / (time.perf_counter() - start)
+
+def main():
+    claims = {"sub": "bench@example.com", "scope": "access_token"}
+    materials = {
+        "HS256": "bench-secret",
+        "RS256": private_pem(rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        "ES256": private_pem(ec.generate_private_key(ec.SECP256R1())),
+    }
+
+    print(f"{'algorithm':<22}{'encode/s':>12}{'decode/s':>12}")
+    secret_token = jwt.encode(claims, materials["HS256"], algorithm="HS256")
+    print(f"{'HS256 (raw secret)':<22}"
+          f"{ops_per_second(lambda: jwt.encode(claims, materials['HS256'], algorithm='HS256')):>12.0f}"
+          f"{ops_per_second(lambda: jwt.decode(secret_token, materials['HS256'], algorithms=['HS256'])):>12.0f}")
+
+    for algorithm, material in materials.items():
+        manager = KeyManager()
+        manager.add_key(algorithm, algorithm, material, active=True)
+        token = manager.encode(claims)
+        print(f"{algorithm + ' (key manager)':<22}"
+              f"{ops_per_second(lambda: manager.encode(claims)):>12.0f}"
+              f"{ops_per_second(lambda: manager.decode(token)):>12.0f}")
+
+if __name__ == "__main__":
+    main()
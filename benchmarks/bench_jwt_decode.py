@@ -0,0 +1,28 @@
+"""
+Access-token decode cost with and without the verified-payload cache.
+
+run:
+python -m benchmarks.bench_jwt_decode
+"""
+from jose import jwt
+from src.services.auth import auth_service
+import asyncio
+import timeit
+
+ROUNDS = 20000
+
+def main():
+    token = asyncio.run(auth_service.create_access_token(data={"sub": "bench@example.com"}))
+
+    def uncached():
+        jwt.decode(token, auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM])
+
+    def cached():
+        auth_service.decode_access_token(token)
+
+    for name, fn in (("jwt.decode", uncached), ("decode_access_token (cached)", cached)):
+        seconds = min(timeit.repeat(fn, number=ROUNDS, repeat=3))
+        print(f"{name:<32} {seconds / ROUNDS * 1e6:8.2f} us/op")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares serializing a page of contacts the way FastAPI does for a
+``response_model`` (validate every row, dump it, ``json.dumps``) with
+the trusted-row paths: a TypeAdapter over dicts read from the rows, and
+the same dicts rendered by orjson, which the list endpoints use.
+
+run:
+python -m benchmarks.bench_serialization [page size] [pages]
+"""
+from datetime import date
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from src.database.models import Contact
+from src.schemas import ContactResponse
+from src.services.serializers import contact_serializer
+from typing import List
+from typing_extensions import TypedDict
+import sys
+import time
+
+ContactRow = TypedDict("ContactRow", {name: field.annotation for name, field in ContactResponse.model_fields.items()})
+
+response_adapter = TypeAdapter(List[ContactResponse])
+row_adapter = TypeAdapter(List[ContactRow])
+
+def contacts(count: int) -> list:
+    return [
+        Contact(id=n, first_name=f"First{n}", last_name=f"Last{n}", email=f"contact{n}@example.com", phone="+380501234567",
+                birthday=date(1990, 1 + n % 12, 1 + n % 28), user_id=1, additional_info="Met at the conference")
+        for n in range(count)
+    ]
+
+def response_model(page: list) -> bytes:
+    value = response_adapter.validate_python(page, from_attributes=True)
+    return JSONResponse(response_adapter.dump_python(value, mode="json")).body
+
+def response_model_orjson(page: list) -> bytes:
+    value = response_adapter.validate_python(page, from_attributes=True)
+    return ORJSONResponse(response_adapter.dump_python(value, mode="json")).body
+
+def trusted_type_adapter(page: list) -> bytes:
+    return row_adapter.dump_json(contact_serializer.to_dicts(page))
+
+def trusted_orjson(page: list) -> bytes:
+    return ORJSONResponse(contact_serializer.to_dicts(page)).body
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    page = contacts(size)
+    for name, serialize in (
+        ("response_model + json", response_model),
+        ("response_model + orjson", response_model_orjson),
+        ("trusted TypeAdapter", trusted_type_adapter),
+        ("trusted orjson", trusted_orjson),
+    ):
+        start = time.perf_counter()
+        for _ in range(pages):
+            serialize(page)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<24} {pages / elapsed:10.0f} pages/s {elapsed / pages * 1e6:10.0f} us/page")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares sending through a new SMTP connection per message with the
+pooled sender, against a local aiosmtpd server.
+
+run:
+python -m benchmarks.bench_smtp_pool [messages]
+"""
+from aiosmtpd.controller import Controller
+from email.message import EmailMessage
+from src.services.smtp_pool import SMTPPool
+import aiosmtplib
+import asyncio
+import socket
+import sys
+import time
+
+class NullHandler:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+def make_message() -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = "Confirm your email "
+    message["From"] = "app@example.com"
+    message["To"] = "user@example.com"
+    message.set_content("<p>Hi</p>", subtype="html")
+    return message
+
+async def send_unpooled(port: int, count: int, concurrency: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send():
+        async with slots:
+            smtp = aiosmtplib.SMTP(hostname="127.0.0.1", port=port)
+            await smtp.connect()
+            await smtp.send_message(make_message())
+            await smtp.quit()
+
+    await asyncio.gather(*(send() for _ in range(count)))
+
+async def send_pooled(port: int, count: int, concurrency: int) -> None:
+    pool = SMTPPool("127.0.0.1", port, size=concurrency)
+    await asyncio.gather(*(pool.send(make_message()) for _ in range(count)))
+    await pool.close()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    controller = Controller(NullHandler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        for name, sender in (("connection per message", send_unpooled), ("pooled", send_pooled)):
+            start = time.perf_counter()
+            asyncio.run(sender(port, count, 4))
+            elapsed = time.perf_counter() - start
+            print(f"{name:<24} {count / elapsed:8.0f} msg/s")
+    finally:
+        controller.stop()
+    print("Local plaintext SMTP; with TLS and login the handshake saved per message is larger.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compares email template rendering the way FastMail does it (a new Jinja
+environment per message) with the precompiled renderer, one by one and
+in batches.
+
+run:
+python -m benchmarks.bench_templates [messages]
+"""
+from jinja2 import Environment, FileSystemLoader
+from src.services.renderer import TEMPLATE_FOLDER, TemplateRenderer
+import sys
+import time
+
+TEMPLATE = "email_template.html"
+
+def contexts(count: int) -> list:
+    return [{"host": "http://localhost:8001/", "username": f"user{n}", "token": f"token-{n}"} for n in range(count)]
+
+def per_message_environment(batch: list) -> None:
+    for context in batch:
+        Environment(loader=FileSystemLoader(TEMPLATE_FOLDER)).get_template(TEMPLATE).render(**context)
+
+def precompiled(batch: list) -> None:
+    renderer = TemplateRenderer()
+    for context in batch:
+        renderer.render(TEMPLATE, **context)
+
+def precompiled_batch(batch: list) -> None:
+    TemplateRenderer().render_batch(TEMPLATE, batch)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    batch = contexts(count)
+    for name, render in (
+        ("environment per message", per_message_environment),
+        ("precompiled", precompiled),
+        ("precompiled batch", precompiled_batch),
+    ):
+        start = time.perf_counter()
+        render(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<24} {count / elapsed:10.0f} renders/s")
+
+if __name__ == "__main__":
+    main()
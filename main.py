@@ -1,46 +1,56 @@
 from contextlib import asynccontextmanager
 from fastapi import Depends, FastAPI
-from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from src.conf.config import settings
-from src.routes import auth, contacts, users
-import redis.asyncio as redis
+from src.database.db import SessionLocal
+from src.middleware.body_limit import BodySizeLimitMiddleware
+from src.middleware.compression import CompressionMiddleware
+from src.routes import auth, avatars, contacts, users
+from src.services.auth import auth_service
+from src.services.avatars import MULTIPART_OVERHEAD, avatar_service, image_pool
+from src.services.change_feed import change_feed
+from src.services.email import smtp_pool
+from src.services.login_throttle import login_throttle
+from src.services.passwords import hashing_pool
+from src.services.rate_limit import RateLimiter, limiter, user_limiter
+from src.services.redis_manager import redis_manager
+from src.services.revocation import revocations
+from src.services.sync import contact_sync
 
-if(settings.app_location == 'LOCAL'):
-    redis_host = settings.redis_local_host
-else:
-    redis_host = settings.redis_host
-    
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    r = None
-
-    try:
-        r = redis.Redis(
-            host='localhost',
-            port=settings.redis_port, db=0,
-            encoding='utf-8',
-            decode_responses=True
-        )
-
-        if await r.ping():
-            print("Connection successfull")
-            await FastAPILimiter.init(r)
-            print("Limiter initialised")
-        else:
-            print(f"Connection failed")
-            raise Exception("Redis ping failed")
-    except Exception as e:
-        print(f"err: {e}")
+    if await redis_manager.connect():
+        print("Connection successfull")
 
-    finally:
-        await r.close()
-        print("Redis connection closed")
+        db = SessionLocal()
+        try:
+            await auth_service.load_known_emails(db)
+            await auth_service.flush_pending_known_emails()
+            print("Known emails filter loaded")
+        except Exception as e:
+            print(f"err: {e}")
+        finally:
+            db.close()
+    else:
+        print("Connection failed, retrying in background")
+    redis_manager.on_restore(auth_service.flush_pending_known_emails)
+    revocations.start()
+    change_feed.start()
+    contact_sync.start()
 
     yield
 
-app = FastAPI(lifespan=lifespan)
+    await contact_sync.stop()
+    await change_feed.stop()
+    await revocations.stop()
+    await redis_manager.close()
+    print("Redis connection closed")
+    hashing_pool.shutdown()
+    image_pool.shutdown()
+    await smtp_pool.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 origins = [
     "http://localhost:3000",
 ]
@@ -51,11 +61,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/api/users/avatar": settings.avatar_max_bytes + MULTIPART_OVERHEAD},
+)
 
 app.include_router(auth.router, prefix='/api')
 app.include_router(contacts.router, prefix='/api')
 app.include_router(users.router, prefix='/api')
+app.include_router(avatars.router, prefix='/api')
     
+@app.get("/health")
+async def health():
+    return {
+        "redis": "ok" if await redis_manager.ping() else "unavailable",
+        "rate_limiter": limiter.metrics(),
+        "user_rate_limiter": user_limiter.metrics(),
+        "password_hashing": hashing_pool.metrics(),
+        "token_revocation": revocations.metrics(),
+        "login_throttle": login_throttle.metrics(),
+        "smtp": smtp_pool.metrics(),
+        "avatars": avatar_service.metrics(),
+        "change_feed": change_feed.metrics(),
+    }
+
 @app.get("/", dependencies=[Depends(RateLimiter(times=2, seconds=5))])
 def read_root():
     return {"message": "Hello World from API"}
@@ -0,0 +1,33 @@
+"""Add pending known emails
+
+Revision ID: 3f6b8e2d9c47
+Revises: 5a7d3c9e8f21
+Create Date: 2026-10-19 21:05:33.184260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b8e2d9c47'
+down_revision: Union[str, None] = '5a7d3c9e8f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('pending_known_emails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=250), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pending_known_emails_email'), 'pending_known_emails', ['email'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_pending_known_emails_email'), table_name='pending_known_emails')
+    op.drop_table('pending_known_emails')
@@ -0,0 +1,26 @@
+"""Add user rate limit tier
+
+Revision ID: 7c3e91a4b5d2
+Revises: 2d55f02f72a5
+Create Date: 2026-10-19 11:02:14.512309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e91a4b5d2'
+down_revision: Union[str, None] = '2d55f02f72a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('rate_limit_tier', sa.String(length=20), server_default='standard', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'rate_limit_tier')
@@ -0,0 +1,25 @@
+"""Add users reset_token index
+
+Revision ID: 8b4e2a6f1c35
+Revises: 3f6b8e2d9c47
+Create Date: 2026-10-19 22:14:08.529731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e2a6f1c35'
+down_revision: Union[str, None] = '3f6b8e2d9c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_users_reset_token'), 'users', ['reset_token'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_reset_token'), table_name='users')
@@ -0,0 +1,33 @@
+"""Add contacts birthday month-day index
+
+Revision ID: 9e1f5c7a2b64
+Revises: 4b8d2f6e1a93
+Create Date: 2026-10-19 16:05:33.917204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e1f5c7a2b64'
+down_revision: Union[str, None] = '4b8d2f6e1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Matches the expressions of repository.contacts.get_birthdays_page, so the
+    # daily birthday campaign reads today's contacts as one ordered index range.
+    op.create_index(
+        'ix_contacts_birthday_month_day',
+        'contacts',
+        [sa.text('EXTRACT(month FROM birthday)'), sa.text('EXTRACT(day FROM birthday)'), 'user_id', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_birthday_month_day', table_name='contacts')
@@ -0,0 +1,25 @@
+"""Add contact tombstones deleted_at index
+
+Revision ID: c5d1e7a3f920
+Revises: 8b4e2a6f1c35
+Create Date: 2026-10-19 23:02:41.671904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d1e7a3f920'
+down_revision: Union[str, None] = '8b4e2a6f1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contact_tombstones_deleted_at', 'contact_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_tombstones_deleted_at', table_name='contact_tombstones')
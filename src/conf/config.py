@@ -10,17 +10,64 @@ class Settings(BaseSettings):
     cloudinary_api_key: str = os.getenv('CLOUDINARY_API_KEY')
     cloudinary_api_secret: str = os.getenv('CLOUDINARY_API_SECRET')
     cloudinary_name: str = os.getenv('CLOUDINARY_NAME')
+    avatar_backend: str = os.getenv('AVATAR_BACKEND', 'cloudinary')
+    avatar_local_dir: str = os.getenv('AVATAR_LOCAL_DIR', 'media/avatars')
+    avatar_max_bytes: int = os.getenv('AVATAR_MAX_BYTES', 5 * 1024 * 1024)
+    avatar_url_ttl: int = os.getenv('AVATAR_URL_TTL', 7 * 24 * 3600)
+    avatar_accel_redirect: str = os.getenv('AVATAR_ACCEL_REDIRECT', '')
+    compression_minimum_size: int = os.getenv('COMPRESSION_MINIMUM_SIZE', 500)
+    compression_gzip_level: int = os.getenv('COMPRESSION_GZIP_LEVEL', 6)
+    sync_overlap: float = os.getenv('SYNC_OVERLAP', 5)
+    sync_tombstone_retention_days: int = os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+    change_feed_queue_size: int = os.getenv('CHANGE_FEED_QUEUE_SIZE', 100)
+    change_feed_heartbeat: float = os.getenv('CHANGE_FEED_HEARTBEAT', 15)
+    change_feed_retry_ms: int = os.getenv('CHANGE_FEED_RETRY_MS', 5000)
+    change_feed_max_connections: int = os.getenv('CHANGE_FEED_MAX_CONNECTIONS', 5)
+    image_workers: int = os.getenv('IMAGE_WORKERS', 2)
+    image_queue: int = os.getenv('IMAGE_QUEUE', 16)
     secret_key: str = os.getenv('SECRET_KEY')
     jwt_algorithm: str = os.getenv('JWT_ALGORITHM')
+    bcrypt_rounds: int = os.getenv('BCRYPT_ROUNDS', 12)
+    hashing_workers: int = os.getenv('HASHING_WORKERS', 4)
+    hashing_queue: int = os.getenv('HASHING_QUEUE', 32)
+    login_account_threshold: int = os.getenv('LOGIN_ACCOUNT_THRESHOLD', 5)
+    login_ip_threshold: int = os.getenv('LOGIN_IP_THRESHOLD', 20)
+    login_max_lockout: int = os.getenv('LOGIN_MAX_LOCKOUT', 900)
+    jwt_keys: list = []
+    jwt_active_kid: str = os.getenv('JWT_ACTIVE_KID', 'default')
+    jwt_cache_size: int = os.getenv('JWT_CACHE_SIZE', 4096)
+    negative_cache_size: int = os.getenv('NEGATIVE_CACHE_SIZE', 10000)
+    negative_cache_ttl: int = os.getenv('NEGATIVE_CACHE_TTL', 30)
+    user_bloom_capacity: int = os.getenv('USER_BLOOM_CAPACITY', 1000000)
+    user_bloom_ttl: int = os.getenv('USER_BLOOM_TTL', 86400)
+    cache_early_refresh_beta: float = os.getenv('CACHE_EARLY_REFRESH_BETA', 1.0)
+    revocation_filter_capacity: int = os.getenv('REVOCATION_FILTER_CAPACITY', 100000)
+    revocation_reload_interval: int = os.getenv('REVOCATION_RELOAD_INTERVAL', 3600)
+    revocation_default_ttl: int = os.getenv('REVOCATION_DEFAULT_TTL', 900)
     mail_username: str = os.getenv('MAIL_USERNAME')
     mail_password: str = "!@yvafimq_9@S"
     mail_from: str = os.getenv('MAIL_FROM')
     mail_port: int = os.getenv('MAIL_PORT')
     mail_server: str = os.getenv('MAIL_SERVER')
     mail_server: str = "mail.your-server.de"
+    smtp_pool_size: int = os.getenv('SMTP_POOL_SIZE', 4)
+    smtp_max_messages: int = os.getenv('SMTP_MAX_MESSAGES', 100)
+    outbox_batch_size: int = os.getenv('OUTBOX_BATCH_SIZE', 50)
+    outbox_max_attempts: int = os.getenv('OUTBOX_MAX_ATTEMPTS', 8)
+    outbox_poll_interval: float = os.getenv('OUTBOX_POLL_INTERVAL', 2)
+    outbox_retention_days: int = os.getenv('OUTBOX_RETENTION_DAYS', 7)
+    birthday_campaign_page_size: int = os.getenv('BIRTHDAY_CAMPAIGN_PAGE_SIZE', 5000)
+    birthday_campaign_concurrency: int = os.getenv('BIRTHDAY_CAMPAIGN_CONCURRENCY', 16)
     redis_host: str = os.getenv("REDIS_HOST")
     redis_local_host: str = os.getenv("REDIS_LOCAL_HOST")
     redis_port: int = os.getenv("REDIS_PORT")
+    redis_max_connections: int = os.getenv("REDIS_MAX_CONNECTIONS", 50)
+    rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "redis")
+    trusted_proxies: str = os.getenv("TRUSTED_PROXIES", "")
+    rate_limit_tiers: dict = {
+        "standard": {"limit": 60, "period": 60},
+        "premium": {"limit": 600, "period": 60},
+    }
     postgres_db_protocol: str = os.getenv("POSTGRES_DB_PROTOCOL")
     postgres_db_user: str = os.getenv("POSTGRES_DB_USER")
     postgres_db_password: str = os.getenv("POSTGRES_DB_PASSWORD")
@@ -1,4 +1,5 @@
-from sqlalchemy import Boolean, Column, Date, func, Integer, String
+from datetime import datetime, timezone
+from sqlalchemy import Boolean, Column, Date, func, Index, Integer, JSON, String, Text
 from sqlalchemy.orm import declarative_base as declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
@@ -6,6 +7,9 @@ from sqlalchemy.sql.sqltypes import DateTime
 
 Base = declarative_base()
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Contact(Base):
     __tablename__ = "contacts"
     id = Column(Integer, primary_key=True)
@@ -20,18 +24,56 @@ class Contact(Base):
         ForeignKey('users.id', ondelete='CASCADE'),
         default=None
     )
+    updated_at = Column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
     user = relationship('User', backref="contacts")
 
+    __table_args__ = (Index('ix_contacts_user_id_updated_at', 'user_id', 'updated_at', 'id'),)
+
+class ContactTombstone(Base):
+    __tablename__ = "contact_tombstones"
+    id = Column(Integer, primary_key=True)
+    contact_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=utcnow)
+
+    __table_args__ = (
+        Index('ix_contact_tombstones_user_id_deleted_at', 'user_id', 'deleted_at', 'id'),
+        Index('ix_contact_tombstones_deleted_at', 'deleted_at'),
+    )
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     username = Column(String(50))
     email = Column(String(250), nullable=False, unique=True)
     hashed_password = Column(String(255), nullable=True)
-    reset_token = Column(String(255), nullable=True)
+    reset_token = Column(String(255), nullable=True, index=True)
     reset_token_expired = Column(DateTime(50), nullable=True)
     password = Column(String(255), nullable=False)
     created_at = Column('crated_at', DateTime, default=func.now())
     avatar = Column(String(255), nullable=True)
     refresh_token = Column(String(255), nullable=True)
     confirmed = Column(Boolean, nullable=False, default=False)
+    rate_limit_tier = Column(String(20), nullable=False, default='standard', server_default='standard')
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    recipient = Column(String(250), nullable=False)
+    payload = Column(JSON, nullable=False)
+    dedup_key = Column(String(255), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default='pending', server_default='pending')
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),)
+
+class PendingKnownEmail(Base):
+    __tablename__ = "pending_known_emails"
+    id = Column(Integer, primary_key=True)
+    email = Column(String(250), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
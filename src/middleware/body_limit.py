@@ -0,0 +1,48 @@
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict
+
+class BodySizeLimitMiddleware:
+    """
+    Caps the request body size of the given paths before the app reads it.
+
+    Form parsing spools the whole body, uploads included, before a route
+    runs, so a size check in the route comes too late. A declared
+    ``Content-Length`` over the limit is answered with 413 without reading
+    the body at all; otherwise the body is counted as it streams in, and
+    reading stops with 413 as soon as it goes over.
+
+    :param limits: Maximum body size in bytes, by request path.
+    :type limits: Dict[str, int]
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > limit:
+            response = JSONResponse({"detail": "Request body is too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail="Request body is too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
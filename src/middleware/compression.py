@@ -0,0 +1,217 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, Dict, Optional, Sequence
+import asyncio
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Media types that are already compressed, or must reach the client unbuffered.
+SKIPPED_TYPES = {
+    "text/event-stream",
+    "application/octet-stream",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/zstd",
+    "application/x-7z-compressed",
+    "application/x-bzip2",
+    "application/x-rar-compressed",
+    "application/pdf",
+}
+SKIPPED_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+COMPRESSIBLE_IMAGES = {"image/svg+xml", "image/x-icon", "image/bmp"}
+# Bodies at least this large are compressed in a worker thread.
+THREAD_THRESHOLD = 256 * 1024
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+def choose_encoding(accept_encoding: str, available: Sequence[str]) -> Optional[str]:
+    """
+    Picks the encoding of ``available`` the client rates highest in its
+    ``Accept-Encoding``; ties go to the earlier one in ``available``.
+    """
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            qualities[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def is_compressible(message: Message, headers: Headers) -> bool:
+    if message["status"] < 200 or message["status"] in (204, 206, 304):
+        return False
+    if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if not media_type or media_type in SKIPPED_TYPES:
+        return False
+    return media_type in COMPRESSIBLE_IMAGES or not media_type.startswith(SKIPPED_PREFIXES)
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli, zstd or gzip, whichever the client
+    prefers in ``Accept-Encoding``; brotli and zstd are offered only when
+    the ``brotli`` and ``zstandard`` packages are installed.
+
+    Responses are left alone when they are smaller than ``minimum_size``,
+    already encoded, partial (``Range``), marked ``no-transform``, or of a
+    type that does not shrink (images, archives) or has to arrive as soon
+    as it is written (``text/event-stream``). A streamed response is
+    compressed chunk by chunk, each flushed so the client gets it without
+    waiting for the rest.
+
+    :param minimum_size: The smallest body, in bytes, worth compressing.
+    :type minimum_size: int
+    :param gzip_level: The zlib compression level.
+    :type gzip_level: int
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, gzip_level: int = 6,
+                 brotli_quality: int = 4, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressors: Dict[str, Callable] = {}
+        if brotli is not None:
+            self.compressors["br"] = lambda: BrotliCompressor(brotli_quality)
+        if zstandard is not None:
+            self.compressors["zstd"] = lambda: ZstdCompressor(zstd_level)
+        self.compressors["gzip"] = lambda: GzipCompressor(gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = None
+        if "range" not in headers:
+            encoding = choose_encoding(headers.get("accept-encoding", ""), list(self.compressors))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressedResponder(send, encoding, self.compressors[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send_compressed)
+
+class CompressedResponder:
+    def __init__(self, send: Send, encoding: str, compressor_factory: Callable, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.compressor_factory = compressor_factory
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _encode_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        # The compressed body is a different representation, so it can only match weakly.
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    def _compress_whole(self, body: bytes) -> bytes:
+        compressor = self.compressor_factory()
+        return compressor.compress(body) + compressor.finish()
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            if self.start is not None:
+                await self.send(self.start)
+                self.start = None
+                self.passthrough = True
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(scope=start)
+            declared = headers.get("content-length")
+            small = len(body) < self.minimum_size if not more_body else (
+                declared is not None and declared.isdigit() and int(declared) < self.minimum_size
+            )
+            if small or not is_compressible(start, headers):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self._encode_headers(headers)
+            if not more_body:
+                if len(body) >= THREAD_THRESHOLD:
+                    data = await asyncio.to_thread(self._compress_whole, body)
+                else:
+                    data = self._compress_whole(body)
+                headers["Content-Length"] = str(len(data))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            del headers["Content-Length"]
+            self.compressor = self.compressor_factory()
+            await self.send(start)
+
+        compressor = self.compressor
+        data = compressor.compress(body) + (compressor.flush() if more_body else compressor.finish())
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -1,11 +1,11 @@
 from datetime import datetime, timedelta
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, extract, func, or_, tuple_
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 from sqlalchemy.types import String
 from src.schemas import ContactModel
-from src.database.models import Contact, User
-from typing import List
+from src.database.models import Contact, ContactTombstone, User
+from typing import List, Sequence, Tuple
 
 def create_contact(body: ContactModel, user: User, db: Session) -> Contact:
     """
@@ -134,6 +134,70 @@ def get_contacts(skip: int, limit: int, user: User, db: Session) -> List[Contact
     
     return result.scalars().all()
 
+async def get_contacts_columns(columns: Sequence[str], skip: int, limit: int, user: User, db: Session) -> list:
+    """
+    Retrieves a page of contacts for a specific user, reading only the specified columns.
+
+    :param columns: The names of the columns to read.
+    :type columns: Sequence[str]
+    :param skip: The number of contacts to skip.
+    :type skip: int
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :param user: The user to retrieve contacts for.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: Rows holding the selected columns.
+    :rtype: list
+    """
+    stmt = (
+        select(*[getattr(Contact, column) for column in columns])
+        .where(Contact.user_id == user.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+async def get_contact_columns(contact_id: int, columns: Sequence[str], user: User, db: Session):
+    """
+    Retrieves the specified columns of a single contact for a specific user.
+
+    :param contact_id: The ID of the contact to retrieve.
+    :type contact_id: int
+    :param columns: The names of the columns to read.
+    :type columns: Sequence[str]
+    :param user: The user to retrieve the contact for.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: A row holding the selected columns, or None if the contact does not exist.
+    :rtype: Row | None
+    """
+    stmt = select(*[getattr(Contact, column) for column in columns]).where(
+        Contact.id == contact_id, Contact.user_id == user.id
+    )
+    return db.execute(stmt).one_or_none()
+
+async def get_contacts_by_ids(ids: Sequence[int], user: User, db: Session) -> Tuple[List[Contact], List[int]]:
+    """
+    Retrieves the contacts with the specified IDs for a specific user in a single query.
+
+    :param ids: The IDs of the contacts to retrieve, without duplicates.
+    :type ids: Sequence[int]
+    :param user: The user to retrieve the contacts for.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: The contacts found, in the order of ``ids``, and the IDs not found.
+    :rtype: Tuple[List[Contact], List[int]]
+    """
+    stmt = select(Contact).where(Contact.user_id == user.id, Contact.id.in_(list(ids)))
+    found = {contact.id: contact for contact in db.execute(stmt).scalars()}
+    contacts = [found[contact_id] for contact_id in ids if contact_id in found]
+    missing = [contact_id for contact_id in ids if contact_id not in found]
+    return contacts, missing
+
 def remove_contact(contact_id: int, user: User, db: Session) -> Contact | None:
     """
     Removes a single contact with the specified ID for a specific user.
@@ -153,6 +217,7 @@ def remove_contact(contact_id: int, user: User, db: Session) -> Contact | None:
     
     if contact:
         db.delete(contact)
+        db.add(ContactTombstone(contact_id=contact.id, user_id=user.id))
         db.commit()
     return contact
 
@@ -217,3 +282,101 @@ def get_upcoming_birthdays(user: User, db: Session) -> List[Contact]:
     contacts = result.scalars().all()
 
     return contacts
+
+def get_birthdays_page(month: int, days: Sequence[int], after: Tuple[int, int], limit: int, db: Session) -> list:
+    """
+    Retrieves one page of the contacts of all users whose birthday falls on
+    ``month`` and one of ``days``, with the email and name of their owner.
+
+    Rows are ordered by ``(user_id, contact id)`` and the page starts after
+    ``after``, so the scan walks the month-day index once without OFFSET.
+
+    :param month: The birthday month.
+    :type month: int
+    :param days: The birthday days of the month.
+    :type days: Sequence[int]
+    :param after: The ``(user_id, contact id)`` of the last row already read.
+    :type after: Tuple[int, int]
+    :param limit: The maximum number of rows to return.
+    :type limit: int
+    :param db: The database session.
+    :type db: Session
+    :return: Rows of ``(id, user_id, first_name, last_name, email, user_email, username)``.
+    :rtype: list
+    """
+    stmt = (
+        select(
+            Contact.id, Contact.user_id, Contact.first_name, Contact.last_name, Contact.email,
+            User.email.label("user_email"), User.username,
+        )
+        .join(User, Contact.user_id == User.id)
+        .where(
+            extract("month", Contact.birthday) == month,
+            extract("day", Contact.birthday).in_(list(days)),
+            tuple_(Contact.user_id, Contact.id) > tuple_(*after),
+        )
+        .order_by(Contact.user_id, Contact.id)
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+async def get_changed_contacts(after: Tuple[datetime, int], limit: int, user: User, db: Session) -> List[Contact]:
+    """
+    Retrieves the contacts of a specific user created or updated after a sync cursor.
+
+    :param after: The ``(updated_at, id)`` of the last change already read.
+    :type after: Tuple[datetime, int]
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :param user: The user to retrieve contacts for.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: The contacts, ordered by ``(updated_at, id)``.
+    :rtype: List[Contact]
+    """
+    stmt = (
+        select(Contact)
+        .where(Contact.user_id == user.id, tuple_(Contact.updated_at, Contact.id) > tuple_(*after))
+        .order_by(Contact.updated_at, Contact.id)
+        .limit(limit)
+    )
+    return db.execute(stmt).scalars().all()
+
+async def get_tombstones(after: Tuple[datetime, int], limit: int, user: User, db: Session) -> List[ContactTombstone]:
+    """
+    Retrieves the records of contacts of a specific user deleted after a sync cursor.
+
+    :param after: The ``(deleted_at, id)`` of the last tombstone already read.
+    :type after: Tuple[datetime, int]
+    :param limit: The maximum number of tombstones to return.
+    :type limit: int
+    :param user: The user to retrieve tombstones for.
+    :type user: User
+    :param db: The database session.
+    :type db: Session
+    :return: The tombstones, ordered by ``(deleted_at, id)``.
+    :rtype: List[ContactTombstone]
+    """
+    stmt = (
+        select(ContactTombstone)
+        .where(
+            ContactTombstone.user_id == user.id,
+            tuple_(ContactTombstone.deleted_at, ContactTombstone.id) > tuple_(*after),
+        )
+        .order_by(ContactTombstone.deleted_at, ContactTombstone.id)
+        .limit(limit)
+    )
+    return db.execute(stmt).scalars().all()
+
+async def purge_tombstones(db: Session, before: datetime) -> int:
+    """
+    Deletes the tombstones of contacts deleted before ``before`` without
+    committing, and returns how many were deleted.
+    """
+    return (
+        db.query(ContactTombstone)
+        .filter(ContactTombstone.deleted_at < before)
+        .delete(synchronize_session=False)
+    )
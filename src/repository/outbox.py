@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from src.database.models import EmailOutbox, utcnow
+from typing import Iterable, List, Set
+
+async def enqueue(db: Session, kind: str, recipient: str, payload: dict, dedup_key: str | None = None) -> EmailOutbox:
+    """
+    Adds an email to the outbox without committing, so it is stored by the
+    caller's commit together with the change that triggered it.
+    """
+    message = EmailOutbox(
+        kind=kind,
+        recipient=recipient,
+        payload=payload,
+        dedup_key=dedup_key or f"{kind}:{recipient}",
+        status="pending",
+        attempts=0,
+        next_attempt_at=utcnow(),
+    )
+    db.add(message)
+    return message
+
+async def claim_batch(db: Session, limit: int) -> List[EmailOutbox]:
+    """
+    Locks up to ``limit`` due messages, oldest first. Rows locked by another
+    worker are skipped, so several workers can drain the outbox at once.
+    """
+    return (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= utcnow())
+        .order_by(EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+async def recently_sent(db: Session, dedup_keys: Iterable[str], since: timedelta) -> Set[str]:
+    rows = (
+        db.query(EmailOutbox.dedup_key)
+        .filter(
+            EmailOutbox.status == "sent",
+            EmailOutbox.dedup_key.in_(list(dedup_keys)),
+            EmailOutbox.sent_at >= utcnow() - since,
+        )
+        .distinct()
+        .all()
+    )
+    return {dedup_key for (dedup_key,) in rows}
+
+async def purge_delivered(db: Session, before: datetime) -> int:
+    """
+    Deletes sent and duplicate messages created before ``before`` without
+    committing, and returns how many were deleted.
+    """
+    return (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status.in_(("sent", "duplicate")), EmailOutbox.created_at < before)
+        .delete(synchronize_session=False)
+    )
@@ -1,16 +1,41 @@
 from libgravatar import Gravatar
 from sqlalchemy.orm import Session
-from src.database.models import User
+from src.database.models import PendingKnownEmail, User
 from src.schemas import UserModel
 from datetime import datetime, timezone
+from typing import Iterator, List
 import pytz
 
 async def get_user_by_email(email: str, db: Session) -> User:
     return db.query(User).filter(User.email == email).first()
 
+def iter_user_emails(db: Session, batch_size: int = 1000) -> Iterator[str]:
+    for (email,) in db.query(User.email).yield_per(batch_size):
+        yield email
+
+async def add_pending_known_email(email: str, db: Session) -> None:
+    """
+    Records that ``email`` still has to be added to the shared filter of
+    registered emails, without committing, so it is saved with the user.
+    """
+    db.add(PendingKnownEmail(email=email))
+
+async def get_pending_known_emails(db: Session, limit: int = 1000) -> List[str]:
+    return [email for (email,) in db.query(PendingKnownEmail.email).order_by(PendingKnownEmail.id).limit(limit)]
+
+async def remove_pending_known_emails(emails: List[str], db: Session) -> None:
+    db.query(PendingKnownEmail).filter(PendingKnownEmail.email.in_(emails)).delete(synchronize_session=False)
+    db.commit()
+
 async def get_user_by_reset_token(reset_token: str, db: Session) -> User:
     return db.query(User).filter(User.reset_token == reset_token).first()
 
+async def get_user_by_id(user_id: int, db: Session) -> User:
+    return db.query(User).filter(User.id == user_id).first()
+
+async def get_users_with_reset_token(db: Session) -> List[User]:
+    return db.query(User).filter(User.reset_token.isnot(None)).all()
+
 async def create_user(body: UserModel, db: Session) -> User:
     avatar = None
     try:
@@ -48,6 +73,20 @@ async def update_token(user: User, token: str | None, db: Session) -> None:
     user.refresh_token = token
     db.commit()
 
+async def update_password(user_id: int, old_hash: str, password_hash: str, db: Session) -> bool:
+    """
+    Replaces the password hash of the user only if it is still ``old_hash``,
+    so a password changed in the meantime is never overwritten.
+
+    :return: Whether the hash was replaced.
+    :rtype: bool
+    """
+    updated = db.query(User).filter(User.id == user_id, User.password == old_hash).update(
+        {User.password: password_hash, User.hashed_password: password_hash}, synchronize_session=False
+    )
+    db.commit()
+    return updated == 1
+
 async def confirmed_email(email: str, db: Session) -> None:
     user = await get_user_by_email(email, db)
     print(f"User rep/users ln 50: {user}")
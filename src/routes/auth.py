@@ -3,16 +3,27 @@ from fastapi import (
     APIRouter, BackgroundTasks, Depends, Form, HTTPException,
     status, Request, Security
 )
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from src.database.db import get_db
 from src.database.models import User
-from src.schemas import PasswordResetRequest, UserModel, UserResponse, RequestEmail, TokenModel
+from src.schemas import LogoutRequest, PasswordResetRequest, UserModel, UserResponse, RequestEmail, TokenModel
+from src.repository import outbox as repository_outbox
 from src.repository import users as repository_users
 from src.repository.utils import logger
 from src.services.auth import auth_service
-from src.services.email import send_email, send_password_reset_email
-import bcrypt
+from src.services.keys import key_manager
+from src.services.login_throttle import login_throttle
+from src.services.passwords import password_service
+from src.services.rate_limit import default_identifier
+from src.services.reset_tokens import reset_tokens
+from src.services.revocation import revocations
+from src.services.sessions import RefreshTokenReused, session_store
+from jose import JWTError, jwt
+from math import ceil
+from redis.exceptions import RedisError
+from typing import Optional
 import pytz
 import uuid
 
@@ -21,7 +32,6 @@ security = HTTPBearer()
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def signup(
-        background_tasks: BackgroundTasks,
         request: Request, 
         username: str = Form(...),
         email: str = Form(...),
@@ -32,30 +42,67 @@ async def signup(
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
     body = UserModel(email=email, password=password, username=username)
-    body.password = auth_service.get_password_hash(password)
+    body.password = await password_service.hash(password)
+    # Queued first: create_user commits the user, the email and the pending filter entry together.
+    await repository_outbox.enqueue(db, "confirm_email", email, {"username": username, "host": str(request.base_url)})
+    await repository_users.add_pending_known_email(email, db)
     new_user = await repository_users.create_user(body, db)
-    background_tasks.add_task(send_email, new_user.email, new_user.username, request.base_url)
+    await auth_service.remember_known_email(new_user.email, db)
     return {
         "user": new_user,
         "detail": "User successfully created. Check your email for confirmation"
     }
 
 @router.post("/login", response_model=TokenModel)
-async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(
+        background_tasks: BackgroundTasks,
+        request: Request,
+        body: OAuth2PasswordRequestForm = Depends(),
+        db: Session = Depends(get_db)
+):
+    ip = await default_identifier(request)
+    wait = await login_throttle.check(body.username, ip)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(ceil(wait / 1000))},
+        )
+    if await auth_service.is_unknown_email(body.username):
+        await login_throttle.record_failure(body.username, ip)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     user = await repository_users.get_user_by_email(body.username, db)
     if user is None:
+        auth_service.remember_unknown_email(body.username)
+        await login_throttle.record_failure(body.username, ip)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
-    if not auth_service.verify_password(body.password, user.password):
+    if not await password_service.verify(body.password, user.password):
+        await login_throttle.record_failure(body.username, ip)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
+    await login_throttle.reset(body.username)
+    if password_service.needs_update(user.password):
+        background_tasks.add_task(password_service.rehash, user.id, user.password, body.password)
     # Generate JWT
     access_token = await auth_service.create_access_token(data={"sub": user.email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
-    await repository_users.update_token(user, refresh_token, db)
+    refresh_token = await _start_session(user, request.headers.get("User-Agent"), db)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
-from fastapi import HTTPException
+async def _start_session(user: User, device: str, db: Session) -> str:
+    """
+    Issues a refresh token backed by a Redis session, or by the
+    ``users.refresh_token`` column while Redis is unavailable.
+    """
+    if session_store.available:
+        try:
+            jti = await session_store.create(user.email, device)
+            return await auth_service.create_refresh_token(data={"sub": user.email, "jti": jti})
+        except RedisError as e:
+            logger.error(f"Session store unavailable: {e}")
+    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
+    await repository_users.update_token(user, refresh_token, db)
+    return refresh_token
 
 @router.get('/refresh_token', response_model=TokenModel)
 async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
@@ -65,6 +112,10 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(sec
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
+    jti = _token_jti(token)
+    if jti is not None:
+        return await _rotate_session(email, jti)
+
     user = await repository_users.get_user_by_email(email, db)
 
     if user is None:
@@ -75,10 +126,78 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(sec
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
     access_token = await auth_service.create_access_token(data={"sub": email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": email})
-    await repository_users.update_token(user, refresh_token, db)
+    refresh_token = await _start_session(user, None, db)
+    if _token_jti(refresh_token) is not None:
+        # The token moved to the session store, the column is no longer needed.
+        await repository_users.update_token(user, None, db)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
+def _token_jti(token: str) -> Optional[str]:
+    """
+    Returns the session id of a refresh token whose signature was already verified.
+    Tokens issued before the session store have none.
+    """
+    try:
+        return jwt.get_unverified_claims(token).get("jti")
+    except JWTError:
+        return None
+
+async def _rotate_session(email: str, jti: str) -> dict:
+    """
+    Rotates the Redis session behind a refresh token. Touches no database
+    row: the session itself proves the login.
+    """
+    try:
+        new_jti = await session_store.rotate(jti, email)
+    except RefreshTokenReused:
+        logger.warning(f"Refresh token reuse detected for {email}, session family revoked")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    except RedisError as e:
+        logger.error(f"Session store unavailable: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Try again later",
+                            headers={"Retry-After": "1"})
+    if new_jti is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    access_token = await auth_service.create_access_token(data={"sub": email})
+    refresh_token = await auth_service.create_refresh_token(data={"sub": email, "jti": new_jti})
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post('/logout')
+async def logout(
+        body: Optional[LogoutRequest] = None,
+        token: str = Depends(auth_service.oauth2_scheme),
+        db: Session = Depends(get_db)
+):
+    """
+    Revokes the access token and, when its refresh token is sent along,
+    ends the session behind it, so the login cannot be refreshed either.
+    """
+    try:
+        payload = auth_service.decode_access_token(token)
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    refresh_token = body.refresh_token if body is not None else None
+    session_jti = None
+    if refresh_token is not None:
+        email = await auth_service.decode_refresh_token(refresh_token)
+        if email != payload.get("sub"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        session_jti = _token_jti(refresh_token)
+    try:
+        if "jti" in payload:
+            await revocations.revoke(payload["jti"], payload.get("exp"))
+        if session_jti is not None:
+            await session_store.revoke(session_jti, email)
+    except RedisError as e:
+        logger.error(f"Could not revoke token: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Try again later",
+                            headers={"Retry-After": "1"})
+    if refresh_token is not None and session_jti is None:
+        user = await repository_users.get_user_by_email(email, db)
+        if user is not None and user.refresh_token == refresh_token:
+            await repository_users.update_token(user, None, db)
+    return {"message": "Logged out"}
+
 @router.get('/confirmed_email/{token}')
 async def confirmed_email(
     token: str,
@@ -100,7 +219,6 @@ async def confirmed_email(
 async def password_reset_request(
         request_data: PasswordResetRequest,
         request: Request,
-        background_tasks: BackgroundTasks, 
         current_user: User = Depends(auth_service.get_current_user),
         db: Session = Depends(get_db)
     ):
@@ -112,29 +230,59 @@ async def password_reset_request(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    reset_token = str(uuid.uuid4())
-    reset_token_expiry = datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(hours=1)
-
-    user.reset_token = reset_token
-    user.reset_token_expired = reset_token_expiry
+    reset_token = await _issue_reset_token(user, db)
+    await repository_outbox.enqueue(
+        db,
+        "password_reset",
+        user.email,
+        {"username": user.username, "token": reset_token, "host": str(request.base_url)},
+        dedup_key=f"password_reset:{reset_token}",
+    )
     db.commit()
 
-    background_tasks.add_task(send_password_reset_email, user.email, user.username, user.reset_token, request.base_url)
-
     return {"message": "Password reset email sent"}
 
-@router.get("/password-reset")
-async def password_reset(
-    token: str,
-    db: Session = Depends(get_db)
-):
+async def _issue_reset_token(user: User, db: Session) -> str:
+    """
+    Issues a password reset token valid for an hour, kept in Redis or, while
+    Redis is unavailable, in the ``users.reset_token`` column. The caller commits.
+    """
+    if reset_tokens.available:
+        try:
+            return await reset_tokens.issue(user.id)
+        except RedisError as e:
+            logger.error(f"Reset token store unavailable: {e}")
+    user.reset_token = str(uuid.uuid4())
+    user.reset_token_expired = datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(seconds=reset_tokens.ttl)
+    return user.reset_token
+
+async def _get_db_reset_token_user(token: str, db: Session) -> User:
+    """
+    Finds the user of a reset token kept in the ``users.reset_token`` column,
+    where tokens issued while Redis was unavailable are stored.
+    """
     user = await repository_users.get_user_by_reset_token(token, db)
-    
+
     if not user:
         raise HTTPException(status_code=400, detail="Invalid reset token")
-    
+
     if await repository_users.is_reset_token_expired(user.reset_token_expired):
         raise HTTPException(status_code=400, detail="Reset token expired")
+    return user
+
+@router.get("/password-reset")
+async def password_reset(
+    token: str,
+    db: Session = Depends(get_db)
+):
+    if reset_tokens.available:
+        try:
+            if await reset_tokens.peek(token) is not None:
+                return {"reset-token": token}
+        except RedisError as e:
+            logger.error(f"Reset token store unavailable: {e}")
+
+    await _get_db_reset_token_user(token, db)
     return {"reset-token": token}
 
 @router.post("/set-new-password")
@@ -145,30 +293,56 @@ async def set_new_password(
         background_tasks: BackgroundTasks,
         db: Session = Depends(get_db)
     ):
-    user = await repository_users.get_user_by_reset_token(token, db)
-    if not user:
-        raise HTTPException(status_code=400, detail="Invalid reset token")
-    
-    if await repository_users.is_reset_token_expired(user.reset_token_expired):
-        raise HTTPException(status_code=400, detail="Reset token expired")
+    # Sessions live in Redis; a new password must not leave them usable.
+    if not session_store.available:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Try again later",
+                            headers={"Retry-After": "1"})
+    user = None
+    if reset_tokens.available:
+        try:
+            user_id = await reset_tokens.consume(token)
+        except RedisError as e:
+            logger.error(f"Reset token store unavailable: {e}")
+            user_id = None
+        if user_id is not None:
+            user = await repository_users.get_user_by_id(user_id, db)
+    if user is None:
+        user = await _get_db_reset_token_user(token, db)
 
-    hashed_password = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt())
+    password_hash = await password_service.hash(new_password)
+
+    try:
+        await session_store.revoke_all(user.email)
+    except RedisError as e:
+        logger.error(f"Could not revoke sessions of {user.email}: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Try again later",
+                            headers={"Retry-After": "1"})
 
-    user.hashed_password = hashed_password
-    user.password = auth_service.get_password_hash(new_password)
+    user.hashed_password = password_hash
+    user.password = password_hash
     user.reset_token = None
     user.reset_token_expired = None
+    user.refresh_token = None
     db.commit()
 
     return {"message": "Password updated successfully"}
 
 @router.post('/request_email')
-async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
+async def request_email(body: RequestEmail, request: Request,
                         db: Session = Depends(get_db)):
+    if await auth_service.is_unknown_email(body.email):
+        return {"message": "Check your email for confirmation."}
     user = await repository_users.get_user_by_email(body.email, db)
+    if user is None:
+        auth_service.remember_unknown_email(body.email)
+        return {"message": "Check your email for confirmation."}
 
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
-    if user:
-        background_tasks.add_task(send_email, user.email, user.username, request.base_url)
+    await repository_outbox.enqueue(db, "confirm_email", user.email, {"username": user.username, "host": str(request.base_url)})
+    db.commit()
     return {"message": "Check your email for confirmation."}
+
+@router.get("/jwks.json")
+async def jwks():
+    return JSONResponse(key_manager.jwks(), headers={"Cache-Control": "public, max-age=300"})
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.responses import FileResponse
+
+from src.conf.config import settings
+from src.services.avatars import AVATAR_SIZES, LocalAvatarStorage, avatar_service
+
+router = APIRouter(prefix="/avatars", tags=["avatars"])
+
+# Avatar file names contain the hash of their content, so a name never points to other bytes.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{name}", response_class=FileResponse)
+async def read_avatar(name: str):
+    """
+    Serves an avatar stored by the local backend, with ``Range`` support.
+
+    When ``AVATAR_ACCEL_REDIRECT`` is set (e.g. ``/protected-avatars``),
+    the file is handed to nginx with ``X-Accel-Redirect`` so it is sent
+    with ``sendfile`` instead of being streamed through the application.
+
+    :param name: The file name, ``{digest}-{size}.png``.
+    :type name: str
+    :return: The image.
+    :rtype: FileResponse
+    """
+    storage = avatar_service.storage
+    path = storage.path(name) if isinstance(storage, LocalAvatarStorage) else None
+    if path is None or int(name[:-4].rsplit("-", 1)[1]) not in AVATAR_SIZES or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if settings.avatar_accel_redirect:
+        headers["X-Accel-Redirect"] = f"{settings.avatar_accel_redirect.rstrip('/')}/{name}"
+        return Response(media_type="image/png", headers=headers)
+    return FileResponse(path, media_type="image/png", headers=headers)
@@ -1,87 +1,224 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_limiter.depends import RateLimiter
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import contacts as repository_contacts
-from src.schemas import ContactModel, ContactResponse, ContactUpdate
-from src.services.auth import Auth
-from typing import List
+from src.schemas import ContactBatchResponse, ContactChangesResponse, ContactModel, ContactResponse, ContactUpdate
+from src.services.auth import auth_service
+from src.services.change_feed import TooManyConnections, change_feed
+from src.services.fieldsets import contact_fields
+from src.services.rate_limit import UserRateLimiter
+from src.services.revocation import revocations
+from src.services.serializers import contact_serializer
+from src.services.sync import contact_sync
+from typing import AsyncIterator, List, Optional
+import asyncio
+import orjson
+import time
 
-auth_service = Auth()
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. first_name,last_name,phone; id is always included"
+
+MAX_BATCH_IDS = 500
+
+def parse_ids(ids: str) -> List[int]:
+    """
+    Parses a comma-separated list of contact ids, dropping repeated ones.
+
+    :raises HTTPException: 422 if an id is not an integer or there are none or too many.
+    """
+    try:
+        values = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="ids must be comma-separated integers"
+        )
+    if not values or len(values) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Between 1 and {MAX_BATCH_IDS} ids are allowed"
+        )
+    return values
+
 @router.get(
     "/",
     response_model=List[ContactResponse],
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],
+    description="Rate limit cost: 5",
+    dependencies=[Depends(UserRateLimiter(cost=5))],
 )
 async def read_contacts(
         skip: int = 0,
         limit: int = 100,
+        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
         db: Session = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)):
+    fieldset = contact_fields.parse(fields)
+    if fieldset is not None:
+        rows = await repository_contacts.get_contacts_columns(fieldset, skip, limit, current_user, db)
+        return ORJSONResponse(contact_fields.serializer(fieldset).to_dicts(rows))
     contacts = await repository_contacts.get_contacts(skip, limit, current_user, db)
-    return contacts
+    return ORJSONResponse(contact_serializer.to_dicts(contacts))
+
+async def publish_change(user: User, kind: str, contact) -> None:
+    event = {"type": kind, "contact": contact_serializer.to_dict(contact)}
+    await change_feed.publish(user.id, event)
+
+async def event_stream(
+        request: Request,
+        user_id: int,
+        heartbeat: float,
+        expires_at: Optional[float] = None,
+        jti: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Streams the changes of ``user_id`` until the client disconnects, the
+    access token expires at ``expires_at`` or the token ``jti`` is revoked.
+    """
+    try:
+        async with change_feed.subscribe(user_id) as subscription:
+            yield f"retry: {settings.change_feed_retry_ms}\n\n"
+            while not await request.is_disconnected():
+                if jti is not None and await revocations.is_revoked(jti):
+                    return
+                timeout = heartbeat
+                if expires_at is not None:
+                    remaining = expires_at - time.time()
+                    if remaining <= 0:
+                        return
+                    timeout = min(timeout, remaining)
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection and shows a dead one.
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {orjson.dumps(event).decode()}\n\n"
+    except TooManyConnections:
+        # Opened by a concurrent request after contact_events checked the limit.
+        return
+
+# Declared before "/{contact_id}" so that "events", "batch" and "changes" are not parsed as contact ids.
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    description="Server-sent events: created, updated, deleted and resync. Rate limit cost: 5",
+    dependencies=[Depends(UserRateLimiter(cost=5))],
+)
+async def contact_events(
+        request: Request,
+        token: str = Depends(auth_service.oauth2_scheme),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(auth_service.get_current_user)
+):
+    # The session is only needed to authenticate, so its connection goes back to
+    # the pool now instead of when the stream ends.
+    db.close()
+    if change_feed.at_limit(current_user.id):
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many open event streams")
+    # Already verified by get_current_user, so this comes from the token cache.
+    payload = auth_service.decode_access_token(token)
+    return StreamingResponse(
+        event_stream(request, current_user.id, settings.change_feed_heartbeat, payload.get("exp"), payload.get("jti")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=ContactChangesResponse,
+    description="Answers 410 when the token is too old to be continued; sync again without it. Rate limit cost: 2",
+    dependencies=[Depends(UserRateLimiter(cost=2))],
+)
+async def read_contact_changes(
+        since: Optional[str] = Query(None, description="The next token of the previous sync; omit it for a full sync"),
+        limit: int = Query(500, ge=1, le=1000),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(auth_service.get_current_user)
+):
+    return ORJSONResponse(await contact_sync.changes(since, limit, current_user, db))
+
+@router.get(
+    "/batch",
+    response_model=ContactBatchResponse,
+    description="Rate limit cost: 5",
+    dependencies=[Depends(UserRateLimiter(cost=5))],
+)
+async def read_contacts_batch(
+        ids: str = Query(description="Comma-separated contact ids, e.g. 3,1,2"),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(auth_service.get_current_user)
+):
+    contacts, missing = await repository_contacts.get_contacts_by_ids(parse_ids(ids), current_user, db)
+    return ORJSONResponse({"contacts": contact_serializer.to_dicts(contacts), "missing": missing})
 
 @router.get(
     "/{contact_id}", 
     response_model=ContactResponse,
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],
+    description="Rate limit cost: 1",
+    dependencies=[Depends(UserRateLimiter(cost=1))],
 )
 async def read_contact(
         contact_id: int,
+        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
         db: Session = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
-    contact = await repository_contacts.get_contact(contact_id, current_user, db)
+    fieldset = contact_fields.parse(fields)
+    if fieldset is not None:
+        contact = await repository_contacts.get_contact_columns(contact_id, fieldset, current_user, db)
+    else:
+        contact = await repository_contacts.get_contact(contact_id, current_user, db)
     if contact is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
-    return contact
+    if fieldset is not None:
+        return ORJSONResponse(contact_fields.serializer(fieldset).to_dict(contact))
+    return ORJSONResponse(contact_serializer.to_dict(contact))
 
 @router.post(
     "/", 
     response_model=ContactResponse, 
     status_code=status.HTTP_201_CREATED,
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],
+    description="Rate limit cost: 2",
+    dependencies=[Depends(UserRateLimiter(cost=2))],
 )
 async def create_contact(
         body: ContactModel,
         db: Session = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
-
-    return await repository_contacts.create_contact(body, current_user, db)
+    contact = await repository_contacts.create_contact(body, current_user, db)
+    await publish_change(current_user, "created", contact)
+    return ORJSONResponse(contact_serializer.to_dict(contact), status_code=status.HTTP_201_CREATED)
 
 @router.delete(
     "/delete/{contact_id}", 
     response_model=ContactResponse,
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],    
+    description="Rate limit cost: 2",
+    dependencies=[Depends(UserRateLimiter(cost=2))],    
 )
 async def remove_contact(
         contact_id: int,
         db: Session = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
-
     contact = await repository_contacts.remove_contact(contact_id, current_user, db)
     if contact is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
-    return contact
+    await change_feed.publish(current_user.id, {"type": "deleted", "id": contact_id})
+    return ORJSONResponse(contact_serializer.to_dict(contact))
 
 @router.put(
     "/update/{contact_id}", 
     response_model=ContactResponse,
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],    
+    description="Rate limit cost: 2",
+    dependencies=[Depends(UserRateLimiter(cost=2))],    
 )
 async def update_contact(
         contact_id: int,
@@ -94,13 +231,14 @@ async def update_contact(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
-    return contact
+    await publish_change(current_user, "updated", contact)
+    return ORJSONResponse(contact_serializer.to_dict(contact))
 
 @router.get(
     "/contact_by_first_name/{contact_first_name}", 
     response_model=ContactResponse,
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],    
+    description="Rate limit cost: 3",
+    dependencies=[Depends(UserRateLimiter(cost=3))],    
 )
 async def read_contact_by_first_name(
         contact_first_name: str,
@@ -112,13 +250,13 @@ async def read_contact_by_first_name(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
-    return contact
+    return ORJSONResponse(contact_serializer.to_dict(contact))
 
 @router.get(
     "/contact_by_last_name/{contact_last_name}", 
     response_model=ContactResponse,
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],    
+    description="Rate limit cost: 3",
+    dependencies=[Depends(UserRateLimiter(cost=3))],    
 )
 async def read_contact_by_last_name(
         contact_last_name: str,
@@ -130,13 +268,13 @@ async def read_contact_by_last_name(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
-    return contact
+    return ORJSONResponse(contact_serializer.to_dict(contact))
 
 @router.get(
     "/contact_by_email/{contact_email}", 
     response_model=ContactResponse,
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],    
+    description="Rate limit cost: 3",
+    dependencies=[Depends(UserRateLimiter(cost=3))],    
 )
 async def read_contact_by_email(
         contact_email: str,
@@ -148,17 +286,17 @@ async def read_contact_by_email(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
-    return contact
+    return ORJSONResponse(contact_serializer.to_dict(contact))
 
 @router.get(
     "/upcoming_birthdays/",
     response_model=List[ContactResponse],
-    description="No more than 10 requests pro minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))]   
+    description="Rate limit cost: 10",
+    dependencies=[Depends(UserRateLimiter(cost=10))]   
 )
 async def get_upcoming_birthdays(
         db: Session = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
     contacts = await repository_contacts.get_upcoming_birthdays(current_user, db)
-    return contacts
+    return ORJSONResponse(contact_serializer.to_dicts(contacts))
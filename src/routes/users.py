@@ -1,13 +1,11 @@
 from fastapi import APIRouter, Depends, status, UploadFile, File
 from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
 
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.conf.config import settings
+from src.services.avatars import avatar_service
 from src.schemas import UserDb
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -21,19 +19,6 @@ async def update_avatar_user(
         file: UploadFile = File(),
         current_user: User = Depends(auth_service.get_current_user),
         db: Session = Depends(get_db)):
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True
-    )
-
-    r = cloudinary.uploader.upload(
-        file.file,
-        public_id=f"ContactsApp/{current_user.username}",
-        overwrite=True
-    )
-    src_url = cloudinary.CloudinaryImage(f"ContactsApp/{current_user.username}")\
-                        .build_url(width=250, height=250, crop='fill', version=r.get('version'))
+    src_url = await avatar_service.store(file, current_user)
     user = await repository_users.update_avatar(current_user.email, src_url, db)
     return user
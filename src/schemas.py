@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from pydantic import BaseModel, EmailStr, Field
 from pydantic.config import ConfigDict
-from typing import Optional
+from typing import List, Optional
 
 class ContactModel(BaseModel):
     first_name: str
@@ -26,6 +26,16 @@ class ContactResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class ContactBatchResponse(BaseModel):
+    contacts: List[ContactResponse]
+    missing: List[int] = []
+
+class ContactChangesResponse(BaseModel):
+    changed: List[ContactResponse]
+    deleted: List[int]
+    next: str
+    has_more: bool
+
 class ContactUpdate(ContactModel):
     done: bool
 
@@ -36,6 +46,9 @@ class PasswordReset(BaseModel):
 class PasswordResetRequest(BaseModel):
     email: str
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class RequestEmail(BaseModel):
     email: EmailStr
 
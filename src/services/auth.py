@@ -2,27 +2,41 @@ from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from fastapi import HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from src.conf.config import settings
-from src.database.db import get_db
+from src.database.db import SessionLocal, get_db
 from src.repository import users as repository_users
+from src.services.bloom import SharedBloomFilter
+from src.services.cache import TTLCache
+from src.services.keys import key_manager
+from src.services.redis_manager import redis_manager
+from src.services.revocation import revocations
+from src.services.singleflight import SingleFlight, should_refresh_early
+from redis.exceptions import RedisError
 from typing import Optional
+import asyncio
+import hashlib
+import itertools
 import pickle
-import redis
+import time
+import uuid
 
 class Auth:
     ALGORITHM = settings.jwt_algorithm
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     SECRET_KEY = settings.secret_key
+    keys = key_manager
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    r = redis.Redis(host=settings.redis_local_host, port=settings.redis_port, db=0)
-
-    def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
-
-    def get_password_hash(self, password: str):
-        return self.pwd_context.hash(password)
+    r = redis_manager.client
+    token_cache = TTLCache(maxsize=settings.jwt_cache_size)
+    rejected_tokens = TTLCache(maxsize=settings.negative_cache_size, ttl=settings.negative_cache_ttl)
+    unknown_users = TTLCache(maxsize=settings.negative_cache_size, ttl=settings.negative_cache_ttl)
+    known_emails = SharedBloomFilter(
+        r, "bloom:user_emails", capacity=settings.user_bloom_capacity, ttl=settings.user_bloom_ttl
+    )
+    pending_known_emails = set()
+    known_emails_rebuild: Optional[asyncio.Task] = None
+    user_loads = SingleFlight()
+    user_load_time = 0.0
 
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
         to_encode = data.copy()
@@ -32,9 +46,10 @@ class Auth:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=15)
         
-        to_encode.update({"iat": datetime.now(timezone.utc), "exp": expire, "scope": "access_token"})
+        to_encode.update({"iat": datetime.now(timezone.utc), "exp": expire, "scope": "access_token",
+                          "jti": uuid.uuid4().hex})
         
-        encoded_access_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        encoded_access_token = self.keys.encode(to_encode)
         print(f"Decoded Payload: {encoded_access_token}")
         return encoded_access_token
 
@@ -45,12 +60,12 @@ class Auth:
         else:
             expire = datetime.now(timezone.utc) + timedelta(days=7)
         to_encode.update({"iat": datetime.now(timezone.utc), "exp": expire, "scope": "refresh_token"})
-        encoded_refresh_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        encoded_refresh_token = self.keys.encode(to_encode)
         return encoded_refresh_token
 
     async def decode_refresh_token(self, refresh_token: str):
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.keys.decode(refresh_token)
             if payload['scope'] == 'refresh_token':
                 email = payload['sub']
                 return email
@@ -58,6 +73,138 @@ class Auth:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
+    def decode_access_token(self, token: str) -> dict:
+        """
+        Verifies an access token and returns its claims.
+
+        Verified payloads are cached under the SHA-256 digest of the token
+        until the token's ``exp``, so a client reusing the same access token
+        pays for signature verification only once.
+
+        :param token: The encoded JWT.
+        :type token: str
+        :return: The validated token payload.
+        :rtype: dict
+        :raises JWTError: If the token is invalid or expired.
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        if key in self.rejected_tokens:
+            raise JWTError("Token was recently rejected")
+        payload = self.token_cache.get(key)
+        if payload is None:
+            try:
+                payload = self.keys.decode(token)
+            except JWTError:
+                self.rejected_tokens.set(key, True)
+                raise
+            if isinstance(payload.get("exp"), (int, float)):
+                self.token_cache.set(key, payload, expires_at=payload["exp"])
+        return payload
+
+    async def is_unknown_email(self, email: str) -> bool:
+        """
+        Tells whether ``email`` is known not to belong to any user, without a database query.
+
+        An email is unknown when a recent lookup for it found nothing, or when
+        the shared filter of registered emails is populated and does not contain it.
+        A ``False`` result only means the database has to be asked.
+
+        :param email: The email to check.
+        :type email: str
+        :rtype: bool
+        """
+        if email in self.unknown_users:
+            return True
+        if not redis_manager.healthy or email in self.pending_known_emails:
+            return False
+        if self.pending_known_emails:
+            await self.flush_pending_known_emails()
+        try:
+            contained = await self.known_emails.check(email)
+        except RedisError:
+            return False
+        if contained is None:
+            self._rebuild_known_emails()
+            return False
+        return not contained
+
+    def remember_unknown_email(self, email: str) -> None:
+        self.unknown_users.set(email, True)
+
+    async def remember_known_email(self, email: str, db: Session) -> None:
+        """
+        Adds the email of a new user to the shared filter.
+
+        The caller saves a :class:`PendingKnownEmail` together with the user.
+        It is removed once the email is in the filter; while Redis cannot
+        take it, the record stays and is flushed by whichever worker next
+        reaches Redis, so no worker keeps rejecting the user, even if this
+        one stops first.
+        """
+        self.unknown_users.discard(email)
+        if redis_manager.healthy:
+            try:
+                await self.known_emails.add(email)
+                await repository_users.remove_pending_known_emails([email], db)
+                return
+            except RedisError as e:
+                print(f"bloom filter update failed: {e}")
+        self.pending_known_emails.add(email)
+
+    async def flush_pending_known_emails(self) -> None:
+        """
+        Adds the emails registered by any worker while Redis was unreachable to the shared filter.
+        """
+        if not redis_manager.healthy:
+            return
+        db = SessionLocal()
+        try:
+            while emails := await repository_users.get_pending_known_emails(db):
+                await self.known_emails.update(emails)
+                await repository_users.remove_pending_known_emails(emails, db)
+                self.pending_known_emails.difference_update(emails)
+        except RedisError as e:
+            print(f"bloom filter update failed: {e}")
+        finally:
+            db.close()
+
+    async def load_known_emails(self, db: Session) -> None:
+        """
+        Populates the shared filter of registered emails if it is missing or
+        has expired. Only one worker at a time rebuilds it.
+        """
+        if await self.known_emails.is_ready():
+            return
+        token = await self.known_emails.begin_rebuild()
+        if token is None:
+            return
+        emails = repository_users.iter_user_emails(db)
+        # The query runs in a thread, a batch at a time, so the event loop keeps serving requests.
+        while batch := await asyncio.to_thread(list, itertools.islice(emails, 1000)):
+            await self.known_emails.update(batch)
+            if not await self.known_emails.renew_rebuild(token):
+                print("bloom filter rebuild taken over by another worker")
+                return
+        if not await self.known_emails.mark_ready(token):
+            print("bloom filter rebuild taken over by another worker")
+
+    def _rebuild_known_emails(self) -> None:
+        # Started from a lookup once the filter has expired, in the background so
+        # that request does not wait for it.
+        if self.known_emails_rebuild is not None and not self.known_emails_rebuild.done():
+            return
+
+        async def rebuild():
+            db = SessionLocal()
+            try:
+                await self.load_known_emails(db)
+            except Exception as e:
+                print(f"bloom filter rebuild failed: {e}")
+            finally:
+                db.close()
+
+        self.known_emails_rebuild = asyncio.create_task(rebuild())
+
     async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,7 +214,7 @@ class Auth:
 
         try:
             # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_access_token(token)
             print(f"Decoded Payload: {payload}")
             if payload['scope'] == 'access_token':
                 email = payload["sub"]
@@ -79,26 +226,67 @@ class Auth:
             print(f"jwt error: {e}")
             raise credentials_exception
 
-        user = self.r.get(f"user:{email}")
-        print(f"Redis get user: {user}")
-        if user is None:
-            user = await repository_users.get_user_by_email(email, db)
-            print(f"Database get user: {user}")
-            if user is None:
+        if "jti" in payload and await revocations.is_revoked(payload["jti"]):
+            raise credentials_exception
+
+        key = f"user:{email}"
+        cached, ttl = await self._get_cached_user(key)
+        print(f"Redis get user: {cached}")
+        if cached is None or should_refresh_early(ttl, self.user_load_time, settings.cache_early_refresh_beta):
+            if cached is None and await self.is_unknown_email(email):
                 raise credentials_exception
+            cached = await self.user_loads.do(key, lambda: self._load_user(email))
+            if cached is None:
+                self.remember_unknown_email(email)
+                raise credentials_exception
+        # Every caller gets its own copy, attached to its own session.
+        return db.merge(pickle.loads(cached), load=False)
+
+    async def _get_cached_user(self, key: str):
+        if not redis_manager.healthy:
+            return None, None
+        try:
+            pipe = self.r.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.ttl(key)
+            return await pipe.execute()
+        except RedisError as e:
+            print(f"Redis get user failed: {e}")
+            return None, None
+
+    async def _load_user(self, email: str):
+        """
+        Loads a user for :meth:`get_current_user` and returns it pickled, or None.
+
+        The load is shared with every request waiting on it, so it runs in a
+        session of its own instead of the one of the request that happened
+        to start it, and returns no instance bound to any session.
+        """
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            user = await repository_users.get_user_by_email(email, db)
+        finally:
+            db.close()
+        print(f"Database get user: {user}")
+        self.user_load_time = 0.8 * self.user_load_time + 0.2 * (time.perf_counter() - start)
+        if user is None:
+            return None
+        data = pickle.dumps(user)
+        if redis_manager.healthy:
             print(f"About to set user in Redis: {email}")
-            self.r.set(f"user:{email}", pickle.dumps(user))
-            self.r.expire(f"user:{email}", 900)
-        else:
-            user = pickle.loads(user)
-        return user
+            try:
+                await self.r.set(f"user:{email}", data, ex=900)
+            except RedisError as e:
+                print(f"Redis set user failed: {e}")
+        return data
 
     async def create_email_token(self, data: dict):
         print(type(self.SECRET_KEY))
         to_encode = data.copy()
         expire = datetime.now(timezone.utc) + timedelta(days=7)
         to_encode.update({"iat": datetime.now(timezone.utc), "exp": expire})
-        token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        token = self.keys.encode(to_encode)
         return token
 
     async def get_email_from_token(self, token: str):
@@ -108,7 +296,7 @@ class Auth:
                 detail="Invalid token format"
             )
         try:            
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.keys.decode(token)
             email = payload["sub"]
 
             if not email:
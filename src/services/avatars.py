@@ -0,0 +1,239 @@
+from abc import ABC, abstractmethod
+from fastapi import HTTPException, UploadFile, status
+from io import BytesIO
+from pathlib import Path
+from PIL import Image, ImageOps, UnidentifiedImageError
+from redis.exceptions import RedisError
+from src.conf.config import settings
+from src.database.models import User
+from src.services.worker_pool import WorkerPool
+from src.services.redis_manager import redis_manager
+from typing import Dict, Optional, Sequence
+import asyncio
+import cloudinary
+import cloudinary.uploader
+import hashlib
+import re
+
+AVATAR_SIZES = (32, 64, 128, 250)
+AVATAR_SIZE = AVATAR_SIZES[-1]
+CHUNK_SIZE = 64 * 1024
+AVATAR_NAME = re.compile(r"^[0-9a-f]{64}-\d+\.png$")
+
+class AvatarStorage(ABC):
+    """
+    Interface of the store avatars are kept in.
+
+    :meth:`save` stores the PNG ``variants`` (pixel size -> bytes) of the
+    avatar whose content hash is ``digest`` and returns the URL of the
+    full-size one. Digests address content, so saving one again is harmless.
+    :meth:`contains` tells whether the avatar ``digest`` is still stored.
+    """
+
+    backend = "base"
+
+    @abstractmethod
+    async def save(self, digest: str, variants: Dict[int, bytes]) -> str:
+        ...
+
+    async def contains(self, digest: str) -> bool:
+        return True
+
+class CloudinaryStorage(AvatarStorage):
+    """
+    Uploads the full-size avatar to Cloudinary, which derives smaller sizes
+    itself. The SDK is synchronous, so uploads run in a worker thread
+    instead of blocking the event loop.
+    """
+
+    backend = "cloudinary"
+
+    def __init__(self, folder: str = "ContactsApp"):
+        self.folder = folder
+        cloudinary.config(
+            cloud_name=settings.cloudinary_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            secure=True
+        )
+
+    async def save(self, digest: str, variants: Dict[int, bytes]) -> str:
+        public_id = f"{self.folder}/{digest}"
+        data = variants[max(variants)]
+        r = await asyncio.to_thread(cloudinary.uploader.upload, BytesIO(data), public_id=public_id, overwrite=False)
+        return r.get("secure_url") or cloudinary.CloudinaryImage(public_id).build_url(version=r.get("version"))
+
+class LocalAvatarStorage(AvatarStorage):
+    """
+    Keeps avatars on local disk as ``{digest}-{size}.png``, one file per
+    thumbnail size, served by ``GET /api/avatars/{name}``. A file's name
+    changes whenever its content does, so responses can be cached forever.
+
+    :param root: The directory holding the files.
+    :type root: Path
+    :param base_url: The URL prefix the files are served under.
+    :type base_url: str
+    """
+
+    backend = "local"
+
+    def __init__(self, root: Path, base_url: str = "/api/avatars"):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    @staticmethod
+    def name(digest: str, size: int) -> str:
+        return f"{digest}-{size}.png"
+
+    def path(self, name: str) -> Optional[Path]:
+        """
+        Returns the file of the avatar ``name``, or None if it is not a valid avatar name.
+        """
+        if not AVATAR_NAME.match(name):
+            return None
+        return self.root / name
+
+    async def save(self, digest: str, variants: Dict[int, bytes]) -> str:
+        await asyncio.to_thread(self._write_all, digest, variants)
+        return f"{self.base_url}/{self.name(digest, max(variants))}"
+
+    async def contains(self, digest: str) -> bool:
+        paths = [self.root / self.name(digest, size) for size in AVATAR_SIZES]
+        return await asyncio.to_thread(lambda: all(path.exists() for path in paths))
+
+    def _write_all(self, digest: str, variants: Dict[int, bytes]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        for size, data in variants.items():
+            path = self.root / self.name(digest, size)
+            if not path.exists():
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(data)
+                tmp.replace(path)
+
+def render_variants(data: bytes, sizes: Sequence[int] = AVATAR_SIZES) -> Dict[int, bytes]:
+    """
+    Crops the image to a centred square and returns it as PNG at each of ``sizes`` pixels.
+
+    :raises HTTPException: 400 if ``data`` is not an image Pillow can read.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            largest = ImageOps.fit(image.convert("RGBA"), (max(sizes), max(sizes)), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image")
+    variants = {}
+    for size in sorted(sizes, reverse=True):
+        variant = largest if size == max(sizes) else largest.resize((size, size), Image.Resampling.LANCZOS)
+        out = BytesIO()
+        variant.save(out, format="PNG", optimize=True)
+        variants[size] = out.getvalue()
+    return variants
+
+# Room for the multipart boundary and part headers around an avatar upload.
+MULTIPART_OVERHEAD = 16 * 1024
+
+async def read_limited(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Reads the upload in chunks and stops as soon as it grows past ``max_bytes``.
+
+    :raises HTTPException: 413 if the file is too large.
+    """
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Avatar is too large")
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+    chunks = []
+    total = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        total += len(chunk)
+        if total > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+class AvatarService:
+    """
+    Turns an uploaded image into the user's avatar URL.
+
+    The upload is read with a size cap, resized to every thumbnail size on
+    a bounded thread pool and hashed. Avatars are stored under the SHA-256
+    of the full-size image, so an image already stored, by this user or
+    anyone else, is not stored again: the hash is looked up in
+    ``avatar:{backend}:{digest}`` in Redis and against the user's current
+    avatar URL first. A URL from Redis is only trusted while the storage
+    still holds the avatar.
+
+    :param storage: Where avatars are stored.
+    :type storage: AvatarStorage
+    :param pool: The pool running the image processing.
+    :type pool: WorkerPool
+    :param url_ttl: Seconds an avatar URL stays cached in Redis.
+    :type url_ttl: int
+    """
+
+    def __init__(self, storage: AvatarStorage, pool: WorkerPool, manager=redis_manager,
+                 max_bytes: int = 5 * 1024 * 1024, url_ttl: int = 7 * 24 * 3600):
+        self.storage = storage
+        self.pool = pool
+        self.manager = manager
+        self.max_bytes = max_bytes
+        self.url_ttl = url_ttl
+        self.uploads = 0
+        self.deduplicated = 0
+
+    def _url_key(self, digest: str) -> str:
+        return f"avatar:{self.storage.backend}:{digest}"
+
+    async def _known_url(self, digest: str) -> Optional[str]:
+        if not self.manager.healthy:
+            return None
+        try:
+            url = await self.manager.client.get(self._url_key(digest))
+        except RedisError:
+            return None
+        if url is None or not await self.storage.contains(digest):
+            return None
+        return url.decode()
+
+    async def _remember_url(self, digest: str, url: str) -> None:
+        if self.manager.healthy:
+            try:
+                await self.manager.client.set(self._url_key(digest), url, ex=self.url_ttl)
+            except RedisError as e:
+                print(f"avatar url not cached: {e}")
+
+    async def store(self, file: UploadFile, user: User) -> str:
+        """
+        Processes ``file`` and returns the URL of the stored avatar.
+        """
+        data = await read_limited(file, self.max_bytes)
+        variants = await self.pool.run(render_variants, data)
+        digest = hashlib.sha256(variants[AVATAR_SIZE]).hexdigest()
+        if user.avatar and digest in user.avatar:
+            self.deduplicated += 1
+            return user.avatar
+        url = await self._known_url(digest)
+        if url is not None:
+            self.deduplicated += 1
+            return url
+        url = await self.storage.save(digest, variants)
+        self.uploads += 1
+        await self._remember_url(digest, url)
+        return url
+
+    def metrics(self) -> dict:
+        return {"uploads": self.uploads, "deduplicated": self.deduplicated, "processing": self.pool.metrics()}
+
+def make_storage(backend: str) -> AvatarStorage:
+    if backend == "local":
+        return LocalAvatarStorage(Path(settings.avatar_local_dir))
+    return CloudinaryStorage()
+
+image_pool = WorkerPool(max_workers=settings.image_workers, max_queue=settings.image_queue, name="image")
+
+avatar_service = AvatarService(
+    storage=make_storage(settings.avatar_backend),
+    pool=image_pool,
+    max_bytes=settings.avatar_max_bytes,
+    url_ttl=settings.avatar_url_ttl,
+)
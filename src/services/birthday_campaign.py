@@ -0,0 +1,165 @@
+from calendar import isleap
+from datetime import date
+from fastapi_mail.errors import ConnectionErrors
+from redis.exceptions import RedisError
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.repository import contacts as repository_contacts
+from src.services.email import build_messages, smtp_pool
+from src.services.redis_manager import redis_manager
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import sys
+
+SUBJECT = "Birthdays today"
+TEMPLATE = "birthday-digest-template.html"
+DONE = "done"
+
+def birthday_days(day: date) -> Tuple[int, List[int]]:
+    """
+    Returns the month and days whose birthdays are celebrated on ``day``;
+    February 29 birthdays are celebrated on February 28 in common years.
+    """
+    if day.month == 2 and day.day == 28 and not isleap(day.year):
+        return 2, [28, 29]
+    return day.month, [day.day]
+
+class BirthdayCampaign:
+    """
+    Emails every user one digest of their contacts whose birthday is today.
+
+    The contacts of all users are read in a single keyset-paginated pass
+    over the month-day index, ordered by user, so a user's contacts are
+    adjacent and each page needs one query no matter how many users there
+    are. Every page's digests are rendered as a batch and sent over the
+    pooled SMTP sender with at most ``concurrency`` sends in flight.
+
+    After a page is sent, the id of the last user fully handled is saved in
+    Redis, and a rerun on the same day resumes after it. A page with failed
+    sends stops the run without moving the checkpoint, so at most that page
+    is sent again. Run it each morning with
+
+        python -m src.services.birthday_campaign [YYYY-MM-DD]
+
+    :param page_size: Contact rows read per query.
+    :type page_size: int
+    :param concurrency: The maximum number of digests being sent at once.
+    :type concurrency: int
+    """
+
+    def __init__(self, session_factory=SessionLocal, sender=smtp_pool, manager=redis_manager,
+                 page_size: int = 5000, concurrency: int = 16):
+        self.session_factory = session_factory
+        self.sender = sender
+        self.manager = manager
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.checkpoints: Dict[str, str] = {}
+
+    @staticmethod
+    def checkpoint_key(day: date) -> str:
+        return f"campaign:birthdays:{day.isoformat()}"
+
+    async def load_checkpoint(self, day: date) -> Optional[str]:
+        key = self.checkpoint_key(day)
+        if self.manager.healthy:
+            try:
+                value = await self.manager.client.get(key)
+                return value.decode() if value is not None else None
+            except RedisError as e:
+                print(f"campaign checkpoint unavailable: {e}")
+        return self.checkpoints.get(key)
+
+    async def save_checkpoint(self, day: date, value: str) -> None:
+        key = self.checkpoint_key(day)
+        self.checkpoints[key] = value
+        if self.manager.healthy:
+            try:
+                await self.manager.client.set(key, value, ex=2 * 24 * 3600)
+            except RedisError as e:
+                print(f"campaign checkpoint not saved: {e}")
+
+    async def _send_all(self, digests: List[Tuple[str, dict]]) -> int:
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def send(message) -> bool:
+            async with slots:
+                try:
+                    await self.sender.send(message)
+                    return True
+                except ConnectionErrors as e:
+                    print(f"birthday digest to {message['To']} failed: {e}")
+                    return False
+
+        results = await asyncio.gather(*(send(message) for message in build_messages(SUBJECT, TEMPLATE, digests)))
+        return results.count(False)
+
+    async def run(self, day: Optional[date] = None) -> dict:
+        """
+        Sends the digests for ``day`` (today by default).
+
+        :return: Counts of users and contacts handled by this run.
+        :rtype: dict
+        """
+        day = day or date.today()
+        stats = {"users": 0, "contacts": 0, "failed": 0, "resumed": False}
+        checkpoint = await self.load_checkpoint(day)
+        if checkpoint == DONE:
+            return stats
+        last_user_id = int(checkpoint) if checkpoint is not None else 0
+        stats["resumed"] = checkpoint is not None
+        month, days = birthday_days(day)
+        # Contact ids start at 1, so this skips every contact of users up to the checkpoint.
+        after = (last_user_id + 1, 0)
+        # Rows of the user the current page ends with, completed by the next page.
+        pending: List = []
+        db = self.session_factory()
+        try:
+            while True:
+                rows = repository_contacts.get_birthdays_page(month, days, after, self.page_size, db)
+                if rows:
+                    after = (rows[-1].user_id, rows[-1].id)
+                rows = pending + list(rows)
+                last_page = len(rows) - len(pending) < self.page_size
+                pending = []
+                if not last_page:
+                    tail_user = rows[-1].user_id
+                    while rows and rows[-1].user_id == tail_user:
+                        pending.insert(0, rows.pop())
+                groups: Dict[int, Tuple[str, dict]] = {}
+                for row in rows:
+                    if row.user_id not in groups:
+                        groups[row.user_id] = (row.user_email, {"username": row.username, "contacts": []})
+                    groups[row.user_id][1]["contacts"].append(
+                        {"first_name": row.first_name, "last_name": row.last_name, "email": row.email}
+                    )
+                if groups:
+                    failed = await self._send_all(list(groups.values()))
+                    if failed:
+                        stats["failed"] += failed
+                        return stats
+                    stats["users"] += len(groups)
+                    stats["contacts"] += len(rows)
+                    await self.save_checkpoint(day, str(max(groups)))
+                if last_page:
+                    break
+        finally:
+            db.close()
+        await self.save_checkpoint(day, DONE)
+        return stats
+
+birthday_campaign = BirthdayCampaign(
+    page_size=settings.birthday_campaign_page_size,
+    concurrency=settings.birthday_campaign_concurrency,
+)
+
+async def main(day: Optional[date] = None) -> None:
+    await redis_manager.connect()
+    try:
+        print(await birthday_campaign.run(day))
+    finally:
+        await smtp_pool.close()
+        await redis_manager.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,183 @@
+from typing import Iterable, List, Optional, Tuple
+import hashlib
+import math
+import uuid
+
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+MARK_READY_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('set', KEYS[2], 1, 'EX', ARGV[2])
+redis.call('expire', KEYS[3], ARGV[3])
+redis.call('del', KEYS[1])
+return 1
+"""
+
+def bloom_layout(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """
+    Returns the bit array size and hash count for ``capacity`` items at ``error_rate``.
+    """
+    capacity = max(int(capacity), 1)
+    size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+    hash_count = max(int(round(size / capacity * math.log(2))), 1)
+    return size, hash_count
+
+def bloom_positions(item: str, size: int, hash_count: int) -> List[int]:
+    """
+    Returns the bit offsets for ``item`` using double hashing over one BLAKE2b digest.
+    """
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % size for i in range(hash_count)]
+
+class BloomFilter:
+    """
+    Probabilistic set membership with no false negatives.
+
+    ``item in bloom`` returning ``False`` means the item was never added;
+    ``True`` means it probably was, with a false positive rate close to
+    ``error_rate`` while fewer than ``capacity`` items have been added.
+
+    :param capacity: The expected number of items.
+    :type capacity: int
+    :param error_rate: The target false positive rate.
+    :type error_rate: float
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.01):
+        self.size, self.hash_count = bloom_layout(capacity, error_rate)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item: str) -> List[int]:
+        return bloom_positions(item, self.size, self.hash_count)
+
+    def add(self, item: str) -> None:
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+    def clear(self) -> None:
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+class SharedBloomFilter:
+    """
+    Bloom filter whose bits live in a Redis bitmap, so every worker sees
+    items added by any other worker.
+
+    The filter only answers ``False`` once it has been marked ready, i.e.
+    after it has been fully populated; until then every lookup is a
+    "maybe" and callers fall back to the authoritative store. One worker
+    at a time rebuilds it, under a claim it renews while it works. The ready
+    marker expires after ``ttl`` seconds so the filter is rebuilt and drops
+    the bits of removed items; the bitmap outlives the marker, so a ready
+    filter always has its bits. Both keys share a hash tag, which keeps
+    them on one cluster slot and lets a lookup read the marker and the bits
+    in one transaction. Each operation is a single round trip.
+
+    :param redis: The async Redis client holding the bitmap.
+    :param key: The Redis key of the bitmap, used as the hash tag of all keys.
+    :type key: str
+    :param ttl: Seconds the filter stays ready after it is populated.
+    :type ttl: int
+    """
+
+    def __init__(self, redis, key: str, capacity: int = 100_000, error_rate: float = 0.01, ttl: int = 86400):
+        self.size, self.hash_count = bloom_layout(capacity, error_rate)
+        self.r = redis
+        self.key = f"{{{key}}}"
+        self.ready_key = f"{self.key}:ready"
+        self.rebuild_key = f"{self.key}:rebuild"
+        self.ttl = ttl
+
+    def positions(self, item: str) -> List[int]:
+        return bloom_positions(item, self.size, self.hash_count)
+
+    async def add(self, item: str) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        for position in self.positions(item):
+            pipe.setbit(self.key, position, 1)
+        await pipe.execute()
+
+    async def update(self, items: Iterable[str]) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        for n, item in enumerate(items, start=1):
+            for position in self.positions(item):
+                pipe.setbit(self.key, position, 1)
+            if n % 1000 == 0:
+                await pipe.execute()
+        await pipe.execute()
+
+    async def might_contain(self, item: str) -> bool:
+        pipe = self.r.pipeline(transaction=False)
+        for position in self.positions(item):
+            pipe.getbit(self.key, position)
+        return all(await pipe.execute())
+
+    async def check(self, item: str) -> Optional[bool]:
+        """
+        Like :meth:`might_contain`, but returns None while the filter is not
+        ready. The marker and the bits are read in one transaction, so the
+        answer never comes from a bitmap that is being rebuilt.
+        """
+        pipe = self.r.pipeline(transaction=True)
+        pipe.exists(self.ready_key)
+        for position in self.positions(item):
+            pipe.getbit(self.key, position)
+        ready, *bits = await pipe.execute()
+        return all(bits) if ready else None
+
+    async def is_ready(self) -> bool:
+        return bool(await self.r.exists(self.ready_key))
+
+    async def begin_rebuild(self, timeout: int = 600) -> Optional[str]:
+        """
+        Claims the rebuild of the filter and empties it.
+
+        :param timeout: Seconds the claim lasts unless renewed with :meth:`renew_rebuild`.
+        :type timeout: int
+        :return: The token identifying this rebuild, or None if another worker is rebuilding.
+        :rtype: str | None
+        """
+        token = uuid.uuid4().hex
+        if not await self.r.set(self.rebuild_key, token, nx=True, ex=timeout):
+            return None
+        await self.r.delete(self.key, self.ready_key)
+        return token
+
+    async def renew_rebuild(self, token: str, timeout: int = 600) -> bool:
+        """
+        Extends the claim of the rebuild ``token``. Returns False if it was lost.
+        """
+        return bool(await self.r.eval(RENEW_SCRIPT, 1, self.rebuild_key, token, timeout))
+
+    async def mark_ready(self, token: str) -> bool:
+        """
+        Marks the filter ready, if the rebuild ``token`` still holds the claim,
+        and sets the TTLs of the marker and the bitmap in the same step.
+
+        :return: False if another worker took the rebuild over.
+        :rtype: bool
+        """
+        return bool(await self.r.eval(
+            MARK_READY_SCRIPT, 3, self.rebuild_key, self.ready_key, self.key, token, self.ttl, 2 * self.ttl
+        ))
+
+    async def clear(self) -> None:
+        await self.r.delete(self.key, self.ready_key, self.rebuild_key)
@@ -0,0 +1,197 @@
+from contextlib import asynccontextmanager
+from redis.exceptions import RedisError
+from src.conf.config import settings
+from src.services.redis_manager import redis_manager
+from typing import AsyncIterator, Dict, Optional, Set
+import asyncio
+import orjson
+
+CHANNEL = "contact_changes"
+RESYNC = {"type": "resync"}
+
+class Subscription:
+    """
+    The buffer of events waiting to be sent to one connection.
+
+    When the client reads too slowly and ``queue_size`` events pile up,
+    they are dropped for a single ``resync`` event, which tells the client
+    to catch up from ``GET /api/contacts/changes`` instead.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.resync_pending = False
+        self.dropped = 0
+
+    def push(self, event: dict) -> None:
+        if self.resync_pending:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.resync_pending = True
+
+    async def get(self) -> dict:
+        event = await self.queue.get()
+        if event is RESYNC:
+            self.resync_pending = False
+        return event
+
+class TooManyConnections(Exception):
+    """
+    Raised when a user already has the maximum number of open connections.
+    """
+
+class ChangeFeed:
+    """
+    Delivers contact changes to the connections of their owner.
+
+    Changes are published on the Redis channel :data:`CHANNEL`, and every
+    worker runs one subscription to it, handing each change to the local
+    connections of that user, so a change made on any node reaches the
+    user's clients on all nodes. Without Redis, changes are delivered to
+    the connections of the worker that made them, which is enough for a
+    single node. Clients should fetch ``/api/contacts/changes`` whenever
+    they (re)connect, as changes made while they were away are not replayed.
+
+    :param queue_size: The events buffered per connection.
+    :type queue_size: int
+    :param max_connections: The open connections allowed per user on this worker, or None for no limit.
+    :type max_connections: int | None
+    """
+
+    def __init__(self, manager=redis_manager, queue_size: int = 100, max_connections: Optional[int] = None):
+        self.manager = manager
+        self.queue_size = queue_size
+        self.max_connections = max_connections
+        self.subscribers: Dict[int, Set[Subscription]] = {}
+        self.subscribed = False
+        self.published = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.restarts = 0
+        self.rejected = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def connections(self, user_id: int) -> int:
+        return len(self.subscribers.get(user_id, ()))
+
+    def at_limit(self, user_id: int) -> bool:
+        return self.max_connections is not None and self.connections(user_id) >= self.max_connections
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[Subscription]:
+        """
+        Opens a connection of ``user_id`` to the feed.
+
+        :raises TooManyConnections: If the user already has ``max_connections`` open.
+        """
+        if self.at_limit(user_id):
+            self.rejected += 1
+            raise TooManyConnections(user_id)
+        subscription = Subscription(self.queue_size)
+        self.subscribers.setdefault(user_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            self.dropped += subscription.dropped
+            subscriptions = self.subscribers.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscribers[user_id]
+
+    def dispatch(self, user_id: int, event: dict) -> None:
+        for subscription in self.subscribers.get(user_id, ()):
+            subscription.push(event)
+
+    async def publish(self, user_id: int, event: dict) -> None:
+        """
+        Sends ``event`` to the connections of ``user_id``. Never raises, a
+        change is saved whether or not its notification goes out.
+        """
+        self.published += 1
+        if self.subscribed and self.manager.healthy:
+            try:
+                await self.manager.client.publish(CHANNEL, orjson.dumps({"user_id": user_id, "event": event}))
+                return
+            except RedisError as e:
+                print(f"change not published: {e}")
+        self.dispatch(user_id, event)
+
+    async def _listen(self) -> None:
+        while True:
+            if not self.manager.healthy:
+                await asyncio.sleep(1)
+                continue
+            pubsub = self.manager.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(CHANNEL)
+                self.subscribed = True
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    try:
+                        change = orjson.loads(message["data"])
+                        user_id, event = change["user_id"], change["event"]
+                    except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+                        self.malformed += 1
+                        print(f"change feed skipped malformed message: {e!r}")
+                        continue
+                    self.dispatch(user_id, event)
+            except RedisError as e:
+                print(f"change feed listener disconnected: {e}")
+                await asyncio.sleep(1)
+            finally:
+                self.subscribed = False
+                await pubsub.aclose()
+
+    async def _run(self) -> None:
+        """
+        Keeps :meth:`_listen` running: an unexpected error restarts it
+        instead of leaving the worker without cross-node delivery.
+        """
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.restarts += 1
+                print(f"change feed listener crashed, restarting: {e!r}")
+                await asyncio.sleep(1)
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def metrics(self) -> dict:
+        return {
+            "listening": self.subscribed,
+            "connections": sum(len(subscriptions) for subscriptions in self.subscribers.values()),
+            "published": self.published,
+            "malformed": self.malformed,
+            "restarts": self.restarts,
+            "rejected": self.rejected,
+            "dropped": self.dropped + sum(s.dropped for subs in self.subscribers.values() for s in subs),
+        }
+
+change_feed = ChangeFeed(
+    queue_size=settings.change_feed_queue_size,
+    max_connections=settings.change_feed_max_connections,
+)
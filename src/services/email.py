@@ -1,10 +1,12 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
-from pathlib import Path
+from email.message import EmailMessage
+from email.utils import formataddr
+from fastapi_mail import ConnectionConfig
 from pydantic import EmailStr, TypeAdapter
 from src.conf.config import settings
-from src.repository.utils import logger
 from src.services.auth import auth_service
+from src.services.renderer import TEMPLATE_FOLDER, renderer
+from src.services.smtp_pool import SMTPPool
+from typing import List, Tuple
 
 conf = ConnectionConfig(
     MAIL_USERNAME=settings.mail_username,
@@ -18,36 +20,58 @@ conf = ConnectionConfig(
     MAIL_SSL_TLS=True,
     USE_CREDENTIALS=True,
     VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
+    TEMPLATE_FOLDER=TEMPLATE_FOLDER,
 )
 
-async def send_email(email: EmailStr, username: str, host: str):
-    try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        logger.info(f"before send message: {email}")
-        await fm.send_message(message, template_name="email_template.html")
-        logger.info(f"email sent to: {email}")
-    except ConnectionErrors as err:
-        print(err)
-
-async def send_password_reset_email(email: EmailStr, username: str, token: str, host: str):
-    try:
-        message = MessageSchema(
-            subject="Reset your password ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "reset_token": token},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="reset-password-email-template.html")
-    except ConnectionErrors as err:
-        print(err)
+smtp_pool = SMTPPool(
+    hostname=conf.MAIL_SERVER,
+    port=conf.MAIL_PORT,
+    username=conf.MAIL_USERNAME if conf.USE_CREDENTIALS else None,
+    password=conf.MAIL_PASSWORD.get_secret_value(),
+    use_tls=conf.MAIL_SSL_TLS,
+    start_tls=conf.MAIL_STARTTLS,
+    validate_certs=conf.VALIDATE_CERTS,
+    timeout=conf.TIMEOUT,
+    size=settings.smtp_pool_size,
+    max_messages=settings.smtp_max_messages,
+)
+
+SENDER = formataddr((conf.MAIL_FROM_NAME, conf.MAIL_FROM))
+
+def _html_message(email: EmailStr, subject: str, html: str) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = SENDER
+    message["To"] = email
+    message.set_content(html, subtype="html")
+    return message
+
+def build_message(email: EmailStr, subject: str, template_name: str, template_body: dict) -> EmailMessage:
+    """
+    Renders ``template_name`` with ``template_body`` into an HTML message to ``email``.
+    """
+    return _html_message(email, subject, renderer.render(template_name, **template_body))
+
+def build_messages(subject: str, template_name: str, recipients: List[Tuple[EmailStr, dict]]) -> List[EmailMessage]:
+    """
+    Builds one message per ``(email, template_body)`` pair, rendering them as a batch.
+    """
+    bodies = renderer.render_batch(template_name, (template_body for _, template_body in recipients))
+    return [_html_message(email, subject, html) for (email, _), html in zip(recipients, bodies)]
+
+async def build_confirmation_email(email: EmailStr, username: str, host: str) -> EmailMessage:
+    token_verification = await auth_service.create_email_token({"sub": email})
+    return build_message(
+        email,
+        "Confirm your email ",
+        "email_template.html",
+        {"host": host, "username": username, "token": token_verification},
+    )
+
+async def build_password_reset_email(email: EmailStr, username: str, token: str, host: str) -> EmailMessage:
+    return build_message(
+        email,
+        "Reset your password ",
+        "reset-password-email-template.html",
+        {"host": host, "username": username, "reset_token": token},
+    )
@@ -0,0 +1,48 @@
+from fastapi import HTTPException, status
+from functools import lru_cache
+from pydantic import BaseModel
+from src.schemas import ContactResponse
+from src.services.serializers import RowSerializer
+from typing import Optional, Tuple, Type
+
+class SparseFields:
+    """
+    Handles ``?fields=a,b`` requests for the response model ``model``.
+
+    :meth:`parse` turns the parameter into a field set in the model's field
+    order, so equal selections share one cache entry, and :meth:`serializer`
+    returns the serializer of a field set, built the first time it is asked for.
+
+    :param model: The full response model.
+    :type model: Type[BaseModel]
+    :param required: Fields returned whatever is selected.
+    :type required: Tuple[str, ...]
+    """
+
+    def __init__(self, model: Type[BaseModel], required: Tuple[str, ...] = ("id",), cache_size: int = 128):
+        self.model = model
+        self.required = required
+        self.serializer = lru_cache(maxsize=cache_size)(self._build)
+
+    def parse(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """
+        Returns the selected fields, or None if ``fields`` is empty and the full model applies.
+
+        :raises HTTPException: 422 if a field does not exist.
+        """
+        if not fields:
+            return None
+        selected = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = selected - self.model.model_fields.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+        selected.update(self.required)
+        return tuple(name for name in self.model.model_fields if name in selected)
+
+    def _build(self, fields: Tuple[str, ...]) -> RowSerializer:
+        return RowSerializer(self.model, fields)
+
+contact_fields = SparseFields(ContactResponse)
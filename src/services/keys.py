@@ -0,0 +1,105 @@
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from pathlib import Path
+from src.conf.config import settings
+from typing import Dict, List, Optional
+
+HMAC_ALGORITHMS = ("HS256", "HS384", "HS512")
+
+class SigningKey:
+    """
+    One JWT key, parsed once.
+
+    :param kid: The key id written to the token header.
+    :type kid: str
+    :param algorithm: The JWS algorithm, e.g. ``HS256``, ``RS256`` or ``ES256``.
+    :type algorithm: str
+    :param material: The HMAC secret or the PEM encoded private key.
+    :type material: str
+    """
+
+    def __init__(self, kid: str, algorithm: str, material: str):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signer: Key = jwk.construct(material, algorithm)
+        if algorithm in HMAC_ALGORITHMS:
+            self.verifier = self.signer
+        else:
+            self.verifier = self.signer.public_key()
+
+    @property
+    def is_public(self) -> bool:
+        return self.algorithm not in HMAC_ALGORITHMS
+
+    def public_jwk(self) -> dict:
+        return {**self.verifier.to_dict(), "kid": self.kid, "use": "sig"}
+
+class KeyManager:
+    """
+    Holds every key tokens may be signed with and picks one by ``kid``.
+
+    New tokens are signed with the active key; tokens carrying the ``kid``
+    of any other configured key keep verifying until that key is removed,
+    which is how keys are rotated. Tokens without a ``kid`` (issued before
+    key ids existed) are checked against the default key. Key material is
+    parsed once here instead of on every encode and decode.
+
+    :param default_kid: The key used for tokens without a ``kid``.
+    :type default_kid: str
+    """
+
+    def __init__(self, default_kid: str = "default"):
+        self.keys: Dict[str, SigningKey] = {}
+        self.default_kid = default_kid
+        self.active_kid = default_kid
+
+    def add_key(self, kid: str, algorithm: str, material: str, active: bool = False) -> SigningKey:
+        key = SigningKey(kid, algorithm, material)
+        self.keys[kid] = key
+        if active:
+            self.active_kid = kid
+        return key
+
+    @property
+    def active(self) -> SigningKey:
+        return self.keys[self.active_kid]
+
+    def encode(self, claims: dict) -> str:
+        key = self.active
+        return jwt.encode(claims, key.signer, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def decode(self, token: str) -> dict:
+        """
+        Verifies ``token`` with the key named in its header and returns the claims.
+
+        :raises JWTError: If the token is malformed, its ``kid`` is unknown or it fails verification.
+        """
+        kid = jwt.get_unverified_header(token).get("kid") or self.default_kid
+        key = self.keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown key id: {kid}")
+        return jwt.decode(token, key.verifier, algorithms=[key.algorithm])
+
+    def jwks(self) -> dict:
+        """
+        Returns the public keys as a JWKS document, for services verifying tokens locally.
+        HMAC keys are secret and never listed.
+        """
+        return {"keys": [key.public_jwk() for key in self.keys.values() if key.is_public]}
+
+def load_key_manager(key_configs: Optional[List[dict]] = None) -> KeyManager:
+    """
+    Builds the key manager from ``SECRET_KEY``/``JWT_ALGORITHM`` plus the
+    keys listed in ``JWT_KEYS``, e.g.
+    ``[{"kid": "2025-10", "alg": "ES256", "key_file": "keys/es256.pem"}]``.
+    """
+    manager = KeyManager()
+    manager.add_key(manager.default_kid, settings.jwt_algorithm, settings.secret_key)
+    for config in key_configs if key_configs is not None else settings.jwt_keys:
+        material = config.get("key") or Path(config["key_file"]).read_text()
+        manager.add_key(config["kid"], config["alg"], material)
+    if settings.jwt_active_kid in manager.keys:
+        manager.active_kid = settings.jwt_active_kid
+    return manager
+
+key_manager = load_key_manager()
@@ -0,0 +1,113 @@
+from redis.exceptions import RedisError
+from src.conf.config import settings
+from src.services.redis_manager import redis_manager
+
+FAILURE_SCRIPT = """
+local window = tonumber(ARGV[1])
+local base = tonumber(ARGV[4])
+local max_lock = tonumber(ARGV[5])
+local longest = 0
+local function bump(fail_key, lock_key, threshold)
+    local count = redis.call("INCR", fail_key)
+    redis.call("PEXPIRE", fail_key, window)
+    if count >= threshold then
+        local lock = math.min(base * 2 ^ (count - threshold), max_lock)
+        redis.call("SET", lock_key, 1, "PX", math.floor(lock))
+        if lock > longest then
+            longest = lock
+        end
+    end
+end
+bump(KEYS[1], KEYS[3], tonumber(ARGV[2]))
+bump(KEYS[2], KEYS[4], tonumber(ARGV[3]))
+return math.floor(longest)
+"""
+
+class LoginThrottle:
+    """
+    Failed-login counters per account and per client IP with exponential lockout.
+
+    Each failure bumps both counters in one script call. Once a counter
+    reaches its threshold, the account or IP is locked for ``base_lock_ms``,
+    doubling with every further failure up to ``max_lock_ms``. Counters are
+    forgotten after ``window_ms`` without failures, and a successful login
+    clears the account's counter.
+
+    :meth:`check` runs before the password is verified, so a locked out
+    attempt costs one Redis round trip instead of a bcrypt hash. While
+    Redis is unavailable logins are not throttled; the hashing pool's
+    queue limit still bounds the bcrypt load.
+    """
+
+    def __init__(self, manager=redis_manager, account_threshold: int = 5, ip_threshold: int = 20,
+                 base_lock_ms: int = 1000, max_lock_ms: int = 900_000, window_ms: int = 3_600_000):
+        self.manager = manager
+        self.account_threshold = account_threshold
+        self.ip_threshold = ip_threshold
+        self.base_lock_ms = base_lock_ms
+        self.max_lock_ms = max_lock_ms
+        self.window_ms = window_ms
+        self.script = manager.client.register_script(FAILURE_SCRIPT)
+        self.rejected = 0
+
+    @staticmethod
+    def _keys(email: str, ip: str) -> list:
+        return [
+            f"login_fail:account:{email}",
+            f"login_fail:ip:{ip}",
+            f"login_lock:account:{email}",
+            f"login_lock:ip:{ip}",
+        ]
+
+    async def check(self, email: str, ip: str) -> int:
+        """
+        Returns how many milliseconds the account or the IP stays locked, ``0`` if neither is.
+        """
+        if not self.manager.healthy:
+            return 0
+        keys = self._keys(email, ip)
+        try:
+            pipe = self.manager.client.pipeline(transaction=False)
+            pipe.pttl(keys[2])
+            pipe.pttl(keys[3])
+            wait = max(await pipe.execute())
+        except RedisError as e:
+            print(f"login throttle check failed: {e}")
+            return 0
+        if wait > 0:
+            self.rejected += 1
+            return wait
+        return 0
+
+    async def record_failure(self, email: str, ip: str) -> int:
+        """
+        Counts a failed attempt and returns the lockout it triggered in milliseconds.
+        """
+        if not self.manager.healthy:
+            return 0
+        try:
+            return int(await self.script(
+                keys=self._keys(email, ip),
+                args=[self.window_ms, self.account_threshold, self.ip_threshold, self.base_lock_ms, self.max_lock_ms],
+            ))
+        except RedisError as e:
+            print(f"login throttle update failed: {e}")
+            return 0
+
+    async def reset(self, email: str) -> None:
+        if not self.manager.healthy:
+            return
+        keys = self._keys(email, "")
+        try:
+            await self.manager.client.delete(keys[0], keys[2])
+        except RedisError as e:
+            print(f"login throttle reset failed: {e}")
+
+    def metrics(self) -> dict:
+        return {"rejected": self.rejected}
+
+login_throttle = LoginThrottle(
+    account_threshold=settings.login_account_threshold,
+    ip_threshold=settings.login_ip_threshold,
+    max_lock_ms=settings.login_max_lockout * 1000,
+)
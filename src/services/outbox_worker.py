@@ -0,0 +1,140 @@
+from datetime import timedelta
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.database.models import EmailOutbox
+from src.repository import outbox as repository_outbox
+from src.services.email import build_confirmation_email, build_password_reset_email, smtp_pool
+import asyncio
+import random
+import time
+
+BUILDERS = {
+    "confirm_email": lambda message: build_confirmation_email(message.recipient, **message.payload),
+    "password_reset": lambda message: build_password_reset_email(message.recipient, **message.payload),
+}
+
+class OutboxWorker:
+    """
+    Sends the emails queued in ``email_outbox``, meant to run as its own process:
+
+        python -m src.services.outbox_worker
+
+    Each pass locks a batch of due messages and sends them concurrently
+    over the pooled SMTP sender. A message with the same ``dedup_key`` as
+    a newer one in the batch, or as one sent within ``dedup_window``
+    seconds, is marked ``duplicate`` instead of being sent again. A failed
+    send is retried with exponential backoff and jitter, up to
+    ``max_attempts`` times, after which the message is marked ``failed``.
+    Sent and duplicate messages are deleted once they are older than
+    ``retention`` seconds; failed ones are kept for inspection.
+
+    :param batch_size: Messages locked and sent per pass.
+    :type batch_size: int
+    :param max_attempts: Sends tried before a message is given up.
+    :type max_attempts: int
+    :param poll_interval: Seconds to wait when the outbox is drained.
+    :type poll_interval: float
+    :param retention: Seconds delivered messages are kept.
+    :type retention: float
+    """
+
+    def __init__(self, session_factory=SessionLocal, sender=smtp_pool, batch_size: int = 50,
+                 max_attempts: int = 8, poll_interval: float = 2, dedup_window: float = 300,
+                 base_backoff: float = 5, max_backoff: float = 3600, retention: float = 7 * 24 * 3600,
+                 purge_interval: float = 3600):
+        self.session_factory = session_factory
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.dedup_window = timedelta(seconds=dedup_window)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retention = timedelta(seconds=retention)
+        self.purge_interval = purge_interval
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.base_backoff * 2 ** (attempts - 1), self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _deliver(self, message: EmailOutbox) -> None:
+        try:
+            await self.sender.send(await BUILDERS[message.kind](message))
+        except Exception as error:
+            # Any failure stays with its message, so the rest of the batch is still committed.
+            message.attempts += 1
+            message.last_error = f"{type(error).__name__}: {error}"
+            # A message that cannot be built from its payload will not succeed on a retry.
+            if message.attempts >= self.max_attempts or isinstance(error, (KeyError, TypeError)):
+                message.status = "failed"
+            else:
+                message.next_attempt_at = repository_outbox.utcnow() + timedelta(seconds=self.backoff(message.attempts))
+            return
+        message.attempts += 1
+        message.status = "sent"
+        message.sent_at = repository_outbox.utcnow()
+
+    async def run_once(self) -> int:
+        """
+        Processes one batch and returns how many messages it contained.
+        """
+        db = self.session_factory()
+        try:
+            batch = await repository_outbox.claim_batch(db, self.batch_size)
+            if not batch:
+                return 0
+            sent = await repository_outbox.recently_sent(db, {m.dedup_key for m in batch}, self.dedup_window)
+            newest = {}
+            for message in batch:
+                newest[message.dedup_key] = message
+            to_send = []
+            for message in batch:
+                if message.dedup_key in sent or newest[message.dedup_key] is not message:
+                    message.status = "duplicate"
+                else:
+                    to_send.append(message)
+            # The rows stay locked until the commit, so no other worker picks them up meanwhile.
+            await asyncio.gather(*(self._deliver(message) for message in to_send))
+            db.commit()
+            return len(batch)
+        finally:
+            db.close()
+
+    async def purge(self) -> int:
+        """
+        Deletes the delivered messages older than the retention period and returns how many.
+        """
+        db = self.session_factory()
+        try:
+            deleted = await repository_outbox.purge_delivered(db, repository_outbox.utcnow() - self.retention)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        next_purge = time.monotonic()
+        while True:
+            try:
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + self.purge_interval
+                    await self.purge()
+                processed = await self.run_once()
+            except Exception as e:
+                print(f"outbox worker error: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+outbox_worker = OutboxWorker(
+    batch_size=settings.outbox_batch_size,
+    max_attempts=settings.outbox_max_attempts,
+    poll_interval=settings.outbox_poll_interval,
+    retention=settings.outbox_retention_days * 24 * 3600,
+)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(outbox_worker.run())
+    except KeyboardInterrupt:
+        pass
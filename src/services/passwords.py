@@ -0,0 +1,69 @@
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.repository import users as repository_users
+from src.services.worker_pool import WorkerPool
+
+hashing_pool = WorkerPool(max_workers=settings.hashing_workers, max_queue=settings.hashing_queue, name="hashing")
+
+class PasswordService:
+    """
+    The one place passwords are hashed and verified.
+
+    Signup, password reset and login all go through this service, which
+    runs bcrypt on the :data:`hashing_pool` and applies the configured
+    work factor. Hashes made with a different work factor are reported by
+    :meth:`needs_update` so they can be upgraded on the next login.
+
+    :param rounds: The bcrypt cost parameter (log2 of the iteration count).
+    :type rounds: int
+    :param pool: The pool running the hashing work.
+    :type pool: WorkerPool
+    """
+
+    def __init__(self, rounds: int = 12, pool: WorkerPool = hashing_pool):
+        self.rounds = rounds
+        self.pool = pool
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self.pool.run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.pool.run(self.context.verify, password, hashed_password)
+
+    def needs_update(self, hashed_password: str) -> bool:
+        return self.context.needs_update(hashed_password)
+
+    async def rehash(self, user_id: int, old_hash: str, password: str) -> None:
+        """
+        Stores a fresh hash of ``password`` for the user, meant to run as a
+        background task after a successful login. Nothing is stored if the
+        password was changed since ``old_hash`` was read.
+
+        :param user_id: The id of the user who just logged in.
+        :type user_id: int
+        :param old_hash: The hash the password was verified against.
+        :type old_hash: str
+        :param password: The verified plain password.
+        :type password: str
+        """
+        try:
+            password_hash = await self.hash(password)
+        except HTTPException:
+            # The pool is saturated; the hash is upgraded on a later login.
+            return
+        db = SessionLocal()
+        try:
+            await repository_users.update_password(user_id, old_hash, password_hash, db)
+        finally:
+            db.close()
+
+password_service = PasswordService(rounds=settings.bcrypt_rounds)
@@ -0,0 +1,307 @@
+from abc import ABC, abstractmethod
+from fastapi import Depends, HTTPException, Request, Response, status
+from math import ceil
+from redis.exceptions import RedisError
+from src.conf.config import settings
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.redis_manager import redis_manager
+from typing import Dict, Optional, Tuple
+import ipaddress
+import time
+
+FIXED_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local expire_time = ARGV[2]
+local cost = tonumber(ARGV[3])
+local current = tonumber(redis.call('get', key) or "0")
+if current > 0 then
+    if current + cost > limit then
+        return redis.call("PTTL", key)
+    else
+        redis.call("INCRBY", key, cost)
+        return 0
+    end
+else
+    redis.call("SET", key, cost, "px", expire_time)
+    return 0
+end
+"""
+
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = redis.call("TIME")
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local tat = tonumber(redis.call("GET", key) or now_ms)
+if tat < now_ms then
+    tat = now_ms
+end
+local new_tat = tat + emission * cost
+local allow_at = new_tat - tolerance
+if allow_at > now_ms then
+    return math.ceil(allow_at - now_ms)
+end
+redis.call("SET", key, new_tat, "PX", math.ceil(new_tat - now_ms))
+return 0
+"""
+
+class LimiterBackend(ABC):
+    """
+    Interface of a rate limiter storage backend.
+
+    :meth:`hit` spends ``cost`` units of the ``limit`` allowed per
+    ``period_ms`` for ``key`` and returns how many milliseconds the caller
+    has to wait, ``0`` meaning the request is allowed.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, period_ms: int, cost: int = 1) -> int:
+        ...
+
+class RedisFixedWindowBackend(LimiterBackend):
+    """
+    Fixed-window counter in Redis, the algorithm used by ``fastapi_limiter``.
+    Limits are shared by every worker.
+    """
+
+    name = "redis"
+
+    def __init__(self, manager=redis_manager):
+        self.manager = manager
+        self.script = manager.client.register_script(FIXED_WINDOW_SCRIPT)
+
+    async def hit(self, key: str, limit: int, period_ms: int, cost: int = 1) -> int:
+        return int(await self.script(keys=[key], args=[limit, period_ms, cost]))
+
+class RedisGCRABackend(LimiterBackend):
+    """
+    Generic cell rate algorithm in Redis: one key per client holding its
+    theoretical arrival time, checked and updated by a single script call,
+    so each check is one round trip with no race between workers.
+
+    Admits the same traffic as :class:`TokenBucketBackend` with a bucket of
+    ``limit`` units refilled over ``period_ms``.
+    """
+
+    name = "redis"
+
+    def __init__(self, manager=redis_manager):
+        self.manager = manager
+        self.script = manager.client.register_script(GCRA_SCRIPT)
+
+    async def hit(self, key: str, limit: int, period_ms: int, cost: int = 1) -> int:
+        emission = period_ms / limit
+        return int(await self.script(keys=[key], args=[emission, emission * limit, cost]))
+
+class TokenBucketBackend(LimiterBackend):
+    """
+    In-process token bucket, for single-node deployments or as the
+    fallback while Redis is unavailable.
+
+    Each key holds one immutable ``(tokens, updated_at, full_at)`` tuple
+    that is read and replaced without awaiting, so no lock is needed on
+    the event loop. Buckets that have refilled completely carry no state
+    worth keeping and are swept every ``cleanup_interval`` seconds.
+
+    :param cleanup_interval: Seconds between sweeps of idle buckets.
+    :type cleanup_interval: float
+    """
+
+    name = "memory"
+
+    def __init__(self, cleanup_interval: float = 60):
+        self.cleanup_interval = cleanup_interval
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._next_cleanup = time.monotonic() + cleanup_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def hit(self, key: str, limit: int, period_ms: int, cost: int = 1) -> int:
+        now = time.monotonic()
+        if now >= self._next_cleanup:
+            self.cleanup(now)
+        rate = limit / (period_ms / 1000)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(limit)
+        else:
+            tokens = min(float(limit), bucket[0] + (now - bucket[1]) * rate)
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0
+        else:
+            wait = ceil((cost - tokens) / rate * 1000)
+        self._buckets[key] = (tokens, now, now + (limit - tokens) / rate)
+        return wait
+
+    def cleanup(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+        self._next_cleanup = now + self.cleanup_interval
+
+class Limiter:
+    """
+    Picks the backend for every rate limit check and counts which one served it.
+
+    With ``mode="memory"`` only the in-process bucket is used. With
+    ``mode="redis"`` Redis is used while it is healthy and the in-process
+    bucket takes over, per worker, when it is not.
+
+    :param primary: The shared backend.
+    :type primary: LimiterBackend
+    :param fallback: The in-process backend.
+    :type fallback: LimiterBackend
+    :param mode: ``"redis"`` or ``"memory"``.
+    :type mode: str
+    """
+
+    def __init__(self, primary: LimiterBackend, fallback: LimiterBackend, mode: str = "redis"):
+        self.primary = primary
+        self.fallback = fallback
+        self.mode = mode
+        self.counts: Dict[str, int] = {primary.name: 0, fallback.name: 0}
+        self.errors = 0
+
+    @property
+    def active(self) -> LimiterBackend:
+        if self.mode == "memory" or not redis_manager.healthy:
+            return self.fallback
+        return self.primary
+
+    async def hit(self, key: str, limit: int, period_ms: int, cost: int = 1) -> int:
+        backend = self.active
+        if backend is self.primary:
+            try:
+                wait = await backend.hit(key, limit, period_ms, cost)
+                self.counts[backend.name] += 1
+                return wait
+            except RedisError as e:
+                self.errors += 1
+                print(f"rate limiter falling back to memory: {e}")
+                backend = self.fallback
+        self.counts[backend.name] += 1
+        return await backend.hit(key, limit, period_ms, cost)
+
+    def metrics(self) -> dict:
+        return {
+            "mode": self.mode,
+            "active": self.active.name,
+            "degraded": self.mode != "memory" and self.active is self.fallback,
+            "checks": dict(self.counts),
+            "errors": self.errors,
+            "memory_keys": len(self.fallback),
+        }
+
+limiter = Limiter(
+    primary=RedisFixedWindowBackend(),
+    fallback=TokenBucketBackend(),
+    mode=settings.rate_limit_backend,
+)
+
+user_limiter = Limiter(
+    primary=RedisGCRABackend(),
+    fallback=TokenBucketBackend(),
+    mode=settings.rate_limit_backend,
+)
+
+def parse_networks(value: str) -> Tuple:
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip())
+
+TRUSTED_PROXIES = parse_networks(settings.trusted_proxies)
+
+def _is_trusted(host: str, proxies) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in proxies)
+
+async def default_identifier(request: Request, trusted_proxies=TRUSTED_PROXIES) -> str:
+    """
+    Returns the address of the client behind ``request``.
+
+    ``X-Forwarded-For`` is set by the client as much as by proxies, so it is
+    only read when the connection comes from one of ``trusted_proxies``, and
+    then walked from the right, skipping trusted hops: the first address that
+    is not a trusted proxy is the one the nearest trusted proxy saw.
+
+    :param trusted_proxies: Networks of the reverse proxies in front of the app, ``TRUSTED_PROXIES`` setting.
+    :type trusted_proxies: tuple
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted(host, trusted_proxies):
+        return host
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+        host = hop
+        if not _is_trusted(hop, trusted_proxies):
+            break
+    return host
+
+class RateLimiter:
+    """
+    Route dependency allowing ``times`` requests per ``seconds`` per client.
+
+    Drop-in replacement for ``fastapi_limiter.depends.RateLimiter`` that
+    checks limits through :data:`limiter`, so routes keep working while
+    Redis is down.
+    """
+
+    def __init__(self, times: int = 1, seconds: int = 0, milliseconds: int = 0, minutes: int = 0):
+        self.times = times
+        self.milliseconds = milliseconds + 1000 * seconds + 60000 * minutes
+        self.prefix = "ratelimit"
+
+    async def __call__(self, request: Request, response: Response):
+        route = request.scope.get("route")
+        path = route.path if route is not None else request.url.path
+        key = f"{self.prefix}:{await default_identifier(request)}:{request.method}:{path}"
+        wait = await limiter.hit(key, self.times, self.milliseconds)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(ceil(wait / 1000))},
+            )
+
+def get_tier(user: User) -> dict:
+    """
+    Returns the ``{"limit": ..., "period": ...}`` budget of the user's rate limit tier.
+    """
+    tiers = settings.rate_limit_tiers
+    return tiers.get(getattr(user, "rate_limit_tier", None) or "standard", tiers["standard"])
+
+class UserRateLimiter:
+    """
+    Route dependency charging ``cost`` units to the authenticated user's budget.
+
+    Every route shares one budget per user, sized by the user's tier, so
+    expensive routes are given a higher ``cost`` than cheap ones and the
+    limit tracks the backend work a user causes rather than request count.
+
+    :param cost: The units one request to the route consumes.
+    :type cost: int
+    """
+
+    def __init__(self, cost: int = 1):
+        self.cost = cost
+
+    async def __call__(self, current_user: User = Depends(auth_service.get_current_user)):
+        tier = get_tier(current_user)
+        wait = await user_limiter.hit(
+            f"ratelimit:user:{current_user.id}", tier["limit"], tier["period"] * 1000, self.cost
+        )
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(ceil(wait / 1000))},
+            )
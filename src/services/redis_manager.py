@@ -0,0 +1,141 @@
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import RedisError
+from src.conf.config import settings
+from typing import Awaitable, Callable, List, Optional
+import asyncio
+import random
+import redis.asyncio as redis
+
+class RedisManager:
+    """
+    Owns the one pooled async Redis client shared by the whole application.
+
+    The rate limiter, the auth cache and any other cache take their client
+    from here instead of opening their own connections. The application
+    lifespan calls :meth:`connect` on startup and :meth:`close` on shutdown;
+    in between a background task pings the server and reconnects with
+    exponential backoff when it goes away, while :attr:`healthy` lets
+    callers skip Redis instead of piling up connection attempts.
+
+    :param host: The Redis host.
+    :type host: str
+    :param port: The Redis port.
+    :type port: int
+    :param max_connections: The size of the connection pool.
+    :type max_connections: int
+    :param health_check_interval: Seconds between background pings.
+    :type health_check_interval: float
+    """
+
+    def __init__(self, host: str, port: int, db: int = 0, max_connections: int = 50,
+                 health_check_interval: float = 15, max_backoff: float = 30):
+        self.pool = redis.ConnectionPool(
+            host=host,
+            port=port,
+            db=db,
+            max_connections=max_connections,
+            health_check_interval=health_check_interval,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            retry_on_timeout=True,
+        )
+        self.client = redis.Redis(
+            connection_pool=self.pool,
+            retry=Retry(ExponentialBackoff(cap=1, base=0.05), 2),
+        )
+        self.health_check_interval = health_check_interval
+        self.max_backoff = max_backoff
+        self.healthy = False
+        self.restore_hooks: List[Callable[[], Awaitable[None]]] = []
+        self._monitor: Optional[asyncio.Task] = None
+
+    def on_restore(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """
+        Registers ``hook`` to run every time the connection comes back after an outage.
+        """
+        self.restore_hooks.append(hook)
+
+    async def ping(self) -> bool:
+        """
+        Pings the server and records the outcome in :attr:`healthy`.
+        """
+        try:
+            self.healthy = bool(await self.client.ping())
+        except (RedisError, OSError):
+            self.healthy = False
+        return self.healthy
+
+    async def connect(self, attempts: int = 5) -> bool:
+        """
+        Connects with exponential backoff and starts the health monitor.
+
+        Startup does not fail when Redis is down: the monitor keeps
+        reconnecting in the background and features relying on Redis
+        degrade until it is back.
+
+        :param attempts: Connection attempts before giving up for now.
+        :type attempts: int
+        :return: Whether Redis is reachable.
+        :rtype: bool
+        """
+        await self._reconnect(attempts)
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._watch())
+        return self.healthy
+
+    async def _reconnect(self, attempts: Optional[int] = None) -> bool:
+        attempt = 0
+        while not await self.ping():
+            attempt += 1
+            if attempts is not None and attempt >= attempts:
+                break
+            await self.pool.disconnect(inuse_connections=False)
+            delay = min(self.max_backoff, 0.5 * 2 ** attempt)
+            await asyncio.sleep(delay / 2 + random.uniform(0, delay / 2))
+        return self.healthy
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            was_healthy = self.healthy
+            if not await self.ping():
+                print("Redis unavailable, reconnecting")
+                await self._reconnect()
+                print("Redis connection restored")
+            elif was_healthy:
+                continue
+            await self._restored()
+
+    async def _restored(self) -> None:
+        for hook in self.restore_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                print(f"Redis restore hook failed: {e}")
+
+    async def close(self) -> None:
+        """
+        Stops the health monitor and closes every pooled connection.
+        """
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+        await self.client.aclose()
+        await self.pool.aclose()
+        self.healthy = False
+
+if settings.app_location == 'LOCAL':
+    redis_host = settings.redis_local_host
+else:
+    redis_host = settings.redis_host
+
+redis_manager = RedisManager(
+    host=redis_host,
+    port=settings.redis_port,
+    max_connections=settings.redis_max_connections,
+)
@@ -0,0 +1,48 @@
+from jinja2 import Environment, FileSystemLoader, Template
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+TEMPLATE_FOLDER = Path(__file__).parent / 'templates'
+
+class TemplateRenderer:
+    """
+    Compiles every template in ``folder`` once and renders from memory.
+
+    ``FastMail.send_message`` built a new Jinja environment for every
+    message, so each send read, parsed and compiled the template again.
+    Here the templates are compiled when the renderer is created; their
+    static markup becomes constants of the compiled code, and with
+    ``auto_reload`` off no render touches the file system. Edited
+    templates are picked up by :meth:`reload` or a restart.
+
+    :param folder: The directory holding the templates.
+    :type folder: Path
+    """
+
+    def __init__(self, folder: Path = TEMPLATE_FOLDER):
+        self.environment = Environment(loader=FileSystemLoader(folder), auto_reload=False)
+        self.templates: Dict[str, Template] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        self.environment.cache.clear()
+        self.templates = {name: self.environment.get_template(name) for name in self.environment.list_templates()}
+
+    def get(self, name: str) -> Template:
+        return self.templates.get(name) or self.environment.get_template(name)
+
+    def render(self, name: str, **context) -> str:
+        return self.get(name).render(**context)
+
+    def render_batch(self, name: str, contexts: Iterable[dict]) -> List[str]:
+        """
+        Renders ``name`` once per context, for bulk sends. The template is
+        looked up once and each render goes straight to its compiled code.
+        """
+        template = self.get(name)
+        concat = self.environment.concat
+        render = template.root_render_func
+        new_context = template.new_context
+        return [concat(render(new_context(context))) for context in contexts]
+
+renderer = TemplateRenderer()
@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+from src.services.redis_manager import redis_manager
+from typing import Optional
+import asyncio
+import uuid
+
+class ResetTokenStore:
+    """
+    Password reset tokens kept in Redis as ``reset:{token}`` -> user id.
+
+    Looking a token up is a single GET instead of a scan of the unindexed
+    ``users.reset_token`` column, and Redis expires tokens by itself, so
+    nothing is left behind to clean up. Setting the new password consumes
+    the token with GETDEL, so a token can be used only once.
+
+    :param ttl: Seconds a reset token stays valid.
+    :type ttl: int
+    """
+
+    def __init__(self, manager=redis_manager, ttl: int = 3600):
+        self.manager = manager
+        self.ttl = ttl
+
+    @property
+    def available(self) -> bool:
+        return self.manager.healthy
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return f"reset:{token}"
+
+    async def issue(self, user_id: int) -> str:
+        token = str(uuid.uuid4())
+        await self.manager.client.set(self._key(token), user_id, ex=self.ttl)
+        return token
+
+    async def peek(self, token: str) -> Optional[int]:
+        """
+        Returns the id of the user ``token`` belongs to, or None if it is unknown or expired.
+        """
+        user_id = await self.manager.client.get(self._key(token))
+        return int(user_id) if user_id is not None else None
+
+    async def consume(self, token: str) -> Optional[int]:
+        """
+        Like :meth:`peek`, but also invalidates the token.
+        """
+        user_id = await self.manager.client.getdel(self._key(token))
+        return int(user_id) if user_id is not None else None
+
+    async def import_token(self, token: str, user_id: int, expires_at: Optional[datetime]) -> bool:
+        """
+        Copies a token issued into the database over to Redis, keeping its
+        remaining lifetime. Expired tokens are skipped.
+
+        :return: True if the token was copied.
+        :rtype: bool
+        """
+        ttl = self.ttl
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            ttl = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+        if ttl <= 0:
+            return False
+        await self.manager.client.set(self._key(token), user_id, ex=ttl)
+        return True
+
+reset_tokens = ResetTokenStore()
+
+async def migrate_reset_tokens() -> None:
+    """
+    One-time move of the reset tokens still stored in ``users`` to Redis.
+    Live tokens are copied with their remaining lifetime, and the columns
+    are cleared for every row, expired or not.
+    """
+    from src.database.db import SessionLocal
+    from src.repository import users as repository_users
+
+    await redis_manager.connect()
+    if not redis_manager.healthy:
+        print("Redis is unavailable, nothing migrated")
+        return
+    db = SessionLocal()
+    moved = dropped = 0
+    try:
+        for user in await repository_users.get_users_with_reset_token(db):
+            if await reset_tokens.import_token(user.reset_token, user.id, user.reset_token_expired):
+                moved += 1
+            else:
+                dropped += 1
+            user.reset_token = None
+            user.reset_token_expired = None
+        db.commit()
+    finally:
+        db.close()
+        await redis_manager.close()
+    print(f"reset tokens moved to Redis: {moved}, expired and dropped: {dropped}")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_reset_tokens())
@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from redis.exceptions import RedisError
+from src.conf.config import settings
+from src.services.bloom import BloomFilter
+from src.services.redis_manager import redis_manager
+from typing import Optional
+import asyncio
+import time
+
+CHANNEL = "revoked_tokens"
+
+class RevocationList:
+    """
+    Revoked access tokens, checked without a Redis round trip for tokens that were never revoked.
+
+    A revoked ``jti`` is stored as ``revoked:{jti}`` until the token would
+    have expired anyway and is published on :data:`CHANNEL`. Every worker
+    keeps the revoked ids in an in-memory :class:`BloomFilter` fed by that
+    channel, so :meth:`is_revoked` only asks Redis when the filter reports
+    a possible match. The filter is rebuilt from Redis after every
+    (re)subscription, so no revocation published while disconnected is
+    missed, and every ``reload_interval`` seconds to drop expired ids.
+
+    While Redis is unavailable, filter matches are treated as revoked.
+
+    :param capacity: The expected number of live revoked tokens.
+    :type capacity: int
+    :param reload_interval: Seconds between rebuilds of the filter.
+    :type reload_interval: float
+    """
+
+    def __init__(self, manager=redis_manager, capacity: int = 100_000,
+                 error_rate: float = 0.001, reload_interval: float = 3600):
+        self.manager = manager
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.reload_interval = reload_interval
+        self.filter = BloomFilter(capacity, error_rate)
+        self.checks = 0
+        self.filter_hits = 0
+        self.restarts = 0
+        self.task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(jti: str) -> str:
+        return f"revoked:{jti}"
+
+    async def revoke(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """
+        Revokes the token ``jti`` until its ``exp`` (a UNIX timestamp).
+
+        :raises RedisError: If the revocation could not be stored.
+        """
+        ttl = settings.revocation_default_ttl
+        if expires_at is not None:
+            ttl = int(expires_at - datetime.now(timezone.utc).timestamp()) + 1
+        if ttl <= 0:
+            return
+        pipe = self.manager.client.pipeline(transaction=True)
+        pipe.set(self._key(jti), 1, ex=ttl)
+        pipe.publish(CHANNEL, jti)
+        await pipe.execute()
+        self.filter.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if jti not in self.filter:
+            return False
+        self.filter_hits += 1
+        if not self.manager.healthy:
+            return True
+        try:
+            return await self.manager.client.exists(self._key(jti)) > 0
+        except RedisError as e:
+            print(f"revocation check failed: {e}")
+            return True
+
+    async def reload(self) -> None:
+        """
+        Rebuilds the filter from the ``revoked:*`` keys still in Redis.
+        """
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        async for key in self.manager.client.scan_iter(match=self._key("*"), count=1000):
+            fresh.add(key.decode().split(":", 1)[1])
+        self.filter = fresh
+
+    async def _listen(self) -> None:
+        while True:
+            if not self.manager.healthy:
+                await asyncio.sleep(1)
+                continue
+            pubsub = self.manager.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Subscribe before reloading, revocations published meanwhile wait in the subscription.
+                await pubsub.subscribe(CHANNEL)
+                await self.reload()
+                next_reload = time.monotonic() + self.reload_interval
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.filter.add(message["data"].decode())
+                    if time.monotonic() >= next_reload:
+                        await self.reload()
+                        next_reload = time.monotonic() + self.reload_interval
+            except RedisError as e:
+                print(f"revocation listener disconnected: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def _run(self) -> None:
+        """
+        Keeps :meth:`_listen` running: an unexpected error restarts it
+        instead of leaving the worker blind to revocations from other workers.
+        """
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.restarts += 1
+                print(f"revocation listener crashed, restarting: {e!r}")
+                await asyncio.sleep(1)
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def metrics(self) -> dict:
+        return {
+            "listening": self.task is not None and not self.task.done(),
+            "filtered": self.filter.count,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "restarts": self.restarts,
+        }
+
+revocations = RevocationList(
+    capacity=settings.revocation_filter_capacity,
+    reload_interval=settings.revocation_reload_interval,
+)
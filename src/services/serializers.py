@@ -0,0 +1,34 @@
+from operator import attrgetter
+from pydantic import BaseModel
+from src.schemas import ContactResponse
+from typing import Iterable, List, Optional, Sequence, Type
+
+class RowSerializer:
+    """
+    Turns ORM objects or result rows into JSON-ready dicts with the fields of ``model``.
+
+    Rows read from the database already satisfy the response model, so,
+    unlike FastAPI's ``response_model`` handling, nothing is validated
+    again: the fields of a row are read with one ``attrgetter`` call and
+    the dicts are rendered by ``ORJSONResponse``, which encodes dates itself.
+
+    :param model: The response model the dicts conform to.
+    :type model: Type[BaseModel]
+    :param fields: The fields to include, all fields of ``model`` by default.
+    :type fields: Sequence[str] | None
+    """
+
+    def __init__(self, model: Type[BaseModel], fields: Optional[Sequence[str]] = None):
+        self.model = model
+        self.fields = tuple(fields or model.model_fields)
+        getter = attrgetter(*self.fields)
+        self.getter = getter if len(self.fields) > 1 else lambda row: (getter(row),)
+
+    def to_dict(self, row) -> dict:
+        return dict(zip(self.fields, self.getter(row)))
+
+    def to_dicts(self, rows: Iterable) -> List[dict]:
+        fields, getter = self.fields, self.getter
+        return [dict(zip(fields, getter(row))) for row in rows]
+
+contact_serializer = RowSerializer(ContactResponse)
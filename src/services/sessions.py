@@ -0,0 +1,156 @@
+from src.services.redis_manager import redis_manager
+from typing import List, Optional
+import uuid
+
+ROTATE_SCRIPT = """
+local family = redis.call("HGET", KEYS[1], "family")
+if not family then
+    local used_family = redis.call("GET", KEYS[4])
+    if used_family then
+        return {"reused", used_family}
+    end
+    return {"missing", ""}
+end
+if redis.call("HGET", KEYS[1], "email") ~= ARGV[1] then
+    return {"missing", ""}
+end
+local device = redis.call("HGET", KEYS[1], "device") or ""
+redis.call("DEL", KEYS[1])
+redis.call("SREM", KEYS[3], ARGV[3])
+redis.call("SET", KEYS[4], family, "EX", ARGV[4])
+redis.call("HSET", KEYS[2], "email", ARGV[1], "family", family, "device", device)
+redis.call("EXPIRE", KEYS[2], ARGV[4])
+redis.call("SADD", KEYS[3], ARGV[2])
+redis.call("EXPIRE", KEYS[3], ARGV[4])
+return {"ok", family}
+"""
+
+REVOKE_FAMILY_SCRIPT = """
+local revoked = 0
+for _, jti in ipairs(redis.call("SMEMBERS", KEYS[1])) do
+    local key = ARGV[2] .. jti
+    local family = redis.call("HGET", key, "family")
+    if not family or family == ARGV[1] then
+        redis.call("DEL", key)
+        redis.call("SREM", KEYS[1], jti)
+        revoked = revoked + 1
+    end
+end
+return revoked
+"""
+
+class RefreshTokenReused(Exception):
+    """
+    Raised when an already rotated refresh token is presented again.
+    """
+
+class SessionStore:
+    """
+    Refresh-token sessions kept in Redis instead of ``users.refresh_token``.
+
+    Every login starts a session identified by the refresh token's ``jti``,
+    so a user can be logged in on several devices at once. Refreshing
+    rotates the session atomically in one script call: the old ``jti`` is
+    retired and a new one issued in the same family. Presenting a retired
+    ``jti`` again means the token was stolen or replayed, and the whole
+    family is revoked. Sessions expire with their refresh tokens.
+
+    :param ttl: Session lifetime in seconds.
+    :type ttl: int
+    """
+
+    def __init__(self, manager=redis_manager, ttl: int = 7 * 24 * 3600):
+        self.manager = manager
+        self.ttl = ttl
+        self.rotate_script = manager.client.register_script(ROTATE_SCRIPT)
+        self.revoke_family_script = manager.client.register_script(REVOKE_FAMILY_SCRIPT)
+
+    @property
+    def available(self) -> bool:
+        return self.manager.healthy
+
+    @staticmethod
+    def _session_key(jti: str) -> str:
+        return f"session:{jti}"
+
+    @staticmethod
+    def _user_key(email: str) -> str:
+        return f"user_sessions:{email}"
+
+    async def create(self, email: str, device: Optional[str] = None) -> str:
+        """
+        Starts a new session for ``email`` and returns its ``jti``.
+        """
+        jti = uuid.uuid4().hex
+        pipe = self.manager.client.pipeline(transaction=True)
+        pipe.hset(self._session_key(jti), mapping={"email": email, "family": jti, "device": device or ""})
+        pipe.expire(self._session_key(jti), self.ttl)
+        pipe.sadd(self._user_key(email), jti)
+        pipe.expire(self._user_key(email), self.ttl)
+        await pipe.execute()
+        return jti
+
+    async def rotate(self, jti: str, email: str) -> Optional[str]:
+        """
+        Retires session ``jti`` and returns the ``jti`` of its successor.
+
+        :return: The new ``jti``, or None if no such session exists.
+        :rtype: str | None
+        :raises RefreshTokenReused: If ``jti`` was already rotated; its family is revoked.
+        """
+        new_jti = uuid.uuid4().hex
+        status, family = await self.rotate_script(
+            keys=[self._session_key(jti), self._session_key(new_jti), self._user_key(email), f"session_used:{jti}"],
+            args=[email, new_jti, jti, self.ttl],
+        )
+        status = status.decode() if isinstance(status, bytes) else status
+        if status == "reused":
+            family = family.decode() if isinstance(family, bytes) else family
+            await self.revoke_family(email, family)
+            raise RefreshTokenReused(jti)
+        if status != "ok":
+            return None
+        return new_jti
+
+    async def revoke_family(self, email: str, family: str) -> int:
+        return int(await self.revoke_family_script(
+            keys=[self._user_key(email)], args=[family, self._session_key("")]
+        ))
+
+    async def revoke(self, jti: str, email: str) -> None:
+        """
+        Ends the session ``jti`` of ``email``, e.g. on logout.
+        """
+        pipe = self.manager.client.pipeline(transaction=True)
+        pipe.delete(self._session_key(jti))
+        pipe.srem(self._user_key(email), jti)
+        await pipe.execute()
+
+    async def revoke_all(self, email: str) -> int:
+        """
+        Ends every session of ``email``, e.g. after a password change.
+        """
+        jtis = await self.manager.client.smembers(self._user_key(email))
+        if not jtis:
+            return 0
+        keys = [self._session_key(jti.decode() if isinstance(jti, bytes) else jti) for jti in jtis]
+        await self.manager.client.delete(*keys, self._user_key(email))
+        return len(keys)
+
+    async def sessions(self, email: str) -> List[dict]:
+        """
+        Lists the live sessions (devices) of ``email``.
+        """
+        jtis = await self.manager.client.smembers(self._user_key(email))
+        pipe = self.manager.client.pipeline(transaction=False)
+        jtis = [jti.decode() if isinstance(jti, bytes) else jti for jti in jtis]
+        for jti in jtis:
+            pipe.hgetall(self._session_key(jti))
+        result = []
+        for jti, data in zip(jtis, await pipe.execute()):
+            if data:
+                data = {k.decode(): v.decode() for k, v in data.items()}
+                result.append({"jti": jti, "device": data.get("device") or None})
+        return result
+
+session_store = SessionStore()
@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import math
+import random
+
+class SingleFlight:
+    """
+    Coalesces concurrent loads of the same key into one call.
+
+    The first caller for a key starts the loader; callers arriving while it
+    is in flight await the same result instead of starting their own. The
+    loader runs as its own task, so a cancelled caller does not cancel the
+    load for everyone else.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the result of ``loader()``, sharing one in-flight call per ``key``.
+
+        :param key: The key identifying the value being loaded.
+        :type key: Hashable
+        :param loader: A coroutine function producing the value.
+        :type loader: Callable[[], Awaitable[Any]]
+        :return: The loaded value.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+def should_refresh_early(ttl_remaining: float, delta: float, beta: float = 1.0) -> bool:
+    """
+    Decides whether a still-valid cache entry should be recomputed now.
+
+    Implements probabilistic early expiration ("XFetch"): the closer the
+    entry is to expiry relative to the time ``delta`` it takes to recompute,
+    the more likely a single reader refreshes it, so hot keys are rebuilt
+    before they expire instead of by every reader at once afterwards.
+
+    :param ttl_remaining: Seconds until the entry expires.
+    :type ttl_remaining: float
+    :param delta: Seconds it takes to recompute the entry.
+    :type delta: float
+    :param beta: Values above 1 favour earlier refreshes; 0 disables them.
+    :type beta: float
+    :rtype: bool
+    """
+    if beta <= 0 or delta <= 0 or ttl_remaining is None or ttl_remaining < 0:
+        return False
+    return -delta * beta * math.log(1.0 - random.random()) >= ttl_remaining
@@ -0,0 +1,143 @@
+from email.message import EmailMessage
+from fastapi_mail.errors import ConnectionErrors
+from typing import List, Optional
+import aiosmtplib
+import asyncio
+import time
+
+class PooledConnection:
+    """
+    An open SMTP session and how much it has been used.
+    """
+
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+class SMTPPool:
+    """
+    Keeps authenticated SMTP sessions open and reuses them across messages.
+
+    Sending through a fresh connection pays for the TCP and TLS handshakes
+    and the login on every message. The pool opens at most ``size``
+    sessions and hands idle ones to the next sender. A session idle for
+    more than ``keepalive`` seconds is probed with NOOP before reuse, one
+    idle for more than ``idle_timeout`` seconds is closed, and one that has
+    sent ``max_messages`` messages is retired, since many servers cap
+    messages per session. A send that fails because the session dropped is
+    retried once on a new session.
+
+    :param size: The maximum number of open sessions.
+    :type size: int
+    :param max_messages: Messages sent before a session is replaced.
+    :type max_messages: int
+    """
+
+    def __init__(self, hostname: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = False, start_tls: bool = False, validate_certs: bool = True,
+                 size: int = 4, max_messages: int = 100, keepalive: float = 30, idle_timeout: float = 120,
+                 timeout: float = 60):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.validate_certs = validate_certs
+        self.size = size
+        self.max_messages = max_messages
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.idle: List[PooledConnection] = []
+        self.slots = asyncio.Semaphore(size)
+        self.opened = 0
+        self.sent = 0
+        self.reconnects = 0
+
+    async def _open(self) -> PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        if self.username:
+            await smtp.login(self.username, self.password)
+        self.opened += 1
+        return PooledConnection(smtp)
+
+    @staticmethod
+    async def _discard(connection: PooledConnection) -> None:
+        try:
+            await connection.smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+    async def _acquire(self) -> PooledConnection:
+        while self.idle:
+            connection = self.idle.pop()
+            idle_for = time.monotonic() - connection.last_used
+            if not connection.smtp.is_connected or idle_for > self.idle_timeout:
+                await self._discard(connection)
+                continue
+            if idle_for > self.keepalive:
+                try:
+                    await connection.smtp.noop()
+                except aiosmtplib.SMTPException:
+                    connection.smtp.close()
+                    continue
+            return connection
+        return await self._open()
+
+    async def _release(self, connection: PooledConnection) -> None:
+        if connection.sent >= self.max_messages:
+            await self._discard(connection)
+        else:
+            connection.last_used = time.monotonic()
+            self.idle.append(connection)
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Sends ``message`` over a pooled session, waiting for one if all are busy.
+
+        :raises ConnectionErrors: If the server cannot be reached or refuses the message.
+        """
+        async with self.slots:
+            for attempt in range(2):
+                connection = None
+                try:
+                    connection = await self._acquire()
+                    await connection.smtp.send_message(message)
+                except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError) as error:
+                    if connection is not None:
+                        connection.smtp.close()
+                    if attempt:
+                        raise ConnectionErrors(f"Exception raised {error}, check your email service")
+                    self.reconnects += 1
+                    continue
+                except aiosmtplib.SMTPException as error:
+                    if connection is not None:
+                        await self._release(connection)
+                    raise ConnectionErrors(f"Exception raised {error}, check your email service")
+                connection.sent += 1
+                self.sent += 1
+                await self._release(connection)
+                return
+
+    async def close(self) -> None:
+        idle, self.idle = self.idle, []
+        for connection in idle:
+            await self._discard(connection)
+
+    def metrics(self) -> dict:
+        return {
+            "idle": len(self.idle),
+            "opened": self.opened,
+            "sent": self.sent,
+            "reconnects": self.reconnects,
+        }
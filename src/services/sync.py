@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.database.models import User, utcnow
+from src.repository import contacts as repository_contacts
+from src.services.serializers import contact_serializer
+from typing import Optional, Tuple
+import asyncio
+import base64
+import binascii
+import json
+
+Cursor = Tuple[datetime, int]
+
+BEGINNING: Cursor = (datetime(1970, 1, 1), 0)
+
+def encode_token(changes: Cursor, deletes: Cursor) -> str:
+    data = [[changes[0].isoformat(), changes[1]], [deletes[0].isoformat(), deletes[1]]]
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_token(token: str) -> Tuple[Cursor, Cursor]:
+    """
+    :raises HTTPException: 400 if ``token`` was not issued by :func:`encode_token`.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        (changed_at, changed_id), (deleted_at, deleted_id) = data
+        return (
+            (datetime.fromisoformat(changed_at), int(changed_id)),
+            (datetime.fromisoformat(deleted_at), int(deleted_id)),
+        )
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+
+class ContactSync:
+    """
+    Answers "what changed since my last sync" for a user's contacts.
+
+    Created and updated contacts are read by ``(updated_at, id)`` and
+    deleted ones from their tombstones by ``(deleted_at, id)``, both as
+    index range scans, so the cost follows the number of changes rather
+    than the size of the address book. The sync token holds the position
+    reached in both.
+
+    A transaction can commit after a later one, with an earlier timestamp.
+    Once a client has caught up, its token is therefore moved back to
+    ``overlap`` seconds before the current time, and changes from that
+    window are sent again on the next sync; clients apply changes by id,
+    so repeats are harmless.
+
+    Tombstones are deleted once they are older than ``retention`` seconds,
+    every ``purge_interval`` seconds. A token whose deletes position is
+    older than that may have missed purged deletes and is refused with
+    410, telling the client to start over with a full sync.
+
+    :param overlap: Seconds of changes repeated to cover late commits.
+    :type overlap: float
+    :param retention: Seconds tombstones are kept.
+    :type retention: float
+    :param purge_interval: Seconds between purges of old tombstones.
+    :type purge_interval: float
+    """
+
+    def __init__(self, overlap: float = 5, retention: float = 30 * 24 * 3600, session_factory=SessionLocal,
+                 purge_interval: float = 3600):
+        self.overlap = timedelta(seconds=overlap)
+        self.retention = timedelta(seconds=retention)
+        self.session_factory = session_factory
+        self.purge_interval = purge_interval
+        self.task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _advance(rows: list, limit: int, key, caught_up: Cursor) -> Tuple[list, Cursor, bool]:
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, key(rows[-1]), True
+        return rows, caught_up, False
+
+    async def changes(self, since: Optional[str], limit: int, user: User, db: Session) -> dict:
+        """
+        Returns the changes after the token ``since``, or all contacts when it is empty.
+
+        :return: ``changed`` contacts, ``deleted`` contact ids, the ``next`` token
+            and whether there are more changes to fetch right away (``has_more``).
+        :rtype: dict
+        """
+        caught_up = (utcnow() - self.overlap, 0)
+        if since:
+            changes_after, deletes_after = decode_token(since)
+            if deletes_after[0] < utcnow() - self.retention:
+                raise HTTPException(status_code=status.HTTP_410_GONE, detail="Full resync required")
+        else:
+            # A first sync downloads every contact, so earlier deletes do not matter.
+            changes_after, deletes_after = BEGINNING, caught_up
+        changed = await repository_contacts.get_changed_contacts(changes_after, limit + 1, user, db)
+        deleted = await repository_contacts.get_tombstones(deletes_after, limit + 1, user, db)
+        changed, changes_next, more_changes = self._advance(
+            changed, limit, lambda contact: (contact.updated_at, contact.id), caught_up
+        )
+        deleted, deletes_next, more_deletes = self._advance(
+            deleted, limit, lambda tombstone: (tombstone.deleted_at, tombstone.id), caught_up
+        )
+        return {
+            "changed": contact_serializer.to_dicts(changed),
+            "deleted": [tombstone.contact_id for tombstone in deleted],
+            "next": encode_token(changes_next, deletes_next),
+            "has_more": more_changes or more_deletes,
+        }
+
+    async def purge(self) -> int:
+        """
+        Deletes the tombstones older than the retention period and returns how many.
+        """
+        db = self.session_factory()
+        try:
+            deleted = await repository_contacts.purge_tombstones(db, utcnow() - self.retention)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    async def _run_purges(self) -> None:
+        while True:
+            try:
+                await self.purge()
+            except Exception as e:
+                print(f"tombstone purge error: {e}")
+            await asyncio.sleep(self.purge_interval)
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run_purges())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+contact_sync = ContactSync(
+    overlap=settings.sync_overlap,
+    retention=settings.sync_tombstone_retention_days * 24 * 3600,
+)
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Any, Callable
+import asyncio
+
+class WorkerPool:
+    """
+    Runs CPU-bound work off the event loop on a bounded set of threads.
+
+    Used for work that releases the GIL, such as bcrypt hashing and Pillow
+    image resizing, so threads give real parallelism without blocking
+    request handling. At most ``max_workers`` calls run at once and at most
+    ``max_queue`` more wait for a thread; anything beyond that is rejected
+    right away with a 503 instead of queueing behind a burst.
+
+    :param max_workers: The number of worker threads.
+    :type max_workers: int
+    :param max_queue: How many calls may wait for a free thread.
+    :type max_queue: int
+    :param name: Prefix of the thread names.
+    :type name: str
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, name: str = "worker"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs ``fn(*args)`` on the pool and returns its result.
+
+        :raises HTTPException: 503 when the pool and its queue are full.
+        """
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "running": min(self.pending, self.max_workers),
+            "queued": max(self.pending - self.max_workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
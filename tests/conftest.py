@@ -4,8 +4,9 @@ import warnings
 from fastapi.testclient import TestClient
 from main import app
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.database.models import Base
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached, sessionmaker
+from src.database.models import Base, User
 from src.database.db import get_db
 from src.services.auth import auth_service
 
@@ -52,6 +53,15 @@ test_user = {"username": "neo", "email": "neo@example.com", "password": "1234567
 def user():
     return {"username": "deadpool", "email": "deadpool@example.com", "password": "123456789"}
 
+@pytest.fixture
+def cached_user():
+    """Fixture to build users as the user cache holds them: detached, with every column loaded."""
+    def make(**fields):
+        user = User(**{**{column.key: None for column in inspect(User).column_attrs}, **fields})
+        make_transient_to_detached(user)
+        return user
+    return make
+
 @pytest.fixture
 def mock_contact():
     """Fixture to provide a mock contact dictionary."""
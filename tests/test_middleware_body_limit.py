@@ -0,0 +1,47 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from src.middleware.body_limit import BodySizeLimitMiddleware
+from unittest.mock import AsyncMock
+import pytest
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.state.uploaded = AsyncMock()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File()):
+        await app.state.uploaded(await file.read())
+        return {"size": file.size}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File()):
+        return {"size": file.size}
+
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/upload": 1024})
+    return app
+
+def test_body_within_limit_passes(app):
+    response = TestClient(app).post("/upload", files={"file": ("a.png", b"x" * 100)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+def test_content_length_over_limit_rejected_before_parsing(app):
+    response = TestClient(app).post("/upload", files={"file": ("a.png", b"x" * 2048)})
+    assert response.status_code == 413
+    app.state.uploaded.assert_not_awaited()
+
+def test_streamed_body_over_limit_rejected(app):
+    def body():
+        for _ in range(8):
+            yield b"x" * 512
+
+    response = TestClient(app).post(
+        "/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+    assert response.status_code == 413
+    app.state.uploaded.assert_not_awaited()
+
+def test_other_paths_not_limited(app):
+    response = TestClient(app).post("/other", files={"file": ("a.png", b"x" * 2048)})
+    assert response.status_code == 200
@@ -0,0 +1,76 @@
+from src.middleware.compression import CompressionMiddleware, GzipCompressor, choose_encoding
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+import gzip
+import pytest
+import zlib
+
+BIG = "contact " * 200
+
+async def big(request):
+    return PlainTextResponse(BIG, headers={"ETag": '"abc"'})
+
+async def small(request):
+    return JSONResponse({"ok": True})
+
+async def image(request):
+    return Response(b"\x89PNG" + b"\0" * 2000, media_type="image/png")
+
+async def events(request):
+    async def stream():
+        yield "data: " + BIG + "\n\n"
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+async def chunks(request):
+    async def stream():
+        for n in range(5):
+            yield BIG + str(n)
+    return StreamingResponse(stream(), media_type="text/plain")
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[Route(f"/{endpoint.__name__}", endpoint) for endpoint in (big, small, image, events, chunks)])
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+def test_choose_encoding():
+    available = ["br", "zstd", "gzip"]
+    assert choose_encoding("gzip, deflate, br", available) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert choose_encoding("br;q=0, *", available) == "zstd"
+    assert choose_encoding("identity", available) is None
+    assert choose_encoding("", available) is None
+
+def test_compresses_large_responses(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert int(response.headers["content-length"]) < len(BIG)
+    assert response.text == BIG
+
+def test_skips_small_and_incompressible_responses(client):
+    for path in ("/small", "/image", "/events"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+def test_honors_accept_encoding(client):
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"}).headers
+
+def test_compresses_streams_incrementally(client):
+    with client.stream("GET", "/chunks", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw).decode() == "".join(BIG + str(n) for n in range(5))
+
+def test_flushed_chunks_decode_before_the_stream_ends():
+    compressor = GzipCompressor(6)
+    first = compressor.compress(b"hello ") + compressor.flush()
+    assert zlib.decompressobj(31).decompress(first) == b"hello "
+    rest = compressor.compress(b"world") + compressor.finish()
+    assert gzip.decompress(first + rest) == b"hello world"
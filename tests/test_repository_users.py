@@ -85,4 +85,14 @@ async def test_update_avatar(mock_db):
 
     assert updated_user.avatar == "http://example.com/new_avatar.jpg"
     mock_db.commit.assert_called_once()
-    
\ No newline at end of file
+    
+@pytest.mark.asyncio
+async def test_update_password_only_replaces_the_old_hash(mock_db):
+    query = mock_db.query.return_value.filter.return_value
+    query.update.return_value = 0
+
+    assert not await users.update_password(1, "old-hash", "new-hash", mock_db)
+    query.update.assert_called_once_with(
+        {User.password: "new-hash", User.hashed_password: "new-hash"}, synchronize_session=False
+    )
+    mock_db.commit.assert_called_once()
@@ -3,7 +3,7 @@ from fastapi import status
 from fastapi.testclient import TestClient
 from main import app
 from unittest.mock import ANY, AsyncMock, MagicMock, patch
-from src.database.models import User
+from src.database.models import EmailOutbox, User
 from src.repository.utils import logger
 from src.services.auth import auth_service
 from unittest.mock import patch
@@ -13,9 +13,13 @@ import pytest
 import pytz
 import uuid
 
-def test_create_user(client: TestClient, user: dict, monkeypatch):
-    mock_send_email = MagicMock()
-    monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
+@pytest.fixture
+def session_store():
+    """Stands in for a reachable session store."""
+    with patch("src.routes.auth.session_store", MagicMock(available=True, revoke_all=AsyncMock())) as store:
+        yield store
+
+def test_create_user(client: TestClient, session, user: dict):
     response = client.post(
         "/api/auth/signup",
         data={
@@ -28,6 +32,10 @@ def test_create_user(client: TestClient, user: dict, monkeypatch):
     data = response.json()
     assert data["user"]["email"] == user.get("email")
     assert "id" in data["user"]
+    queued = session.query(EmailOutbox).filter(EmailOutbox.recipient == user.get("email")).one()
+    assert queued.kind == "confirm_email"
+    assert queued.status == "pending"
+    assert queued.payload["username"] == user.get("username")
 
 def test_repeat_create_user(client, user):
     response = client.post(
@@ -289,7 +297,7 @@ async def test_password_reset_request(client: TestClient):
 
     # Mock dependencies
     with patch("src.repository.users.get_user_by_email", return_value=mock_user) as mock_get_user_by_email, \
-         patch("src.routes.auth.send_password_reset_email") as mock_send_password_reset_email:
+         patch("src.repository.outbox.enqueue", new_callable=AsyncMock) as mock_enqueue:
 
         # Request payload
         payload = {"email": email}
@@ -305,7 +313,14 @@ async def test_password_reset_request(client: TestClient):
 
         # Check function calls
         mock_get_user_by_email.assert_called_once_with(email, mock_db)
-        mock_send_password_reset_email.assert_called_once_with(email, username, mock_user.reset_token, ANY)
+        mock_enqueue.assert_awaited_once_with(
+            mock_db,
+            "password_reset",
+            email,
+            {"username": username, "token": mock_user.reset_token, "host": ANY},
+            dedup_key=f"password_reset:{mock_user.reset_token}",
+        )
+        mock_db.commit.assert_called_once()
 
     app.dependency_overrides.clear()
 
@@ -387,7 +402,7 @@ async def test_password_reset_expired_token(client: TestClient):
     app.dependency_overrides.clear()
 
 @pytest.mark.asyncio
-async def test_set_new_password_valid_token(client: TestClient):
+async def test_set_new_password_valid_token(client: TestClient, session_store):
     """Test successfully setting a new password with a valid token"""
     reset_token = str(uuid.uuid4())
     new_password = "NewSecurePassword123!"
@@ -405,7 +420,7 @@ async def test_set_new_password_valid_token(client: TestClient):
 
     with patch("src.repository.users.get_user_by_reset_token", return_value=mock_user) as mock_get_user_by_reset_token, \
          patch("src.repository.users.is_reset_token_expired", return_value=False) as mock_is_reset_token_expired, \
-         patch("src.services.auth.auth_service.get_password_hash", return_value="hashed_password") as mock_get_password_hash:
+         patch("src.services.passwords.password_service.hash", new_callable=AsyncMock, return_value="hashed_password") as mock_hash:
 
         response = client.post(
             f"/api/auth/set-new-password?token={reset_token}&new_password={new_password}"
@@ -420,14 +435,15 @@ async def test_set_new_password_valid_token(client: TestClient):
 
         mock_get_user_by_reset_token.assert_called_once_with(reset_token, mock_db)
         mock_is_reset_token_expired.assert_called_once_with(mock_user.reset_token_expired)
-        mock_get_password_hash.assert_called_once_with(new_password)
+        mock_hash.assert_awaited_once_with(new_password)
+        assert mock_user.password == "hashed_password"
 
         mock_db.commit.assert_called_once()
 
     app.dependency_overrides.clear()
 
 @pytest.mark.asyncio
-async def test_set_new_password_invalid_token(client: TestClient):
+async def test_set_new_password_invalid_token(client: TestClient, session_store):
     """Test setting a new password with an invalid token"""
     invalid_token = "invalid_token"
     new_password = "NewSecurePassword123!"
@@ -451,7 +467,7 @@ async def test_set_new_password_invalid_token(client: TestClient):
 
 
 @pytest.mark.asyncio
-async def test_set_new_password_expired_token(client: TestClient):
+async def test_set_new_password_expired_token(client: TestClient, session_store):
     """Test setting a new password with an expired token"""
     reset_token = str(uuid.uuid4())
     new_password = "NewSecurePassword123!"
@@ -480,3 +496,169 @@ async def test_set_new_password_expired_token(client: TestClient):
         mock_is_reset_token_expired.assert_called_once_with(mock_user.reset_token_expired)
 
     app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_set_new_password_unavailable_when_sessions_cannot_be_revoked(client: TestClient, session_store):
+    from redis.exceptions import ConnectionError
+    mock_user = MagicMock(email="test@example.com", reset_token_expired=None)
+    mock_db = MagicMock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+    session_store.revoke_all.side_effect = ConnectionError()
+
+    with patch("src.routes.auth.reset_tokens.manager", MagicMock(healthy=False)), \
+         patch("src.repository.users.get_user_by_reset_token", return_value=mock_user), \
+         patch("src.repository.users.is_reset_token_expired", return_value=False), \
+         patch("src.services.passwords.password_service.hash", new_callable=AsyncMock, return_value="hashed_password"):
+        response = client.post("/api/auth/set-new-password?token=abc&new_password=NewSecurePassword123!")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        session_store.revoke_all.assert_awaited_once_with("test@example.com")
+        mock_db.commit.assert_not_called()
+
+        session_store.available = False
+        response = client.post("/api/auth/set-new-password?token=abc&new_password=NewSecurePassword123!")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert session_store.revoke_all.await_count == 1
+
+    app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_refresh_token_rotates_session_without_db_writes(client):
+    email = "test@example.com"
+    token = auth_service.keys.encode({"sub": email, "jti": "old", "scope": "refresh_token"})
+
+    with patch('src.services.auth.Auth.decode_refresh_token', return_value=email), \
+         patch('src.routes.auth.session_store.rotate', AsyncMock(return_value="new")) as mock_rotate, \
+         patch('src.repository.users.get_user_by_email') as mock_get_user, \
+         patch('src.repository.users.update_token') as mock_update_token:
+
+        response = client.get("api/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        mock_rotate.assert_awaited_once_with("old", email)
+        mock_get_user.assert_not_called()
+        mock_update_token.assert_not_called()
+        new_token = response.json()["refresh_token"]
+        assert auth_service.keys.decode(new_token)["jti"] == "new"
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_rejected(client):
+    from src.services.sessions import RefreshTokenReused
+    email = "test@example.com"
+    token = auth_service.keys.encode({"sub": email, "jti": "old", "scope": "refresh_token"})
+
+    with patch('src.services.auth.Auth.decode_refresh_token', return_value=email), \
+         patch('src.routes.auth.session_store.rotate', AsyncMock(side_effect=RefreshTokenReused("old"))):
+
+        response = client.get("api/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid refresh token"
+
+@pytest.mark.asyncio
+async def test_set_new_password_consumes_redis_token(client: TestClient, session_store):
+    """Test that a Redis reset token is looked up by key and used only once"""
+    mock_user = AsyncMock()
+    mock_db = AsyncMock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    with patch("src.routes.auth.reset_tokens.manager") as mock_manager, \
+         patch("src.repository.users.get_user_by_reset_token", return_value=None) as mock_get_user_by_reset_token, \
+         patch("src.repository.users.get_user_by_id", return_value=mock_user) as mock_get_user_by_id, \
+         patch("src.services.passwords.password_service.hash", new_callable=AsyncMock, return_value="hashed_password"):
+        mock_manager.healthy = True
+        mock_manager.client.getdel = AsyncMock(side_effect=[b"7", None])
+
+        response = client.post("/api/auth/set-new-password?token=abc&new_password=NewSecurePassword123!")
+        assert response.status_code == status.HTTP_200_OK
+        mock_get_user_by_id.assert_called_once_with(7, mock_db)
+        mock_get_user_by_reset_token.assert_not_called()
+        assert mock_user.password == "hashed_password"
+
+        response = client.post("/api/auth/set-new-password?token=abc&new_password=NewSecurePassword123!")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"detail": "Invalid reset token"}
+        mock_get_user_by_reset_token.assert_called_once_with("abc", mock_db)
+
+    app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_reset_token_falls_back_to_database_on_redis_miss(client: TestClient, session_store):
+    """Test that a token issued into the database while Redis was down still works"""
+    mock_user = AsyncMock()
+    mock_user.reset_token = "abc"
+    mock_user.reset_token_expired = datetime.now(timezone.utc) + timedelta(hours=1)
+    mock_db = AsyncMock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    with patch("src.routes.auth.reset_tokens.manager") as mock_manager, \
+         patch("src.repository.users.get_user_by_reset_token", return_value=mock_user) as mock_get_user_by_reset_token, \
+         patch("src.services.passwords.password_service.hash", new_callable=AsyncMock, return_value="hashed_password"):
+        mock_manager.healthy = True
+        mock_manager.client.get = AsyncMock(return_value=None)
+        mock_manager.client.getdel = AsyncMock(return_value=None)
+
+        response = client.get("/api/auth/password-reset?token=abc")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"reset-token": "abc"}
+
+        response = client.post("/api/auth/set-new-password?token=abc&new_password=NewSecurePassword123!")
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_get_user_by_reset_token.call_count == 2
+        assert mock_user.password == "hashed_password"
+        assert mock_user.reset_token is None
+        assert mock_user.reset_token_expired is None
+        mock_db.commit.assert_called_once()
+
+    app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_token(client: TestClient):
+    token = await auth_service.create_access_token(data={"sub": "test@example.com"})
+    jti = auth_service.keys.decode(token)["jti"]
+
+    with patch("src.routes.auth.revocations.revoke", new_callable=AsyncMock) as mock_revoke:
+        response = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"message": "Logged out"}
+        mock_revoke.assert_awaited_once_with(jti, ANY)
+
+@pytest.mark.asyncio
+async def test_logout_ends_refresh_session(client: TestClient):
+    token = await auth_service.create_access_token(data={"sub": "test@example.com"})
+    refresh_token = await auth_service.create_refresh_token(data={"sub": "test@example.com", "jti": "session"})
+
+    with patch("src.routes.auth.revocations.revoke", new_callable=AsyncMock), \
+         patch("src.routes.auth.session_store.revoke", new_callable=AsyncMock) as mock_revoke_session:
+        response = client.post(
+            "/api/auth/logout", json={"refresh_token": refresh_token}, headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_revoke_session.assert_awaited_once_with("session", "test@example.com")
+
+@pytest.mark.asyncio
+async def test_logout_rejects_refresh_token_of_another_user(client: TestClient):
+    token = await auth_service.create_access_token(data={"sub": "test@example.com"})
+    refresh_token = await auth_service.create_refresh_token(data={"sub": "other@example.com", "jti": "session"})
+
+    with patch("src.routes.auth.revocations.revoke", new_callable=AsyncMock) as mock_revoke, \
+         patch("src.routes.auth.session_store.revoke", new_callable=AsyncMock) as mock_revoke_session:
+        response = client.post(
+            "/api/auth/logout", json={"refresh_token": refresh_token}, headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        mock_revoke.assert_not_awaited()
+        mock_revoke_session.assert_not_awaited()
+
+def test_login_locked_out_skips_password_check(client, user):
+    with patch("src.routes.auth.login_throttle.check", AsyncMock(return_value=4000)), \
+         patch("src.services.passwords.password_service.verify", new_callable=AsyncMock) as mock_verify:
+        response = client.post(
+            "/api/auth/login",
+            data={"username": user.get('email'), "password": 'password'},
+        )
+        assert response.status_code == 429, response.text
+        assert response.headers["Retry-After"] == "4"
+        mock_verify.assert_not_awaited()
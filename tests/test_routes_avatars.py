@@ -0,0 +1,38 @@
+from src.services.avatars import LocalAvatarStorage, avatar_service
+from unittest.mock import patch
+import pytest
+
+NAME = "ab" * 32 + "-64.png"
+
+@pytest.fixture
+def storage(tmp_path):
+    (tmp_path / NAME).write_bytes(bytes(range(256)))
+    with patch.object(avatar_service, "storage", LocalAvatarStorage(tmp_path)):
+        yield tmp_path
+
+def test_read_avatar(client, storage):
+    response = client.get(f"api/avatars/{NAME}")
+    assert response.status_code == 200
+    assert response.content == bytes(range(256))
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "etag" in response.headers
+
+def test_read_avatar_range(client, storage):
+    response = client.get(f"api/avatars/{NAME}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == bytes(range(10, 20))
+    assert response.headers["content-range"] == "bytes 10-19/256"
+
+def test_read_avatar_accel_redirect(client, storage):
+    with patch("src.routes.avatars.settings.avatar_accel_redirect", "/protected-avatars/"):
+        response = client.get(f"api/avatars/{NAME}")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["x-accel-redirect"] == f"/protected-avatars/{NAME}"
+
+def test_read_avatar_not_found(client, storage):
+    assert client.get("api/avatars/" + "cd" * 32 + "-64.png").status_code == 404
+    assert client.get("api/avatars/" + "ab" * 32 + "-65.png").status_code == 404
+    assert client.get("api/avatars/secret.txt").status_code == 404
@@ -1,14 +1,22 @@
+import pytest
 import pickle
 from src.database.models import User
 from src.repository import contacts as repository_contacts
 from src.repository import users as repository_users
 from src.services.auth import auth_service
+from src.services.rate_limit import TokenBucketBackend, user_limiter
 from src.schemas import ContactResponse, ContactUpdate
 from unittest.mock import patch, AsyncMock
 
-def test_read_contacts(client, get_token, monkeypatch):
+@pytest.fixture(autouse=True)
+def memory_rate_limits(monkeypatch):
+    """Checks the per-user rate limits in memory, with fresh buckets for every test."""
+    monkeypatch.setattr(user_limiter, "mode", "memory")
+    monkeypatch.setattr(user_limiter, "fallback", TokenBucketBackend())
+
+def test_read_contacts(client, get_token, monkeypatch, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         # Pickle the user object
         pickled_user = pickle.dumps(mock_user)
@@ -16,10 +24,6 @@ def test_read_contacts(client, get_token, monkeypatch):
         # Configure redis_mock.get to return the pickled user data
         redis_mock.get.return_value = pickled_user
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
-
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
 
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -45,9 +49,9 @@ def test_read_contacts(client, get_token, monkeypatch):
         assert len(response.json()) == 2 # verify the correct length of the returned list.
         assert ContactResponse(**response.json()[0]) # Verify the response model
 
-def test_read_contact(client, get_token, monkeypatch):
+def test_read_contact(client, get_token, monkeypatch, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         # Pickle the user object
         pickled_user = pickle.dumps(mock_user)
@@ -70,10 +74,7 @@ def test_read_contact(client, get_token, monkeypatch):
             "additional_info": "Some additional info"
         }
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
-        monkeypatch.setattr(repository_contacts, "get_contact", AsyncMock(return_value=mock_contact))
+        monkeypatch.setattr(repository_contacts, "get_contact", AsyncMock(return_value=ContactResponse(**mock_contact)))
 
         token = get_token
         headers = {"Authorization": f"Bearer {token}"}
@@ -85,7 +86,7 @@ def test_read_contact(client, get_token, monkeypatch):
         assert ContactResponse(**response.json()) # Verify the response model
 
 # Test for creating a contact
-def test_create_contact(client, get_token, monkeypatch):
+def test_create_contact(client, get_token, monkeypatch, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
         mock_contact = {
             "id": 1,
@@ -98,7 +99,7 @@ def test_create_contact(client, get_token, monkeypatch):
             "additional_info": "Some additional info"
         }
 
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -109,10 +110,7 @@ def test_create_contact(client, get_token, monkeypatch):
         # Configure redis_mock.get to return the pickled user data
         redis_mock.get.return_value = pickled_user
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
-        monkeypatch.setattr(repository_contacts, "create_contact", AsyncMock(return_value=mock_contact))
+        monkeypatch.setattr(repository_contacts, "create_contact", AsyncMock(return_value=ContactResponse(**mock_contact)))
 
         headers = {"Authorization": f"Bearer {get_token}"}
         response = client.post("/api/contacts/", json=mock_contact, headers=headers)
@@ -121,7 +119,7 @@ def test_create_contact(client, get_token, monkeypatch):
         assert response.json() == mock_contact
 
 # Test for deleting a contact
-def test_delete_contact(client, get_token, monkeypatch):
+def test_delete_contact(client, get_token, monkeypatch, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
         mock_contact = {
             "id": 1,
@@ -134,7 +132,7 @@ def test_delete_contact(client, get_token, monkeypatch):
             "additional_info": "Some additional info"
         }
 
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -145,10 +143,7 @@ def test_delete_contact(client, get_token, monkeypatch):
         # Configure redis_mock.get to return the pickled user data
         redis_mock.get.return_value = pickled_user
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
-        monkeypatch.setattr(repository_contacts, "remove_contact", AsyncMock(return_value=mock_contact))
+        monkeypatch.setattr(repository_contacts, "remove_contact", AsyncMock(return_value=ContactResponse(**mock_contact)))
 
         headers = {"Authorization": f"Bearer {get_token}"}
         response = client.delete("/api/contacts/delete/1", headers=headers)
@@ -157,7 +152,7 @@ def test_delete_contact(client, get_token, monkeypatch):
         assert response.json() == mock_contact
 
 # Test for updating a contact
-def test_update_contact(client, monkeypatch, user, get_token):
+def test_update_contact(client, monkeypatch, user, get_token, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
         mock_contact_update = {
             "first_name": "Jane",
@@ -179,7 +174,7 @@ def test_update_contact(client, monkeypatch, user, get_token):
             "additional_info": "Some additional info"
         }
 
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -190,10 +185,7 @@ def test_update_contact(client, monkeypatch, user, get_token):
         # Configure redis_mock.get to return the pickled user data
         redis_mock.get.return_value = pickled_user
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
-        monkeypatch.setattr(repository_contacts, "update_contact", AsyncMock(return_value=mock_contact))
+        monkeypatch.setattr(repository_contacts, "update_contact", AsyncMock(return_value=ContactResponse(**mock_contact)))
 
         print(f"Mocked update_contact return value: {mock_contact}")
         headers = {"Authorization": f"Bearer {get_token}"}
@@ -204,9 +196,9 @@ def test_update_contact(client, monkeypatch, user, get_token):
         assert response.json() == mock_contact
 
 # Test for reading a contact by first name
-def test_read_contact_by_first_name(client, monkeypatch, user, get_token, mock_contact):
+def test_read_contact_by_first_name(client, monkeypatch, user, get_token, mock_contact, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -218,11 +210,8 @@ def test_read_contact_by_first_name(client, monkeypatch, user, get_token, mock_c
         redis_mock.get.return_value = pickled_user
 
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=user))
-        monkeypatch.setattr(repository_contacts, "get_contact_by_first_name", AsyncMock(return_value=mock_contact))
+        monkeypatch.setattr(repository_contacts, "get_contact_by_first_name", AsyncMock(return_value=ContactResponse(**mock_contact)))
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
         
         headers = {"Authorization": f"Bearer {get_token}"}
         response = client.get(f"/api/contacts/contact_by_first_name/{mock_contact['first_name']}", headers=headers)
@@ -231,9 +220,9 @@ def test_read_contact_by_first_name(client, monkeypatch, user, get_token, mock_c
         assert response.json() == mock_contact
 
 # Test for reading a contact by last name
-def test_read_contact_by_last_name(client, monkeypatch, user, get_token, mock_contact):
+def test_read_contact_by_last_name(client, monkeypatch, user, get_token, mock_contact, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -245,11 +234,8 @@ def test_read_contact_by_last_name(client, monkeypatch, user, get_token, mock_co
         redis_mock.get.return_value = pickled_user
 
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=user))
-        monkeypatch.setattr(repository_contacts, "get_contact_by_last_name", AsyncMock(return_value=mock_contact))
+        monkeypatch.setattr(repository_contacts, "get_contact_by_last_name", AsyncMock(return_value=ContactResponse(**mock_contact)))
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
         
         headers = {"Authorization": f"Bearer {get_token}"}
         response = client.get(f"/api/contacts/contact_by_last_name/{mock_contact['last_name']}", headers=headers)
@@ -258,9 +244,9 @@ def test_read_contact_by_last_name(client, monkeypatch, user, get_token, mock_co
         assert response.json() == mock_contact
 
 # Test for reading a contact by email
-def test_read_contact_by_email(client, monkeypatch, user, get_token, mock_contact):
+def test_read_contact_by_email(client, monkeypatch, user, get_token, mock_contact, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -272,11 +258,8 @@ def test_read_contact_by_email(client, monkeypatch, user, get_token, mock_contac
         redis_mock.get.return_value = pickled_user
         
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=user))
-        monkeypatch.setattr(repository_contacts, "get_contact_by_email", AsyncMock(return_value=mock_contact))
+        monkeypatch.setattr(repository_contacts, "get_contact_by_email", AsyncMock(return_value=ContactResponse(**mock_contact)))
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
         
         headers = {"Authorization": f"Bearer {get_token}"}
         response = client.get(f"/api/contacts/contact_by_email/{mock_contact['email']}", headers=headers)
@@ -285,9 +268,9 @@ def test_read_contact_by_email(client, monkeypatch, user, get_token, mock_contac
         assert response.json() == mock_contact
 
 # Test for getting upcoming birthdays
-def test_get_upcoming_birthdays(client, monkeypatch, user, get_token, mock_contact):
+def test_get_upcoming_birthdays(client, monkeypatch, user, get_token, mock_contact, cached_user):
     with patch.object(auth_service, 'r') as redis_mock:
-        mock_user = User(id=1, username="neo", email="neo@example.com")
+        mock_user = cached_user(id=1, username="neo", email="neo@example.com")
 
         monkeypatch.setattr(repository_users, "get_user_by_email", AsyncMock(return_value=mock_user))
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
@@ -298,14 +281,10 @@ def test_get_upcoming_birthdays(client, monkeypatch, user, get_token, mock_conta
         # Configure redis_mock.get to return the pickled user data
         redis_mock.get.return_value = pickled_user
         
-        mock_contacts = [mock_contact]  # Assuming the function returns a list of contacts
+        mock_contacts = [ContactResponse(**mock_contact)]  # Assuming the function returns a list of contacts
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=user))
         monkeypatch.setattr(repository_contacts, "get_upcoming_birthdays", AsyncMock(return_value=mock_contacts))
 
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
-
         headers = {"Authorization": f"Bearer {get_token}"}
         response = client.get("/api/contacts/upcoming_birthdays/", headers=headers)
 
@@ -313,3 +292,192 @@ def test_get_upcoming_birthdays(client, monkeypatch, user, get_token, mock_conta
         assert isinstance(response.json(), list)
         assert len(response.json()) == 1  # Assuming we expect one contact
         assert response.json()[0] == mock_contact
+
+def test_read_contacts_batch(client, session):
+    from datetime import date
+    from main import app
+    from src.database.models import Contact
+
+    owner = User(username="batch", email="batch@example.com", password="x")
+    other = User(username="other", email="other@example.com", password="x")
+    session.add_all([owner, other])
+    session.commit()
+    mine = [
+        Contact(first_name=name, last_name="Doe", email=f"{name}@example.com", phone="1", birthday=date(1990, 1, 1), user_id=owner.id)
+        for name in ("a", "b", "c")
+    ]
+    theirs = Contact(first_name="d", last_name="Doe", email="d@example.com", phone="1", birthday=date(1990, 1, 1), user_id=other.id)
+    session.add_all(mine + [theirs])
+    session.commit()
+
+    app.dependency_overrides[auth_service.get_current_user] = lambda: owner
+    try:
+        ids = [mine[2].id, mine[0].id, 999999, theirs.id, mine[2].id]
+        response = client.get("/api/contacts/batch", params={"ids": ",".join(map(str, ids))})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert [c["id"] for c in body["contacts"]] == [mine[2].id, mine[0].id]
+        assert body["missing"] == [999999, theirs.id]
+
+        assert client.get("/api/contacts/batch", params={"ids": "1,x"}).status_code == 422
+        assert client.get("/api/contacts/batch", params={"ids": ""}).status_code == 422
+        too_many = ",".join(str(i) for i in range(1, 502))
+        assert client.get("/api/contacts/batch", params={"ids": too_many}).status_code == 422
+    finally:
+        app.dependency_overrides.pop(auth_service.get_current_user, None)
+
+def test_read_contacts_sparse_fields(client, session):
+    from datetime import date
+    from main import app
+    from src.database.models import Contact
+
+    owner = User(username="sparse", email="sparse@example.com", password="x")
+    session.add(owner)
+    session.commit()
+    contact = Contact(first_name="Ann", last_name="Lee", email="ann@example.com", phone="555", birthday=date(1990, 1, 1),
+                      additional_info="long notes", user_id=owner.id)
+    session.add(contact)
+    session.commit()
+    contact_id = contact.id
+
+    app.dependency_overrides[auth_service.get_current_user] = lambda: owner
+    try:
+        response = client.get("/api/contacts/", params={"fields": "phone,first_name"})
+        assert response.status_code == 200, response.text
+        assert response.json() == [{"id": contact_id, "first_name": "Ann", "phone": "555"}]
+
+        response = client.get(f"/api/contacts/{contact_id}", params={"fields": "last_name"})
+        assert response.status_code == 200, response.text
+        assert response.json() == {"id": contact_id, "last_name": "Lee"}
+
+        assert client.get("/api/contacts/999999", params={"fields": "last_name"}).status_code == 404
+        assert client.get("/api/contacts/", params={"fields": "secret"}).status_code == 422
+    finally:
+        app.dependency_overrides.pop(auth_service.get_current_user, None)
+
+def test_read_contact_changes(client, session):
+    from datetime import date, timedelta
+    from main import app
+    from src.database.models import Contact
+    from src.schemas import ContactModel
+    from src.services.sync import contact_sync
+
+    owner = User(username="sync", email="sync@example.com", password="x")
+    session.add(owner)
+    session.commit()
+    contacts = [
+        Contact(first_name=name, last_name="Doe", email=f"{name}@example.com", phone="1", birthday=date(1990, 1, 1), user_id=owner.id)
+        for name in ("a", "b", "c")
+    ]
+    session.add_all(contacts)
+    session.commit()
+    a_id, b_id, c_id = (contact.id for contact in contacts)
+
+    def sync(since=None, limit=500):
+        params = {"limit": limit}
+        if since:
+            params["since"] = since
+        response = client.get("/api/contacts/changes", params=params)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    app.dependency_overrides[auth_service.get_current_user] = lambda: owner
+    try:
+        with patch.object(contact_sync, "overlap", timedelta(0)):
+            pages, token, body = [], None, {"has_more": True}
+            while body["has_more"]:
+                body = sync(token, limit=2)
+                pages.append([contact["id"] for contact in body["changed"]])
+                token = body["next"]
+            assert pages[0] == [a_id, b_id]
+            assert c_id in pages[1]
+
+            repository_contacts.update_contact(
+                b_id, ContactModel(first_name="b2", last_name="Doe", email="b@example.com", phone="2", birthday=date(1990, 1, 1)),
+                owner, session,
+            )
+            repository_contacts.remove_contact(a_id, owner, session)
+            body = sync(token)
+            changed = {contact["id"]: contact for contact in body["changed"]}
+            assert changed[b_id]["first_name"] == "b2"
+            assert a_id not in changed
+            assert body["deleted"] == [a_id]
+
+        assert client.get("/api/contacts/changes", params={"since": "garbage"}).status_code == 400
+    finally:
+        app.dependency_overrides.pop(auth_service.get_current_user, None)
+
+def test_contact_changes_are_published(client, mock_contact):
+    from main import app
+    from src.services.change_feed import change_feed
+
+    owner = User(id=1, username="neo", email="neo@example.com")
+    app.dependency_overrides[auth_service.get_current_user] = lambda: owner
+    try:
+        with patch.object(change_feed, "publish", AsyncMock()) as publish, \
+             patch.object(repository_contacts, "create_contact", AsyncMock(return_value=ContactResponse(**mock_contact))), \
+             patch.object(repository_contacts, "update_contact", AsyncMock(return_value=ContactResponse(**mock_contact))), \
+             patch.object(repository_contacts, "remove_contact", AsyncMock(return_value=ContactResponse(**mock_contact))):
+            assert client.post("/api/contacts/", json=mock_contact).status_code == 201
+            assert client.put("/api/contacts/update/1", json={**mock_contact, "done": False}).status_code == 200
+            assert client.delete("/api/contacts/delete/1").status_code == 200
+        events = [call.args for call in publish.await_args_list]
+        assert [(user_id, event["type"]) for user_id, event in events] == [(1, "created"), (1, "updated"), (1, "deleted")]
+        assert events[0][1]["contact"]["birthday"].isoformat() == "1990-01-01"
+        assert events[2][1] == {"type": "deleted", "id": 1}
+    finally:
+        app.dependency_overrides.pop(auth_service.get_current_user, None)
+
+@pytest.mark.asyncio
+async def test_event_stream_sends_changes_and_heartbeats():
+    import asyncio
+    from src.routes.contacts import event_stream
+    from src.services.change_feed import change_feed
+    from unittest.mock import MagicMock
+
+    request = MagicMock(is_disconnected=AsyncMock(side_effect=[False, False, True]))
+    stream = event_stream(request, 42, heartbeat=0.01)
+    assert (await stream.__anext__()).startswith("retry: ")
+    assert await stream.__anext__() == ": heartbeat\n\n"
+    change_feed.dispatch(42, {"type": "deleted", "id": 7})
+    assert await stream.__anext__() == 'event: deleted\ndata: {"type":"deleted","id":7}\n\n'
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+    assert 42 not in change_feed.subscribers
+
+@pytest.mark.asyncio
+async def test_event_stream_ends_when_token_expires_or_is_revoked():
+    import time
+    from src.routes.contacts import event_stream
+    from src.services.revocation import revocations
+    from unittest.mock import MagicMock
+
+    request = MagicMock(is_disconnected=AsyncMock(return_value=False))
+    stream = event_stream(request, 42, heartbeat=10, expires_at=time.time() + 0.05)
+    assert (await stream.__anext__()).startswith("retry: ")
+    assert await stream.__anext__() == ": heartbeat\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+
+    with patch.object(revocations, "is_revoked", AsyncMock(side_effect=[False, True])):
+        stream = event_stream(request, 42, heartbeat=0.01, jti="jti")
+        assert (await stream.__anext__()).startswith("retry: ")
+        assert await stream.__anext__() == ": heartbeat\n\n"
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+
+@pytest.mark.asyncio
+async def test_contact_events_limits_connections_per_user(client):
+    from main import app
+    from src.services.change_feed import change_feed
+
+    owner = User(id=1, username="neo", email="neo@example.com")
+    token = await auth_service.create_access_token(data={"sub": owner.email})
+    app.dependency_overrides[auth_service.get_current_user] = lambda: owner
+    try:
+        with patch.object(change_feed, "max_connections", 1):
+            async with change_feed.subscribe(owner.id):
+                response = client.get("/api/contacts/events", headers={"Authorization": f"Bearer {token}"})
+                assert response.status_code == 429
+    finally:
+        app.dependency_overrides.pop(auth_service.get_current_user, None)
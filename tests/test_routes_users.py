@@ -1,25 +1,45 @@
 from src.database.models import User
 from src.services.auth import auth_service
-from unittest.mock import patch, AsyncMock
+from src.services.redis_manager import redis_manager
+from unittest.mock import patch, AsyncMock, MagicMock
 import pickle
 
-def test_get_me(client, get_token, monkeypatch):
-    with patch.object(auth_service, 'r') as redis_mock:
-        mock_user = User(id=1, username="test@example.com", email="test@example.com")
+def test_get_me(client, get_token, monkeypatch, cached_user):
+    with patch.object(auth_service, 'r', MagicMock()) as redis_mock, \
+         patch.object(redis_manager, 'healthy', True):
+        mock_user = cached_user(id=1, username="test@example.com", email="test@example.com")
 
         # Pickle the user object
         pickled_user = pickle.dumps(mock_user)
 
-        # Configure redis_mock.get to return the pickled user data
-        redis_mock.get.return_value = pickled_user
+        # Configure the cache lookup to return the pickled user data
+        redis_mock.pipeline.return_value.execute = AsyncMock(return_value=[pickled_user, 900])
     
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
-        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
-
         monkeypatch.setattr(auth_service, "get_current_user", AsyncMock(return_value=mock_user))
 
         token = get_token
         headers = {"Authorization": f"Bearer {token}"}
         response = client.get("api/users/me", headers=headers)
         assert response.status_code == 200
+
+def test_update_avatar(client, tmp_path):
+    from io import BytesIO
+    from main import app
+    from PIL import Image
+    from src.services.avatars import LocalAvatarStorage, avatar_service
+
+    mock_user = User(id=1, username="test", email="test@example.com", avatar=None)
+    updated_user = User(id=1, username="test", email="test@example.com", avatar="url", confirmed=True)
+    image = BytesIO()
+    Image.new("RGB", (300, 300), "blue").save(image, format="PNG")
+    app.dependency_overrides[auth_service.get_current_user] = lambda: mock_user
+    try:
+        with patch.object(avatar_service, "storage", LocalAvatarStorage(tmp_path)), \
+             patch("src.repository.users.update_avatar", AsyncMock(return_value=updated_user)) as mock_update:
+            response = client.patch("api/users/avatar", files={"file": ("a.png", image.getvalue(), "image/png")})
+        assert response.status_code == 200, response.text
+        url = mock_update.call_args.args[1]
+        assert url.startswith("/api/avatars/")
+        assert (tmp_path / url.rsplit("/", 1)[1]).exists()
+    finally:
+        app.dependency_overrides.pop(auth_service.get_current_user, None)
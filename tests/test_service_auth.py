@@ -1,9 +1,11 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, AsyncMock, patch, MagicMock
+from redis.exceptions import ConnectionError
 from jose import jwt, JWTError
 from fastapi import HTTPException, status
 from src.database.models import User
 from src.services.auth import Auth, auth_service
+from src.services.redis_manager import redis_manager
 from src.conf.config import settings
 from datetime import datetime, timedelta
 import pickle
@@ -22,18 +24,6 @@ def mock_redis():
 def auth_instance():
     return Auth()
 
-def test_verify_password(auth_instance):
-    plain_password = "password123"
-    hashed_password = auth_instance.get_password_hash(plain_password)
-    assert auth_instance.verify_password(plain_password, hashed_password)
-    assert not auth_instance.verify_password("wrong_password", hashed_password)
-
-def test_get_password_hash(auth_instance):
-    password = "password123"
-    hashed_password = auth_instance.get_password_hash(password)
-    assert isinstance(hashed_password, str)
-    assert hashed_password != password
-
 @pytest.mark.asyncio
 async def test_create_access_token(auth_instance):
     data = {"sub": "test@example.com"}
@@ -105,4 +95,159 @@ async def test_get_email_from_token_valid(auth_instance):
 async def test_get_email_from_token_jwt_error(auth_instance):
     with pytest.raises(HTTPException) as excinfo:
         await auth_instance.get_email_from_token("invalid_token")
-    assert excinfo.value.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
\ No newline at end of file
+    assert excinfo.value.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+@pytest.mark.asyncio
+async def test_decode_access_token_uses_cache(auth_instance):
+    auth_instance.token_cache.clear()
+    token = await auth_instance.create_access_token({"sub": "test@example.com"})
+    with patch("src.services.auth.jwt.decode", wraps=jwt.decode) as mock_decode:
+        first = auth_instance.decode_access_token(token)
+        second = auth_instance.decode_access_token(token)
+    assert first["sub"] == second["sub"] == "test@example.com"
+    mock_decode.assert_called_once()
+
+def test_decode_access_token_invalid_not_cached(auth_instance):
+    auth_instance.token_cache.clear()
+    with pytest.raises(JWTError):
+        auth_instance.decode_access_token("invalid_token")
+    assert len(auth_instance.token_cache) == 0
+
+def test_decode_access_token_rejected_token_is_cached(auth_instance):
+    auth_instance.rejected_tokens.clear()
+    with pytest.raises(JWTError):
+        auth_instance.decode_access_token("invalid_token")
+    with patch("src.services.auth.jwt.decode") as mock_decode:
+        with pytest.raises(JWTError):
+            auth_instance.decode_access_token("invalid_token")
+    mock_decode.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_is_unknown_email_uses_filter(auth_instance):
+    auth_instance.unknown_users.clear()
+    known_emails = AsyncMock()
+    known_emails.check.side_effect = lambda email: email == "known@example.com"
+    with patch.object(auth_instance, "known_emails", known_emails), \
+         patch.object(auth_instance, "pending_known_emails", set()), \
+         patch.object(redis_manager, "healthy", True):
+        assert await auth_instance.is_unknown_email("stranger@example.com")
+        assert not await auth_instance.is_unknown_email("known@example.com")
+
+@pytest.mark.asyncio
+async def test_is_unknown_email_rebuilds_expired_filter(auth_instance):
+    auth_instance.unknown_users.clear()
+    known_emails = AsyncMock()
+    known_emails.check.return_value = None
+    known_emails.is_ready.return_value = False
+    known_emails.begin_rebuild.return_value = "token"
+    with patch.object(auth_instance, "known_emails", known_emails), \
+         patch.object(auth_instance, "pending_known_emails", set()), \
+         patch.object(redis_manager, "healthy", True), \
+         patch("src.services.auth.SessionLocal", MagicMock()), \
+         patch("src.repository.users.iter_user_emails", return_value=iter(["neo@example.com"])):
+        assert not await auth_instance.is_unknown_email("stranger@example.com")
+        assert not await auth_instance.is_unknown_email("stranger@example.com")
+        await auth_instance.known_emails_rebuild
+    known_emails.begin_rebuild.assert_awaited_once()
+    known_emails.update.assert_awaited_once_with(["neo@example.com"])
+    known_emails.renew_rebuild.assert_awaited_once_with("token")
+    known_emails.mark_ready.assert_awaited_once_with("token")
+
+@pytest.mark.asyncio
+async def test_load_known_emails_stops_when_rebuild_taken_over(auth_instance):
+    known_emails = AsyncMock()
+    known_emails.is_ready.return_value = False
+    known_emails.begin_rebuild.return_value = "token"
+    known_emails.renew_rebuild.return_value = False
+    emails = [f"user{i}@example.com" for i in range(1500)]
+    with patch.object(auth_instance, "known_emails", known_emails), \
+         patch("src.repository.users.iter_user_emails", return_value=iter(emails)):
+        await auth_instance.load_known_emails(MagicMock())
+    known_emails.update.assert_awaited_once_with(emails[:1000])
+    known_emails.mark_ready.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_is_unknown_email_redis_unavailable(auth_instance):
+    auth_instance.unknown_users.clear()
+    pending = set()
+    with patch.object(redis_manager, "healthy", False), \
+         patch.object(auth_instance, "pending_known_emails", pending):
+        assert not await auth_instance.is_unknown_email("stranger@example.com")
+        auth_instance.remember_unknown_email("stranger@example.com")
+        assert await auth_instance.is_unknown_email("stranger@example.com")
+        await auth_instance.remember_known_email("stranger@example.com", MagicMock())
+        assert not await auth_instance.is_unknown_email("stranger@example.com")
+    assert pending == {"stranger@example.com"}
+
+@pytest.mark.asyncio
+async def test_pending_known_emails_flushed_from_database(auth_instance):
+    known_emails = AsyncMock()
+    backlog = [["neo@example.com", "trinity@example.com"], []]
+    with patch.object(auth_instance, "known_emails", known_emails), \
+         patch.object(auth_instance, "pending_known_emails", {"neo@example.com"}), \
+         patch.object(redis_manager, "healthy", True), \
+         patch("src.services.auth.SessionLocal", MagicMock()), \
+         patch("src.repository.users.get_pending_known_emails", AsyncMock(side_effect=backlog)), \
+         patch("src.repository.users.remove_pending_known_emails", AsyncMock()) as mock_remove:
+        await auth_instance.flush_pending_known_emails()
+        assert auth_instance.pending_known_emails == set()
+    # emails left by other workers are flushed too
+    known_emails.update.assert_awaited_once_with(["neo@example.com", "trinity@example.com"])
+    mock_remove.assert_awaited_once_with(["neo@example.com", "trinity@example.com"], ANY)
+
+@pytest.mark.asyncio
+async def test_remember_known_email_keeps_pending_record_when_filter_update_fails(auth_instance):
+    known_emails = AsyncMock()
+    known_emails.add.side_effect = ConnectionError("down")
+    with patch.object(auth_instance, "known_emails", known_emails), \
+         patch.object(auth_instance, "pending_known_emails", set()) as pending, \
+         patch.object(redis_manager, "healthy", True), \
+         patch("src.repository.users.remove_pending_known_emails", AsyncMock()) as mock_remove:
+        await auth_instance.remember_known_email("neo@example.com", MagicMock())
+        assert pending == {"neo@example.com"}
+    mock_remove.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_current_user_unknown_email_skips_db(auth_instance, mock_db):
+    token = await auth_instance.create_access_token({"sub": "ghost@example.com"})
+    with patch.object(auth_instance, "is_unknown_email", AsyncMock(return_value=True)), \
+         patch("src.repository.users.get_user_by_email") as mock_get_user:
+        with pytest.raises(HTTPException) as excinfo:
+            await auth_instance.get_current_user(token, mock_db)
+    assert excinfo.value.status_code == status.HTTP_401_UNAUTHORIZED
+    mock_get_user.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_current_user_coalesces_db_loads(auth_instance, mock_db):
+    import asyncio
+
+    user = User(id=1, username="neo", email="neo@example.com")
+    token = await auth_instance.create_access_token({"sub": user.email})
+
+    async def slow_get_user(email, db):
+        await asyncio.sleep(0.01)
+        return user
+
+    load_db = MagicMock()
+    with patch.object(redis_manager, "healthy", False), \
+         patch.object(auth_instance, "is_unknown_email", AsyncMock(return_value=False)), \
+         patch("src.services.auth.SessionLocal", return_value=load_db), \
+         patch("src.repository.users.get_user_by_email", side_effect=slow_get_user) as mock_get_user:
+        mock_db.merge.side_effect = lambda instance, load: instance
+        results = await asyncio.gather(*[auth_instance.get_current_user(token, mock_db) for _ in range(5)])
+
+    # the shared load runs in its own session, not in the first request's
+    mock_get_user.assert_called_once_with(user.email, load_db)
+    load_db.close.assert_called_once()
+    # each request gets its own copy instead of the instance bound to the first request's session
+    assert len({id(result) for result in results}) == 5
+    assert all(result is not user and result.email == user.email for result in results)
+
+@pytest.mark.asyncio
+async def test_get_current_user_rejects_revoked_token(auth_instance):
+    token = await auth_instance.create_access_token(data={"sub": "test@example.com"})
+    with patch("src.services.auth.revocations.is_revoked", AsyncMock(return_value=True)) as mock_is_revoked:
+        with pytest.raises(HTTPException) as exc_info:
+            await auth_instance.get_current_user(token, MagicMock())
+    assert exc_info.value.status_code == 401
+    mock_is_revoked.assert_awaited_once()
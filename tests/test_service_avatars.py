@@ -0,0 +1,91 @@
+from fastapi import HTTPException, UploadFile
+from io import BytesIO
+from PIL import Image
+from src.database.models import User
+from src.services.avatars import AVATAR_SIZES, AvatarService, AvatarStorage, LocalAvatarStorage, read_limited, render_variants
+from src.services.worker_pool import WorkerPool
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+
+def make_image(width=600, height=400, color="red", fmt="JPEG") -> bytes:
+    out = BytesIO()
+    Image.new("RGB", (width, height), color).save(out, format=fmt)
+    return out.getvalue()
+
+def make_upload(data: bytes) -> UploadFile:
+    return UploadFile(BytesIO(data), filename="avatar.jpg")
+
+def make_service(tmp_path, max_bytes=1024 * 1024):
+    return AvatarService(LocalAvatarStorage(tmp_path), WorkerPool(max_workers=1), MagicMock(healthy=False), max_bytes)
+
+def test_render_variants_crops_to_square_pngs():
+    variants = render_variants(make_image())
+    assert sorted(variants) == sorted(AVATAR_SIZES)
+    for size, data in variants.items():
+        with Image.open(BytesIO(data)) as image:
+            assert image.format == "PNG"
+            assert image.size == (size, size)
+
+def test_render_variants_rejects_non_images():
+    with pytest.raises(HTTPException) as exc_info:
+        render_variants(b"not an image")
+    assert exc_info.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_read_limited_rejects_large_upload():
+    with pytest.raises(HTTPException) as exc_info:
+        await read_limited(make_upload(b"x" * 2048), max_bytes=1024)
+    assert exc_info.value.status_code == 413
+    assert await read_limited(make_upload(b"x" * 1024), max_bytes=1024) == b"x" * 1024
+
+@pytest.mark.asyncio
+async def test_store_uploads_once_per_content(tmp_path):
+    service = make_service(tmp_path)
+    user = User(id=1, email="a@example.com", avatar=None)
+    url = await service.store(make_upload(make_image()), user)
+    assert url.startswith("/api/avatars/") and url.endswith("-250.png")
+    digest = url.rsplit("/", 1)[1][:64]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{digest}-{size}.png" for size in AVATAR_SIZES)
+
+    user.avatar = url
+    service.storage.save = AsyncMock()
+    assert await service.store(make_upload(make_image()), user) == url
+    service.storage.save.assert_not_awaited()
+    assert service.metrics()["deduplicated"] == 1
+
+@pytest.mark.asyncio
+async def test_store_reuses_url_known_in_redis(tmp_path):
+    service = make_service(tmp_path)
+    service.manager = MagicMock(healthy=True)
+    service.manager.client.get = AsyncMock(return_value=b"https://cdn/avatar.png")
+    service.storage.contains = AsyncMock(return_value=True)
+    service.storage.save = AsyncMock()
+    url = await service.store(make_upload(make_image()), User(id=2, email="b@example.com", avatar=None))
+    assert url == "https://cdn/avatar.png"
+    service.storage.save.assert_not_awaited()
+    key = service.manager.client.get.await_args.args[0]
+    assert key.startswith("avatar:local:")
+
+@pytest.mark.asyncio
+async def test_store_saves_again_when_cached_file_is_gone(tmp_path):
+    service = make_service(tmp_path)
+    service.manager = MagicMock(healthy=True)
+    service.manager.client.get = AsyncMock(return_value=b"/api/avatars/missing-250.png")
+    service.manager.client.set = AsyncMock()
+    url = await service.store(make_upload(make_image()), User(id=2, email="b@example.com", avatar=None))
+    digest = url.rsplit("/", 1)[1][:64]
+    assert await service.storage.contains(digest)
+    service.manager.client.set.assert_awaited_once_with(f"avatar:local:{digest}", url, ex=service.url_ttl)
+
+def test_local_storage_rejects_unsafe_names(tmp_path):
+    storage = LocalAvatarStorage(tmp_path)
+    assert storage.path("../secret.png") is None
+    assert storage.path("a" * 64 + "-32.png.tmp") is None
+    assert storage.path("a" * 64 + "-32.png") == tmp_path / ("a" * 64 + "-32.png")
+
+def test_storage_must_implement_save():
+    class IncompleteStorage(AvatarStorage):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStorage()
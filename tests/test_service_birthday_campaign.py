@@ -0,0 +1,78 @@
+from datetime import date
+from fastapi_mail.errors import ConnectionErrors
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base, Contact, User
+from src.services.birthday_campaign import BirthdayCampaign, birthday_days
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+
+TODAY = date(2026, 10, 19)
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = factory()
+    for user_id in range(1, 6):
+        db.add(User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com", password="x"))
+        for n, birthday in enumerate([date(1990, 10, 19), date(1985, 10, 19), date(1990, 10, 20)]):
+            db.add(Contact(
+                first_name=f"c{user_id}{n}", last_name="Doe", email=f"c{user_id}{n}@example.com",
+                phone="1", birthday=birthday, user_id=user_id,
+            ))
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+def make_campaign(session_factory, page_size=3):
+    manager = MagicMock(healthy=False)
+    return BirthdayCampaign(session_factory, AsyncMock(), manager, page_size=page_size, concurrency=2)
+
+def test_birthday_days_includes_leap_day_in_common_years():
+    assert birthday_days(date(2027, 2, 28)) == (2, [28, 29])
+    assert birthday_days(date(2028, 2, 28)) == (2, [28])
+    assert birthday_days(TODAY) == (10, [19])
+
+@pytest.mark.asyncio
+async def test_campaign_sends_one_digest_per_user(session_factory):
+    campaign = make_campaign(session_factory)
+    stats = await campaign.run(TODAY)
+    assert stats == {"users": 5, "contacts": 10, "failed": 0, "resumed": False}
+    messages = [call.args[0] for call in campaign.sender.send.await_args_list]
+    assert sorted(message["To"] for message in messages) == [f"user{n}@example.com" for n in range(1, 6)]
+    body = next(m for m in messages if m["To"] == "user3@example.com").get_content()
+    assert "c30" in body and "c31" in body and "c32" not in body
+
+@pytest.mark.asyncio
+async def test_campaign_resumes_from_checkpoint(session_factory):
+    campaign = make_campaign(session_factory)
+    sent = []
+
+    async def send(message):
+        if message["To"] == "user4@example.com" and not sent.count("fail"):
+            sent.append("fail")
+            raise ConnectionErrors("SMTP server unavailable")
+        sent.append(message["To"])
+
+    campaign.sender.send.side_effect = send
+    stats = await campaign.run(TODAY)
+    assert stats["failed"] == 1
+    checkpoint = await campaign.load_checkpoint(TODAY)
+    assert checkpoint is not None and int(checkpoint) < 4
+
+    stats = await campaign.run(TODAY)
+    assert stats["resumed"] is True and stats["failed"] == 0
+    assert sorted(set(sent) - {"fail"}) == [f"user{n}@example.com" for n in range(1, 6)]
+    assert await campaign.load_checkpoint(TODAY) == "done"
+    assert await campaign.run(TODAY) == {"users": 0, "contacts": 0, "failed": 0, "resumed": False}
+
+@pytest.mark.asyncio
+async def test_campaign_keeps_user_contacts_together_across_pages(session_factory):
+    campaign = make_campaign(session_factory, page_size=1)
+    stats = await campaign.run(TODAY)
+    assert stats["users"] == 5
+    assert campaign.sender.send.await_count == 5
@@ -0,0 +1,72 @@
+from src.services.bloom import MARK_READY_SCRIPT, RENEW_SCRIPT, BloomFilter, SharedBloomFilter
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+
+def test_added_items_are_members():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    emails = [f"user{i}@example.com" for i in range(1000)]
+    bloom.update(emails)
+    assert all(email in bloom for email in emails)
+    assert bloom.count == 1000
+
+def test_false_positive_rate_is_bounded():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom.update(f"user{i}@example.com" for i in range(1000))
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_clear():
+    bloom = BloomFilter(capacity=10)
+    bloom.add("neo@example.com")
+    bloom.clear()
+    assert "neo@example.com" not in bloom
+
+def test_shared_filter_keys_share_a_hash_tag():
+    bloom = SharedBloomFilter(MagicMock(), "bloom:emails", capacity=10, ttl=60)
+    assert bloom.key == "{bloom:emails}"
+    assert bloom.ready_key.startswith("{bloom:emails}")
+    assert bloom.rebuild_key.startswith("{bloom:emails}")
+
+@pytest.mark.asyncio
+async def test_shared_filter_mark_ready_sets_marker_and_bitmap_ttl_together():
+    redis = MagicMock()
+    redis.eval = AsyncMock(return_value=1)
+    bloom = SharedBloomFilter(redis, "bloom:emails", capacity=10, ttl=60)
+    assert await bloom.mark_ready("token")
+    redis.eval.assert_awaited_once_with(
+        MARK_READY_SCRIPT, 3, bloom.rebuild_key, bloom.ready_key, bloom.key, "token", 60, 120
+    )
+
+@pytest.mark.asyncio
+async def test_shared_filter_mark_ready_refused_without_the_rebuild_claim():
+    redis = MagicMock()
+    redis.eval = AsyncMock(return_value=0)
+    bloom = SharedBloomFilter(redis, "bloom:emails", capacity=10, ttl=60)
+    assert not await bloom.mark_ready("stale")
+    assert not await bloom.renew_rebuild("stale")
+    redis.eval.assert_awaited_with(RENEW_SCRIPT, 1, bloom.rebuild_key, "stale", 600)
+
+@pytest.mark.asyncio
+async def test_shared_filter_check_is_unsure_until_ready():
+    redis = MagicMock()
+    pipe = redis.pipeline.return_value
+    bloom = SharedBloomFilter(redis, "bloom:emails", capacity=10)
+    pipe.execute = AsyncMock(return_value=[0] + [0] * bloom.hash_count)
+    assert await bloom.check("neo@example.com") is None
+    pipe.execute = AsyncMock(return_value=[1] + [0] * bloom.hash_count)
+    assert await bloom.check("neo@example.com") is False
+    pipe.execute = AsyncMock(return_value=[1] + [1] * bloom.hash_count)
+    assert await bloom.check("neo@example.com") is True
+    redis.pipeline.assert_called_with(transaction=True)
+
+@pytest.mark.asyncio
+async def test_shared_filter_only_one_rebuild_at_a_time():
+    redis = MagicMock()
+    redis.set = AsyncMock(side_effect=[True, None])
+    redis.delete = AsyncMock()
+    bloom = SharedBloomFilter(redis, "bloom:emails", capacity=10)
+    token = await bloom.begin_rebuild(timeout=30)
+    redis.set.assert_awaited_with(bloom.rebuild_key, token, nx=True, ex=30)
+    redis.delete.assert_awaited_once_with(bloom.key, bloom.ready_key)
+    assert await bloom.begin_rebuild() is None
+    assert redis.delete.await_count == 1
@@ -0,0 +1,45 @@
+from src.services.cache import TTLCache
+import time
+
+def test_get_missing_returns_default():
+    cache = TTLCache(maxsize=2)
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+
+def test_set_and_get():
+    cache = TTLCache(maxsize=2)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert "key" in cache
+
+def test_entry_expires_at_absolute_time():
+    cache = TTLCache(maxsize=2)
+    cache.set("key", "value", expires_at=time.time() - 1)
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+def test_entry_expires_after_ttl():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("fresh", 1)
+    cache.set("stale", 2, ttl=-1)
+    assert cache.get("fresh") == 1
+    assert cache.get("stale") is None
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_discard_and_clear():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.discard("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,116 @@
+from redis.exceptions import ConnectionError
+from src.services.change_feed import CHANNEL, RESYNC, ChangeFeed, TooManyConnections
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import json
+import pytest
+
+def make_feed(healthy=False, queue_size=3):
+    return ChangeFeed(MagicMock(healthy=healthy), queue_size=queue_size)
+
+@pytest.mark.asyncio
+async def test_publish_reaches_only_the_users_connections():
+    feed = make_feed()
+    async with feed.subscribe(1) as mine, feed.subscribe(1) as my_other_device, feed.subscribe(2) as theirs:
+        await feed.publish(1, {"type": "deleted", "id": 7})
+        assert await mine.get() == {"type": "deleted", "id": 7}
+        assert await my_other_device.get() == {"type": "deleted", "id": 7}
+        assert theirs.queue.empty()
+        assert feed.metrics()["connections"] == 3
+    assert feed.subscribers == {}
+
+@pytest.mark.asyncio
+async def test_slow_connection_gets_resync_instead_of_backlog():
+    feed = make_feed(queue_size=2)
+    async with feed.subscribe(1) as subscription:
+        for n in range(5):
+            feed.dispatch(1, {"type": "deleted", "id": n})
+        assert await subscription.get() is RESYNC
+        assert subscription.queue.empty()
+        feed.dispatch(1, {"type": "deleted", "id": 5})
+        assert await subscription.get() == {"type": "deleted", "id": 5}
+        assert feed.metrics()["dropped"] == 5
+
+@pytest.mark.asyncio
+async def test_publish_goes_through_redis_when_subscribed():
+    feed = make_feed(healthy=True)
+    feed.manager.client.publish = AsyncMock()
+    feed.subscribed = True
+    async with feed.subscribe(1) as subscription:
+        await feed.publish(1, {"type": "deleted", "id": 7})
+        channel, data = feed.manager.client.publish.await_args.args
+        assert channel == CHANNEL
+        assert json.loads(data) == {"user_id": 1, "event": {"type": "deleted", "id": 7}}
+        # Delivered by the listener, not twice.
+        assert subscription.queue.empty()
+
+@pytest.mark.asyncio
+async def test_publish_falls_back_to_local_delivery():
+    feed = make_feed(healthy=True)
+    feed.manager.client.publish = AsyncMock(side_effect=ConnectionError("down"))
+    feed.subscribed = True
+    async with feed.subscribe(1) as subscription:
+        await feed.publish(1, {"type": "deleted", "id": 7})
+        assert await subscription.get() == {"type": "deleted", "id": 7}
+
+@pytest.mark.asyncio
+async def test_listener_dispatches_messages_from_redis():
+    feed = make_feed(healthy=True)
+    message = {"data": json.dumps({"user_id": 1, "event": {"type": "deleted", "id": 7}}).encode()}
+    messages = [message]
+
+    async def get_message(timeout):
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(timeout)
+
+    pubsub = MagicMock(subscribe=AsyncMock(), aclose=AsyncMock(), get_message=get_message)
+    feed.manager.client.pubsub.return_value = pubsub
+    async with feed.subscribe(1) as subscription:
+        feed.start()
+        try:
+            assert await asyncio.wait_for(subscription.get(), 1) == {"type": "deleted", "id": 7}
+            assert feed.metrics()["listening"] is True
+        finally:
+            await feed.stop()
+    pubsub.subscribe.assert_awaited_once_with(CHANNEL)
+
+@pytest.mark.asyncio
+async def test_listener_skips_malformed_messages_and_survives_crashes(monkeypatch):
+    feed = make_feed(healthy=True)
+    good = {"data": json.dumps({"user_id": 1, "event": {"type": "deleted", "id": 7}}).encode()}
+    messages = [good, {"data": b"not json"}, {"data": json.dumps({"event": {}}).encode()}, RuntimeError("boom")]
+
+    async def get_message(timeout):
+        if messages:
+            message = messages.pop()
+            if isinstance(message, Exception):
+                raise message
+            return message
+        await asyncio.sleep(timeout)
+
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr("src.services.change_feed.asyncio.sleep", lambda delay: real_sleep(0))
+    pubsub = MagicMock(subscribe=AsyncMock(), aclose=AsyncMock(), get_message=get_message)
+    feed.manager.client.pubsub.return_value = pubsub
+    async with feed.subscribe(1) as subscription:
+        feed.start()
+        try:
+            assert await asyncio.wait_for(subscription.get(), 1) == {"type": "deleted", "id": 7}
+        finally:
+            await feed.stop()
+    assert feed.metrics()["restarts"] == 1
+    assert feed.metrics()["malformed"] == 2
+
+@pytest.mark.asyncio
+async def test_subscribe_refuses_connections_over_the_limit():
+    feed = ChangeFeed(MagicMock(healthy=False), max_connections=1)
+    async with feed.subscribe(1):
+        with pytest.raises(TooManyConnections):
+            async with feed.subscribe(1):
+                pass
+        async with feed.subscribe(2):
+            pass
+    async with feed.subscribe(1):
+        pass
+    assert feed.metrics()["rejected"] == 1
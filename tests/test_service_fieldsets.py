@@ -0,0 +1,32 @@
+from fastapi import HTTPException
+from src.database.models import Contact
+from src.services.fieldsets import contact_fields
+from types import SimpleNamespace
+import pytest
+
+def test_parse_orders_fields_and_adds_id():
+    assert contact_fields.parse(None) is None
+    assert contact_fields.parse("") is None
+    assert contact_fields.parse("phone, first_name,phone") == ("id", "first_name", "phone")
+
+def test_parse_rejects_unknown_fields():
+    with pytest.raises(HTTPException) as exc_info:
+        contact_fields.parse("first_name,password")
+    assert exc_info.value.status_code == 422
+    assert "password" in exc_info.value.detail
+
+def test_serializer_is_cached_per_field_set():
+    fields = contact_fields.parse("first_name,phone")
+    assert contact_fields.serializer(fields) is contact_fields.serializer(contact_fields.parse("phone,first_name"))
+    assert contact_fields.serializer(fields) is not contact_fields.serializer(contact_fields.parse("phone"))
+    assert contact_fields.serializer(contact_fields.parse("id")).to_dict(SimpleNamespace(id=7)) == {"id": 7}
+
+def test_serializer_dumps_only_selected_fields():
+    serializer = contact_fields.serializer(contact_fields.parse("first_name,phone"))
+    rows = [SimpleNamespace(id=1, first_name="John", phone="123"), SimpleNamespace(id=2, first_name="Jane", phone="456")]
+    assert serializer.to_dicts(rows) == [
+        {"id": 1, "first_name": "John", "phone": "123"},
+        {"id": 2, "first_name": "Jane", "phone": "456"},
+    ]
+    contact = Contact(id=3, first_name="Neo", phone="789", last_name="Anderson")
+    assert serializer.to_dict(contact) == {"id": 3, "first_name": "Neo", "phone": "789"}
@@ -0,0 +1,56 @@
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import JWTError, jwk, jwt
+from src.services.keys import KeyManager
+import pytest
+
+def private_pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+@pytest.fixture
+def manager():
+    manager = KeyManager()
+    manager.add_key("default", "HS256", "secret")
+    return manager
+
+def test_encode_sets_kid_of_active_key(manager):
+    token = manager.encode({"sub": "test@example.com"})
+    assert jwt.get_unverified_header(token)["kid"] == "default"
+    assert manager.decode(token)["sub"] == "test@example.com"
+
+def test_decode_token_without_kid_uses_default_key(manager):
+    token = jwt.encode({"sub": "test@example.com"}, "secret", algorithm="HS256")
+    assert manager.decode(token)["sub"] == "test@example.com"
+
+@pytest.mark.parametrize("algorithm, private_key", [
+    ("ES256", ec.generate_private_key(ec.SECP256R1())),
+    ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+])
+def test_asymmetric_key_rotation(manager, algorithm, private_key):
+    old_token = manager.encode({"sub": "test@example.com"})
+    manager.add_key("2025-10", algorithm, private_pem(private_key), active=True)
+    new_token = manager.encode({"sub": "test@example.com"})
+
+    assert jwt.get_unverified_header(new_token)["alg"] == algorithm
+    assert manager.decode(new_token)["sub"] == "test@example.com"
+    assert manager.decode(old_token)["sub"] == "test@example.com"
+
+    jwks = manager.jwks()
+    assert [key["kid"] for key in jwks["keys"]] == ["2025-10"]
+    public_key = jwk.construct(jwks["keys"][0], algorithm)
+    assert jwt.decode(new_token, public_key, algorithms=[algorithm])["sub"] == "test@example.com"
+
+def test_decode_unknown_kid(manager):
+    token = jwt.encode({"sub": "test@example.com"}, "secret", algorithm="HS256", headers={"kid": "retired"})
+    with pytest.raises(JWTError):
+        manager.decode(token)
+
+def test_decode_rejects_algorithm_mismatch(manager):
+    manager.add_key("ec", "ES256", private_pem(ec.generate_private_key(ec.SECP256R1())))
+    token = jwt.encode({"sub": "test@example.com"}, "secret", algorithm="HS256", headers={"kid": "ec"})
+    with pytest.raises(JWTError):
+        manager.decode(token)
@@ -0,0 +1,47 @@
+from redis.exceptions import ConnectionError
+from src.services.login_throttle import LoginThrottle
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+
+def make_throttle(healthy=True):
+    manager = MagicMock(healthy=healthy)
+    manager.client.register_script.return_value = AsyncMock(return_value=0)
+    manager.client.delete = AsyncMock()
+    return LoginThrottle(manager, account_threshold=5, ip_threshold=20)
+
+@pytest.mark.asyncio
+async def test_check_returns_longest_lock():
+    throttle = make_throttle()
+    pipe = MagicMock(execute=AsyncMock(return_value=[-2, 1500]))
+    throttle.manager.client.pipeline.return_value = pipe
+    assert await throttle.check("user@example.com", "1.2.3.4") == 1500
+    pipe.pttl.assert_any_call("login_lock:account:user@example.com")
+    pipe.pttl.assert_any_call("login_lock:ip:1.2.3.4")
+    assert throttle.metrics()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_check_allows_when_not_locked():
+    throttle = make_throttle()
+    throttle.manager.client.pipeline.return_value = MagicMock(execute=AsyncMock(return_value=[-2, -2]))
+    assert await throttle.check("user@example.com", "1.2.3.4") == 0
+
+@pytest.mark.asyncio
+async def test_record_failure_is_one_script_call():
+    throttle = make_throttle()
+    throttle.script.return_value = 2000
+    assert await throttle.record_failure("user@example.com", "1.2.3.4") == 2000
+    throttle.script.assert_awaited_once()
+    assert throttle.script.call_args.kwargs["keys"][:2] == [
+        "login_fail:account:user@example.com", "login_fail:ip:1.2.3.4"
+    ]
+
+@pytest.mark.asyncio
+async def test_throttle_fails_open_without_redis():
+    throttle = make_throttle(healthy=False)
+    assert await throttle.check("user@example.com", "1.2.3.4") == 0
+    assert await throttle.record_failure("user@example.com", "1.2.3.4") == 0
+    throttle.script.assert_not_awaited()
+
+    throttle.manager.healthy = True
+    throttle.script.side_effect = ConnectionError()
+    assert await throttle.record_failure("user@example.com", "1.2.3.4") == 0
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from fastapi_mail.errors import ConnectionErrors
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base, EmailOutbox
+from src.repository import outbox as repository_outbox
+from src.services.outbox_worker import OutboxWorker
+from unittest.mock import AsyncMock
+import pytest
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+async def queue(session_factory, *messages):
+    db = session_factory()
+    for recipient, dedup_key in messages:
+        await repository_outbox.enqueue(
+            db, "password_reset", recipient, {"username": "user", "token": "t", "host": "http://localhost/"}, dedup_key
+        )
+    db.commit()
+    db.close()
+
+def statuses(session_factory):
+    db = session_factory()
+    try:
+        return [(m.recipient, m.status, m.attempts) for m in db.query(EmailOutbox).order_by(EmailOutbox.id)]
+    finally:
+        db.close()
+
+@pytest.mark.asyncio
+async def test_worker_sends_batch(session_factory):
+    await queue(session_factory, ("a@example.com", "a"), ("b@example.com", "b"))
+    sender = AsyncMock()
+    worker = OutboxWorker(session_factory, sender)
+    assert await worker.run_once() == 2
+    assert sender.send.await_count == 2
+    assert statuses(session_factory) == [("a@example.com", "sent", 1), ("b@example.com", "sent", 1)]
+    assert await worker.run_once() == 0
+
+@pytest.mark.asyncio
+async def test_worker_deduplicates(session_factory):
+    await queue(session_factory, ("a@example.com", "same"), ("a@example.com", "same"))
+    sender = AsyncMock()
+    worker = OutboxWorker(session_factory, sender)
+    await worker.run_once()
+    assert statuses(session_factory) == [("a@example.com", "duplicate", 0), ("a@example.com", "sent", 1)]
+
+    await queue(session_factory, ("a@example.com", "same"))
+    await worker.run_once()
+    assert statuses(session_factory)[-1] == ("a@example.com", "duplicate", 0)
+    assert sender.send.await_count == 1
+
+@pytest.mark.asyncio
+async def test_worker_retries_with_backoff_then_gives_up(session_factory):
+    await queue(session_factory, ("a@example.com", "a"))
+    sender = AsyncMock()
+    sender.send.side_effect = ConnectionErrors("SMTP server unavailable")
+    worker = OutboxWorker(session_factory, sender, max_attempts=2)
+
+    await worker.run_once()
+    assert statuses(session_factory) == [("a@example.com", "pending", 1)]
+    assert await worker.run_once() == 0  # not due yet
+
+    db = session_factory()
+    db.query(EmailOutbox).update({"next_attempt_at": repository_outbox.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    db.close()
+    await worker.run_once()
+    assert statuses(session_factory) == [("a@example.com", "failed", 2)]
+
+@pytest.mark.asyncio
+async def test_worker_records_unexpected_error_and_commits_batch(session_factory):
+    await queue(session_factory, ("a@example.com", "a"), ("b@example.com", "b"))
+    sender = AsyncMock()
+    sender.send.side_effect = [RuntimeError("boom"), None]
+    worker = OutboxWorker(session_factory, sender)
+
+    assert await worker.run_once() == 2
+    assert statuses(session_factory) == [("a@example.com", "pending", 1), ("b@example.com", "sent", 1)]
+    db = session_factory()
+    assert db.query(EmailOutbox).first().last_error == "RuntimeError: boom"
+    db.close()
+
+@pytest.mark.asyncio
+async def test_worker_purges_old_delivered_messages(session_factory):
+    await queue(session_factory, ("a@example.com", "a"), ("b@example.com", "b"), ("c@example.com", "c"))
+    db = session_factory()
+    old = repository_outbox.utcnow() - timedelta(days=30)
+    db.query(EmailOutbox).filter(EmailOutbox.recipient == "a@example.com").update({"status": "sent", "created_at": old})
+    db.query(EmailOutbox).filter(EmailOutbox.recipient == "b@example.com").update({"status": "failed", "created_at": old})
+    db.query(EmailOutbox).filter(EmailOutbox.recipient == "c@example.com").update({"status": "sent"})
+    db.commit()
+    db.close()
+
+    worker = OutboxWorker(session_factory, AsyncMock(), retention=7 * 24 * 3600)
+    assert await worker.purge() == 1
+    assert [recipient for recipient, _, _ in statuses(session_factory)] == ["b@example.com", "c@example.com"]
+
+def test_backoff_grows_and_is_capped():
+    worker = OutboxWorker(base_backoff=5, max_backoff=60)
+    assert 2.5 <= worker.backoff(1) <= 5
+    assert 10 <= worker.backoff(3) <= 20
+    assert 30 <= worker.backoff(10) <= 60
@@ -0,0 +1,34 @@
+from src.services.worker_pool import WorkerPool
+from src.services.passwords import PasswordService
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+
+@pytest.fixture
+def service():
+    return PasswordService(rounds=4, pool=WorkerPool(max_workers=1, max_queue=4))
+
+@pytest.mark.asyncio
+async def test_hash_and_verify(service):
+    password_hash = await service.hash("password123")
+    assert isinstance(password_hash, str)
+    assert password_hash != "password123"
+    assert await service.verify("password123", password_hash)
+    assert not await service.verify("wrong_password", password_hash)
+
+@pytest.mark.asyncio
+async def test_needs_update_when_cost_changes(service):
+    password_hash = await service.hash("password123")
+    assert not service.needs_update(password_hash)
+    assert PasswordService(rounds=5, pool=service.pool).needs_update(password_hash)
+
+@pytest.mark.asyncio
+async def test_rehash_stores_new_hash(service):
+    db = MagicMock()
+    with patch("src.services.passwords.SessionLocal", return_value=db), \
+         patch("src.repository.users.update_password", new_callable=AsyncMock) as mock_update_password:
+        await service.rehash(1, "old-hash", "password123")
+
+    user_id, old_hash, password_hash, _ = mock_update_password.await_args.args
+    assert (user_id, old_hash) == (1, "old-hash")
+    assert await service.verify("password123", password_hash)
+    db.close.assert_called_once()
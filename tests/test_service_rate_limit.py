@@ -0,0 +1,129 @@
+from fastapi import HTTPException, status
+from redis.exceptions import ConnectionError
+from src.database.models import User
+from src.services.rate_limit import (
+    Limiter, LimiterBackend, RedisGCRABackend, TokenBucketBackend, UserRateLimiter, default_identifier, get_tier,
+    parse_networks, user_limiter
+)
+from src.services.redis_manager import redis_manager
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_limits():
+    bucket = TokenBucketBackend()
+    waits = [await bucket.hit("client", limit=3, period_ms=60000) for _ in range(4)]
+    assert waits[:3] == [0, 0, 0]
+    assert 0 < waits[3] <= 20000
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_over_time():
+    bucket = TokenBucketBackend()
+    with patch("src.services.rate_limit.time.monotonic", return_value=100.0):
+        assert await bucket.hit("client", limit=1, period_ms=1000) == 0
+        assert await bucket.hit("client", limit=1, period_ms=1000) > 0
+    with patch("src.services.rate_limit.time.monotonic", return_value=101.0):
+        assert await bucket.hit("client", limit=1, period_ms=1000) == 0
+
+@pytest.mark.asyncio
+async def test_token_bucket_keys_are_independent():
+    bucket = TokenBucketBackend()
+    assert await bucket.hit("a", limit=1, period_ms=60000) == 0
+    assert await bucket.hit("b", limit=1, period_ms=60000) == 0
+    assert await bucket.hit("a", limit=1, period_ms=60000) > 0
+
+@pytest.mark.asyncio
+async def test_token_bucket_cleanup_drops_full_buckets():
+    bucket = TokenBucketBackend(cleanup_interval=60)
+    with patch("src.services.rate_limit.time.monotonic", return_value=100.0):
+        await bucket.hit("idle", limit=10, period_ms=1000)
+    assert len(bucket) == 1
+    bucket.cleanup(now=102.0)
+    assert len(bucket) == 0
+
+def test_backend_must_implement_hit():
+    class IncompleteBackend(LimiterBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+@pytest.mark.asyncio
+async def test_limiter_uses_memory_when_redis_unhealthy():
+    primary = AsyncMock(spec=LimiterBackend)
+    primary.name = "redis"
+    limiter = Limiter(primary=primary, fallback=TokenBucketBackend())
+    with patch.object(redis_manager, "healthy", False):
+        assert await limiter.hit("client", 10, 60000) == 0
+        assert limiter.metrics()["active"] == "memory"
+        assert limiter.metrics()["degraded"]
+    primary.hit.assert_not_called()
+    assert limiter.counts == {"redis": 0, "memory": 1}
+
+@pytest.mark.asyncio
+async def test_limiter_falls_back_on_redis_error():
+    primary = AsyncMock(spec=LimiterBackend)
+    primary.name = "redis"
+    primary.hit.side_effect = ConnectionError("down")
+    limiter = Limiter(primary=primary, fallback=TokenBucketBackend())
+    with patch.object(redis_manager, "healthy", True):
+        assert await limiter.hit("client", 10, 60000) == 0
+    assert limiter.errors == 1
+    assert limiter.counts == {"redis": 0, "memory": 1}
+
+@pytest.mark.asyncio
+async def test_limiter_memory_mode():
+    primary = AsyncMock(spec=LimiterBackend)
+    primary.name = "redis"
+    limiter = Limiter(primary=primary, fallback=TokenBucketBackend(), mode="memory")
+    with patch.object(redis_manager, "healthy", True):
+        await limiter.hit("client", 10, 60000)
+        assert not limiter.metrics()["degraded"]
+    primary.hit.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_gcra_backend_single_script_call():
+    manager = MagicMock()
+    script = AsyncMock(return_value=0)
+    manager.client.register_script.return_value = script
+    backend = RedisGCRABackend(manager)
+    assert await backend.hit("ratelimit:user:1", limit=60, period_ms=60000, cost=5) == 0
+    script.assert_awaited_once_with(keys=["ratelimit:user:1"], args=[1000.0, 60000.0, 5])
+
+def test_get_tier():
+    assert get_tier(User(id=1))["limit"] == 60
+    assert get_tier(User(id=1, rate_limit_tier="premium"))["limit"] == 600
+    assert get_tier(User(id=1, rate_limit_tier="unknown"))["limit"] == 60
+
+@pytest.mark.asyncio
+async def test_user_rate_limiter_charges_route_cost():
+    user = User(id=42)
+    dependency = UserRateLimiter(cost=25)
+    with patch.object(user_limiter, "fallback", TokenBucketBackend()), \
+         patch.object(redis_manager, "healthy", False):
+        await dependency(current_user=user)
+        await dependency(current_user=user)
+        with pytest.raises(HTTPException) as excinfo:
+            await dependency(current_user=user)
+    assert excinfo.value.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(excinfo.value.headers["Retry-After"]) > 0
+
+def make_request(host, forwarded=None):
+    request = MagicMock()
+    request.client.host = host
+    request.headers = {"X-Forwarded-For": forwarded} if forwarded else {}
+    return request
+
+@pytest.mark.asyncio
+async def test_default_identifier_ignores_forwarded_for_from_untrusted_client():
+    request = make_request("203.0.113.7", "1.2.3.4")
+    assert await default_identifier(request, trusted_proxies=()) == "203.0.113.7"
+    assert await default_identifier(request, trusted_proxies=parse_networks("10.0.0.0/8")) == "203.0.113.7"
+
+@pytest.mark.asyncio
+async def test_default_identifier_reads_forwarded_for_behind_trusted_proxies():
+    proxies = parse_networks("10.0.0.0/8, 192.168.1.5")
+    # the client prepended a spoofed address; the proxies appended the real one
+    request = make_request("10.0.0.2", "1.2.3.4, 203.0.113.7, 192.168.1.5")
+    assert await default_identifier(request, trusted_proxies=proxies) == "203.0.113.7"
+    assert await default_identifier(make_request("10.0.0.2"), trusted_proxies=proxies) == "10.0.0.2"
@@ -0,0 +1,50 @@
+from redis.exceptions import ConnectionError
+from src.services.redis_manager import RedisManager
+from unittest.mock import AsyncMock, patch
+import asyncio
+import pytest
+
+@pytest.fixture
+def manager():
+    manager = RedisManager(host="localhost", port=6379, health_check_interval=3600)
+    manager.client = AsyncMock()
+    manager.pool = AsyncMock()
+    return manager
+
+@pytest.mark.asyncio
+async def test_connect_success(manager):
+    manager.client.ping.return_value = True
+    assert await manager.connect()
+    assert manager.healthy
+    await manager.close()
+    assert not manager.healthy
+    manager.client.aclose.assert_awaited_once()
+    manager.pool.aclose.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_connect_retries_with_backoff(manager):
+    manager.client.ping.side_effect = [ConnectionError("down"), ConnectionError("down"), True]
+    with patch("src.services.redis_manager.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        assert await manager._reconnect(attempts=5)
+    assert mock_sleep.await_count == 2
+    first, second = (call.args[0] for call in mock_sleep.await_args_list)
+    assert first <= 1 and second <= 2
+
+@pytest.mark.asyncio
+async def test_connect_gives_up_without_raising(manager):
+    manager.client.ping.side_effect = ConnectionError("down")
+    with patch("src.services.redis_manager.asyncio.sleep", new_callable=AsyncMock):
+        assert not await manager.connect(attempts=3)
+    assert manager.client.ping.await_count == 3
+    await manager.close()
+
+@pytest.mark.asyncio
+async def test_restore_hooks_run_after_outage(manager):
+    hook = AsyncMock()
+    manager.on_restore(hook)
+    manager.healthy = True
+    manager.client.ping.side_effect = [ConnectionError("down"), True, True]
+    with patch("src.services.redis_manager.asyncio.sleep", AsyncMock(side_effect=[None, None, asyncio.CancelledError()])):
+        with pytest.raises(asyncio.CancelledError):
+            await manager._watch()
+    hook.assert_awaited_once()
@@ -0,0 +1,41 @@
+from src.services.email import build_messages
+from src.services.renderer import TemplateRenderer
+from unittest.mock import patch
+import pytest
+
+@pytest.fixture
+def template_folder(tmp_path):
+    (tmp_path / "hello.html").write_text("<p>Hi {{ username }}</p>")
+    return tmp_path
+
+def test_templates_compiled_once(template_folder):
+    renderer = TemplateRenderer(template_folder)
+    assert set(renderer.templates) == {"hello.html"}
+    with patch.object(renderer.environment.loader, "get_source") as mock_get_source:
+        assert renderer.render("hello.html", username="ann") == "<p>Hi ann</p>"
+        assert renderer.render("hello.html", username="bob") == "<p>Hi bob</p>"
+    mock_get_source.assert_not_called()
+
+def test_render_batch_matches_render(template_folder):
+    renderer = TemplateRenderer(template_folder)
+    contexts = [{"username": name} for name in ("ann", "bob", "cid")]
+    assert renderer.render_batch("hello.html", contexts) == [
+        renderer.render("hello.html", **context) for context in contexts
+    ]
+
+def test_reload_picks_up_changes(template_folder):
+    renderer = TemplateRenderer(template_folder)
+    (template_folder / "hello.html").write_text("<p>Hello {{ username }}</p>")
+    assert renderer.render("hello.html", username="ann") == "<p>Hi ann</p>"
+    renderer.reload()
+    assert renderer.render("hello.html", username="ann") == "<p>Hello ann</p>"
+
+def test_build_messages_for_bulk_send():
+    messages = build_messages(
+        "Reset your password ",
+        "reset-password-email-template.html",
+        [("a@example.com", {"host": "http://h/", "username": "ann", "reset_token": "t1"}),
+         ("b@example.com", {"host": "http://h/", "username": "bob", "reset_token": "t2"})],
+    )
+    assert [message["To"] for message in messages] == ["a@example.com", "b@example.com"]
+    assert "password-reset?token=t2" in messages[1].get_content()
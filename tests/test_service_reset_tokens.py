@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+from src.services.reset_tokens import ResetTokenStore
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+
+def make_store():
+    manager = MagicMock()
+    manager.client = MagicMock(set=AsyncMock(), get=AsyncMock(), getdel=AsyncMock())
+    return ResetTokenStore(manager, ttl=3600)
+
+@pytest.mark.asyncio
+async def test_issue_sets_key_with_ttl():
+    store = make_store()
+    token = await store.issue(7)
+    store.manager.client.set.assert_awaited_once_with(f"reset:{token}", 7, ex=3600)
+
+@pytest.mark.asyncio
+async def test_peek_and_consume():
+    store = make_store()
+    store.manager.client.get.return_value = b"7"
+    store.manager.client.getdel.return_value = None
+    assert await store.peek("token") == 7
+    assert await store.consume("token") is None
+    store.manager.client.getdel.assert_awaited_once_with("reset:token")
+
+@pytest.mark.asyncio
+async def test_import_token_keeps_remaining_lifetime():
+    store = make_store()
+    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=10)
+    assert await store.import_token("token", 7, expires_at) is True
+    ttl = store.manager.client.set.call_args.kwargs["ex"]
+    assert 590 <= ttl <= 600
+
+@pytest.mark.asyncio
+async def test_import_token_skips_expired():
+    store = make_store()
+    expires_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    assert await store.import_token("token", 7, expires_at) is False
+    store.manager.client.set.assert_not_awaited()
@@ -0,0 +1,74 @@
+from redis.exceptions import ConnectionError
+from src.services.revocation import CHANNEL, RevocationList
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import pytest
+import time
+
+def make_revocations():
+    manager = MagicMock(healthy=True)
+    manager.client.exists = AsyncMock(return_value=1)
+    return RevocationList(manager, capacity=1000)
+
+@pytest.mark.asyncio
+async def test_unrevoked_token_skips_redis():
+    revocations = make_revocations()
+    assert await revocations.is_revoked("jti") is False
+    revocations.manager.client.exists.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_revoke_stores_publishes_and_filters():
+    revocations = make_revocations()
+    pipe = MagicMock(execute=AsyncMock())
+    revocations.manager.client.pipeline.return_value = pipe
+    await revocations.revoke("jti", time.time() + 60)
+    pipe.set.assert_called_once()
+    assert pipe.set.call_args.args[:2] == ("revoked:jti", 1)
+    assert 0 < pipe.set.call_args.kwargs["ex"] <= 61
+    pipe.publish.assert_called_once_with(CHANNEL, "jti")
+    assert await revocations.is_revoked("jti") is True
+    revocations.manager.client.exists.assert_awaited_once_with("revoked:jti")
+
+@pytest.mark.asyncio
+async def test_filter_false_positive_confirmed_by_redis():
+    revocations = make_revocations()
+    revocations.filter.add("jti")
+    revocations.manager.client.exists.return_value = 0
+    assert await revocations.is_revoked("jti") is False
+
+@pytest.mark.asyncio
+async def test_filter_match_is_revoked_when_redis_fails():
+    revocations = make_revocations()
+    revocations.filter.add("jti")
+    revocations.manager.client.exists.side_effect = ConnectionError()
+    assert await revocations.is_revoked("jti") is True
+
+@pytest.mark.asyncio
+async def test_listener_survives_crashes(monkeypatch):
+    revocations = make_revocations()
+    revocations.reload = AsyncMock()
+    messages = [{"data": b"jti"}, RuntimeError("boom")]
+
+    async def get_message(timeout):
+        if messages:
+            message = messages.pop()
+            if isinstance(message, Exception):
+                raise message
+            return message
+        await asyncio.sleep(timeout)
+
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr("src.services.revocation.asyncio.sleep", lambda delay: real_sleep(0))
+    pubsub = MagicMock(subscribe=AsyncMock(), aclose=AsyncMock(), get_message=get_message)
+    revocations.manager.client.pubsub.return_value = pubsub
+    revocations.start()
+    try:
+        for _ in range(100):
+            if "jti" in revocations.filter:
+                break
+            await real_sleep(0.01)
+    finally:
+        await revocations.stop()
+    assert "jti" in revocations.filter
+    assert revocations.metrics()["restarts"] == 1
+    assert pubsub.aclose.await_count == 2
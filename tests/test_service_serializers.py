@@ -0,0 +1,22 @@
+from datetime import date
+from fastapi.responses import ORJSONResponse
+from src.database.models import Contact
+from src.schemas import ContactResponse
+from src.services.serializers import contact_serializer
+import json
+
+def make_contact(contact_id: int) -> Contact:
+    return Contact(id=contact_id, first_name="John", last_name="Doe", email="john@example.com", phone="123",
+                   birthday=date(1990, 1, 31), user_id=1, additional_info=None)
+
+def test_contact_serializer_matches_response_model():
+    contacts = [make_contact(1), make_contact(2)]
+    expected = [ContactResponse.model_validate(c).model_dump(mode="json") for c in contacts]
+    rendered = json.loads(ORJSONResponse(contact_serializer.to_dicts(contacts)).body)
+    assert rendered == expected
+    assert rendered[0]["birthday"] == "1990-01-31"
+
+def test_contact_serializer_reads_only_model_fields():
+    contact = make_contact(1)
+    contact.password = "not exported"
+    assert set(contact_serializer.to_dict(contact)) == set(ContactResponse.model_fields)
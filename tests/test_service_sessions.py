@@ -0,0 +1,57 @@
+from src.services.sessions import RefreshTokenReused, SessionStore
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+
+def make_store():
+    manager = MagicMock()
+    manager.client.register_script.side_effect = lambda source: AsyncMock()
+    return SessionStore(manager, ttl=60)
+
+@pytest.mark.asyncio
+async def test_create_registers_session_for_user():
+    store = make_store()
+    pipe = MagicMock(execute=AsyncMock())
+    store.manager.client.pipeline.return_value = pipe
+    jti = await store.create("user@example.com", "phone")
+    pipe.hset.assert_called_once_with(
+        f"session:{jti}", mapping={"email": "user@example.com", "family": jti, "device": "phone"}
+    )
+    pipe.sadd.assert_called_once_with("user_sessions:user@example.com", jti)
+    pipe.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_rotate_returns_new_jti_in_one_script_call():
+    store = make_store()
+    store.rotate_script.return_value = [b"ok", b"family"]
+    new_jti = await store.rotate("old", "user@example.com")
+    assert new_jti and new_jti != "old"
+    store.rotate_script.assert_awaited_once()
+    keys = store.rotate_script.call_args.kwargs["keys"]
+    assert keys == ["session:old", f"session:{new_jti}", "user_sessions:user@example.com", "session_used:old"]
+
+@pytest.mark.asyncio
+async def test_rotate_unknown_session():
+    store = make_store()
+    store.rotate_script.return_value = [b"missing", b""]
+    assert await store.rotate("old", "user@example.com") is None
+
+@pytest.mark.asyncio
+async def test_rotate_reuse_revokes_family():
+    store = make_store()
+    store.rotate_script.return_value = [b"reused", b"family"]
+    store.revoke_family_script.return_value = 2
+    with pytest.raises(RefreshTokenReused):
+        await store.rotate("old", "user@example.com")
+    store.revoke_family_script.assert_awaited_once_with(
+        keys=["user_sessions:user@example.com"], args=["family", "session:"]
+    )
+
+@pytest.mark.asyncio
+async def test_revoke_ends_one_session():
+    store = make_store()
+    pipe = MagicMock(execute=AsyncMock())
+    store.manager.client.pipeline.return_value = pipe
+    await store.revoke("jti", "user@example.com")
+    pipe.delete.assert_called_once_with("session:jti")
+    pipe.srem.assert_called_once_with("user_sessions:user@example.com", "jti")
+    pipe.execute.assert_awaited_once()
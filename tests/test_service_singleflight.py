@@ -0,0 +1,64 @@
+from src.services.singleflight import SingleFlight, should_refresh_early
+import asyncio
+import pytest
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    group = SingleFlight()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*[group.do("key", loader) for _ in range(10)])
+    assert results == ["value"] * 10
+    assert calls == 1
+    assert len(group) == 0
+
+@pytest.mark.asyncio
+async def test_sequential_calls_load_again():
+    group = SingleFlight()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await group.do("key", loader) == 1
+    assert await group.do("key", loader) == 2
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_callers():
+    group = SingleFlight()
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*[group.do("key", loader) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(group) == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_load():
+    group = SingleFlight()
+
+    async def loader():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    first = asyncio.ensure_future(group.do("key", loader))
+    second = asyncio.ensure_future(group.do("key", loader))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "value"
+
+def test_should_refresh_early():
+    assert not should_refresh_early(ttl_remaining=900, delta=0.01)
+    assert should_refresh_early(ttl_remaining=0, delta=0.01)
+    assert not should_refresh_early(ttl_remaining=0, delta=0.01, beta=0)
+    assert not should_refresh_early(ttl_remaining=-2, delta=0.01)
@@ -0,0 +1,74 @@
+from email.message import EmailMessage
+from fastapi_mail.errors import ConnectionErrors
+from src.services.smtp_pool import SMTPPool
+import asyncio
+import pytest
+import socket
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 OK"
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield port, handler
+    controller.stop()
+
+def make_message(n: int) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = f"message {n}"
+    message["From"] = "app@example.com"
+    message["To"] = "user@example.com"
+    message.set_content("hello")
+    return message
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections(smtp_server):
+    port, handler = smtp_server
+    pool = SMTPPool("127.0.0.1", port, size=2)
+    await asyncio.gather(*(pool.send(make_message(n)) for n in range(20)))
+    await pool.close()
+    assert len(handler.messages) == 20
+    assert pool.opened <= 2
+    assert len(handler.sessions) <= 2
+
+@pytest.mark.asyncio
+async def test_pool_retires_connection_after_max_messages(smtp_server):
+    port, handler = smtp_server
+    pool = SMTPPool("127.0.0.1", port, size=1, max_messages=3)
+    for n in range(7):
+        await pool.send(make_message(n))
+    await pool.close()
+    assert len(handler.messages) == 7
+    assert pool.opened == 3
+
+@pytest.mark.asyncio
+async def test_pool_reconnects_after_server_drops_connection(smtp_server):
+    port, handler = smtp_server
+    pool = SMTPPool("127.0.0.1", port, size=1)
+    await pool.send(make_message(1))
+    pool.idle[0].smtp.close()
+    await pool.send(make_message(2))
+    await pool.close()
+    assert len(handler.messages) == 2
+    assert pool.opened == 2
+
+@pytest.mark.asyncio
+async def test_pool_raises_connection_errors_when_server_is_down():
+    pool = SMTPPool("127.0.0.1", 1, size=1, timeout=1)
+    with pytest.raises(ConnectionErrors):
+        await pool.send(make_message(1))
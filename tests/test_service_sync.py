@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base, ContactTombstone, User, utcnow
+from src.services.sync import ContactSync, decode_token, encode_token
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import pytest
+
+def test_token_round_trip():
+    changes = (datetime(2026, 10, 19, 12, 30, 15, 123456), 42)
+    deletes = (datetime(2026, 10, 19, 12, 0), 7)
+    token = encode_token(changes, deletes)
+    assert "=" not in token
+    assert decode_token(token) == (changes, deletes)
+
+@pytest.mark.parametrize("token", ["not-a-token", encode_token((datetime(2026, 1, 1), 1), (datetime(2026, 1, 1), 1))[:-4], "W10"])
+def test_decode_token_rejects_invalid_tokens(token):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_token(token)
+    assert exc_info.value.status_code == 400
+
+def test_advance_keeps_position_until_caught_up():
+    caught_up = (datetime(2026, 1, 1), 0)
+    rows = [SimpleNamespace(key=(datetime(2025, 1, 1), n)) for n in range(3)]
+    page, cursor, more = ContactSync._advance(rows, 2, lambda row: row.key, caught_up)
+    assert (len(page), cursor, more) == (2, rows[1].key, True)
+    page, cursor, more = ContactSync._advance(rows, 3, lambda row: row.key, caught_up)
+    assert (len(page), cursor, more) == (3, caught_up, False)
+
+@pytest.mark.asyncio
+async def test_token_older_than_retention_requires_full_resync():
+    sync = ContactSync(retention=24 * 3600)
+    old = utcnow() - timedelta(days=2)
+    with pytest.raises(HTTPException) as exc_info:
+        await sync.changes(encode_token((old, 0), (old, 0)), 10, User(id=1), MagicMock())
+    assert exc_info.value.status_code == 410
+    assert exc_info.value.detail == "Full resync required"
+
+@pytest.mark.asyncio
+async def test_purge_deletes_old_tombstones():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    db.add(User(id=1, username="neo", email="neo@example.com", password="x"))
+    db.add(ContactTombstone(contact_id=1, user_id=1, deleted_at=utcnow() - timedelta(days=2)))
+    db.add(ContactTombstone(contact_id=2, user_id=1))
+    db.commit()
+    db.close()
+
+    sync = ContactSync(retention=24 * 3600, session_factory=session_factory)
+    assert await sync.purge() == 1
+    db = session_factory()
+    assert [tombstone.contact_id for tombstone in db.query(ContactTombstone)] == [2]
+    db.close()
+    engine.dispose()
@@ -0,0 +1,29 @@
+from fastapi import HTTPException, status
+from src.services.worker_pool import WorkerPool
+import asyncio
+import pytest
+import threading
+import time
+
+@pytest.mark.asyncio
+async def test_run_returns_result_off_loop():
+    pool = WorkerPool(max_workers=1, max_queue=0, name="hashing")
+    thread_name = await pool.run(lambda: threading.current_thread().name)
+    assert thread_name.startswith("hashing")
+    assert pool.metrics()["completed"] == 1
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_run_rejects_when_queue_full():
+    pool = WorkerPool(max_workers=1, max_queue=1)
+    slow = [asyncio.ensure_future(pool.run(time.sleep, 0.05)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert pool.metrics()["running"] == 1
+    assert pool.metrics()["queued"] == 1
+    with pytest.raises(HTTPException) as excinfo:
+        await pool.run(time.sleep, 0)
+    assert excinfo.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    await asyncio.gather(*slow)
+    assert pool.metrics()["rejected"] == 1
+    assert pool.metrics()["queued"] == 0
+    pool.shutdown()
@@ -1,101 +1,39 @@
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
-from fastapi_mail import FastMail, MessageSchema
-from fastapi_mail.errors import ConnectionErrors
+from unittest.mock import AsyncMock, patch
+from email.message import EmailMessage
 from pydantic import EmailStr
 from src.services.auth import auth_service
-from src.services.email import send_email, send_password_reset_email
+from src.services.email import build_confirmation_email, build_password_reset_email
 
 @pytest.mark.asyncio
-async def test_send_email():
+async def test_build_confirmation_email():
     email: EmailStr = "test@example.com"
     username = "testuser"
     host = "http://localhost"
 
     mock_send_token = "mock_send_token"
     
-    mock_message = AsyncMock()
-    mock_message.subject = "Confirm your email "
-    mock_message.recipients = [email]
-    mock_message.template_body = {
-        "host": host,
-        "username": username,
-    }
-    
     # Mock `create_email_token`
-    with patch.object(auth_service, "create_email_token", return_value=mock_send_token), \
-         patch.object(FastMail, "send_message", new_callable=AsyncMock) as mock_send:
-        
-        mock_send.return_value = mock_message
-        
-        await send_email(email, username, host)
-
-        mock_send.assert_called_once()
-        
-        # Verify the message contents
-        args, kwargs = mock_send.call_args
-        message: MessageSchema = args[0]
-
-        print(f"Message: {message}")
-
-        assert message.subject == "Confirm your email "
-        assert message.recipients == [email]
-        assert message.template_body["host"] == host
-        assert message.template_body["username"] == username
-
-@pytest.mark.asyncio
-async def test_send_password_reset_email():
-    email: EmailStr = "test@example.com"
-    username = "testuser"
-    reset_token = "mock_reset_token"
-    host = "http://localhost"
-
-    with patch.object(FastMail, "send_message", new_callable=AsyncMock) as mock_send:
-        await send_password_reset_email(email, username, reset_token, host)
+    with patch.object(auth_service, "create_email_token", new_callable=AsyncMock, return_value=mock_send_token):
+        message: EmailMessage = await build_confirmation_email(email, username, host)
 
-        # Ensure `send_message` was called once
-        mock_send.assert_called_once()
-        
-        # Verify the message contents
-        args, kwargs = mock_send.call_args
-        message: MessageSchema = args[0]  # Extract the message object
-
-        assert message.subject == "Reset your password "
-        assert message.recipients == [email]
-        assert message.template_body["host"] == host
-        assert message.template_body["username"] == username
-        assert message.template_body["reset_token"] == reset_token
+    assert message["Subject"] == "Confirm your email "
+    assert message["To"] == email
+    body = message.get_content()
+    assert f"{host}api/auth/confirmed_email/{mock_send_token}" in body
+    assert username in body
 
 @pytest.mark.asyncio
-async def test_send_email_connection_error():
-    email: EmailStr = "test@example.com"
-    username = "testuser"
-    host = "http://localhost"
-
-    mock_token = "mock_token"
-
-    with patch.object(auth_service, "create_email_token", return_value=mock_token), \
-         patch.object(FastMail, "send_message", new_callable=AsyncMock) as mock_send:
-        
-        # Simulate a connection error
-        mock_send.side_effect = ConnectionErrors("SMTP server unavailable")
-
-        await send_email(email, username, host)
-
-        mock_send.assert_called_once()
-
-@pytest.mark.asyncio
-async def test_send_password_reset_email_connection_error():
+async def test_build_password_reset_email():
     email: EmailStr = "test@example.com"
     username = "testuser"
     reset_token = "mock_reset_token"
     host = "http://localhost"
 
-    with patch.object(FastMail, "send_message", new_callable=AsyncMock) as mock_send:
-        
-        # Simulate a connection error
-        mock_send.side_effect = ConnectionErrors("SMTP server unavailable")
-
-        await send_password_reset_email(email, username, reset_token, host)
+    message: EmailMessage = await build_password_reset_email(email, username, reset_token, host)
 
-        mock_send.assert_called_once()
+    assert message["Subject"] == "Reset your password "
+    assert message["To"] == email
+    body = message.get_content()
+    assert f"{host}api/auth/password-reset?token={reset_token}" in body
+    assert username in body